@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# glib_integration.py
+# GLib ↔ Qt 루프 통합 방식 비교: 유휴 CPU / 깨어남 횟수 / GLib 콜백 지연 / GLib→Qt 전달 지연
+#
+#   python3 glib_integration.py --idle 10 --samples 500
+#
+# 방식마다 새 프로세스에서 측정한다 (통합은 프로세스 전역 상태).
+#   poll          이전 방식 (5 ms QTimer 폴링, Qt 기본 디스패처)
+#   poll-noglib   QT_NO_GLIB=1 + 폴링 (GLib 디스패처 없는 Qt 빌드와 동일)
+#   qt            Qt의 GLib 디스패처가 기본 컨텍스트를 직접 처리
+#   thread        QT_NO_GLIB=1 + 전용 GLib 스레드
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+from layout_switch import percentile, _RESULT_PREFIX
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RECEIVER_DIR = os.path.abspath(os.path.join(HERE, "..", "receiver"))
+
+# (이름, 통합 모드, 추가 환경 변수)
+CASES = (
+    ("poll", "poll", {}),
+    ("poll-noglib", "poll", {"QT_NO_GLIB": "1"}),
+    ("qt", "qt", {}),
+    ("thread", "thread", {"QT_NO_GLIB": "1"}),
+)
+
+
+def run_child(args):
+    sys.path.insert(0, RECEIVER_DIR)
+    from gi.repository import GLib
+    from PyQt5 import QtCore, QtWidgets
+    from glib_qt_integration import integrate_glib_into_qt, run_in_qt
+
+    app = QtWidgets.QApplication([sys.argv[0]])
+    integration = integrate_glib_into_qt(args.mode)
+    result = {"mode": integration.mode}
+
+    # 1) 유휴: 아무 작업 없이 루프만 돌 때 CPU와 자발적 문맥 전환(≈ 깨어남) 수
+    t0, ru0, w0 = os.times(), resource.getrusage(resource.RUSAGE_SELF), time.monotonic()
+    QtCore.QTimer.singleShot(int(args.idle * 1000), app.quit)
+    app.exec_()
+    t1, ru1, wall = os.times(), resource.getrusage(resource.RUSAGE_SELF), time.monotonic() - w0
+    result["idle_cpu_percent"] = (t1.user + t1.system - t0.user - t0.system) / wall * 100.0
+    result["idle_wakeups_per_s"] = (ru1.ru_nvcsw - ru0.ru_nvcsw) / wall
+
+    # 2) 다른 스레드의 GLib.idle_add → 콜백 실행 / 거기서 run_in_qt → Qt 슬롯 실행
+    glib_lat, qt_lat = [], []
+
+    def _on_qt(t_sent):
+        qt_lat.append(time.perf_counter() - t_sent)
+        if len(qt_lat) >= args.samples:
+            app.quit()
+
+    def _on_glib(t_sent):
+        now = time.perf_counter()
+        glib_lat.append(now - t_sent)
+        run_in_qt(_on_qt, now)
+        return False
+
+    def _producer():
+        for _ in range(args.samples):
+            GLib.idle_add(_on_glib, time.perf_counter())
+            time.sleep(random.uniform(0.005, 0.02))
+
+    threading.Thread(target=_producer, daemon=True).start()
+    QtCore.QTimer.singleShot(int((args.samples * 0.03 + 5) * 1000), app.quit)  # 안전장치
+    app.exec_()
+    integration.stop()
+
+    for key, values in (("glib_callback", glib_lat), ("glib_to_qt", qt_lat)):
+        for p in (50, 95, 99):
+            v = percentile(values, p)
+            result[f"{key}_p{p}_ms"] = None if v is None else v * 1000.0
+    result["samples"] = len(glib_lat)
+    print(_RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+def _fmt(v, spec="7.2f"):
+    return f"{'-':>7}" if v is None else format(v, spec)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="GLib ↔ Qt 통합 방식 벤치마크")
+    ap.add_argument("--idle", type=float, default=5.0, help="유휴 측정 시간 (초)")
+    ap.add_argument("--samples", type=int, default=300, help="지연 측정 콜백 수")
+    ap.add_argument("--cases", default=",".join(c[0] for c in CASES))
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--mode", default="poll", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    wanted = set(args.cases.split(","))
+    rows = []
+    for name, mode, extra_env in CASES:
+        if name not in wanted:
+            continue
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen", **extra_env)
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--mode", mode,
+             "--idle", str(args.idle), "--samples", str(args.samples)],
+            env=env, capture_output=True, text=True)
+        line = next((l for l in proc.stdout.splitlines() if l.startswith(_RESULT_PREFIX)), None)
+        if not line:
+            print(f"[BENCH] {name} 실패:\n{proc.stderr[-2000:]}")
+            continue
+        r = json.loads(line[len(_RESULT_PREFIX):])
+        r["case"] = name
+        rows.append(r)
+
+    print(f"{'case':<12} {'actual':<7} | {'idle CPU%':>9} {'wakeups/s':>9} | "
+          f"{'GLib cb p50':>11} {'p95':>7} {'p99':>7} | {'→Qt p50':>8} {'p95':>7} {'p99':>7}")
+    for r in rows:
+        print(f"{r['case']:<12} {r['mode']:<7} | {r['idle_cpu_percent']:9.2f} "
+              f"{r['idle_wakeups_per_s']:9.0f} | {_fmt(r['glib_callback_p50_ms']):>11} "
+              f"{_fmt(r['glib_callback_p95_ms'])} {_fmt(r['glib_callback_p99_ms'])} | "
+              f"{_fmt(r['glib_to_qt_p50_ms']):>8} {_fmt(r['glib_to_qt_p95_ms'])} "
+              f"{_fmt(r['glib_to_qt_p99_ms'])}")
+    print("(지연 단위 ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# layout_switch.py
+# 레이아웃 전환 지연 벤치마크 (네트워크 없이 한 대의 Linux에서 실행)
+#
+#   python3 layout_switch.py --senders 1,2,4 --cycles 5 --layouts 1,4,2
+#
+# sender 수마다 다음을 새로 띄운다:
+#   1) 시그널링 서버 (server/index.py, 평문, 127.0.0.1)
+#   2) 헤드리스 수신기 (이 파일 --receiver, QT_QPA_PLATFORM=offscreen, software 디코드 → fakesink)
+#   3) 가상 sender N개 (synthetic_sender.py)
+# 수신기는 ViewModeManager.apply_layout_data로 레이아웃을 돌리며
+# 첫 프레임까지 시간(TTFF)/셀 전환 지연/CPU/RSS를 JSON 한 줄로 보고하고,
+# 이 프로세스가 sender 수별 p50/p95/p99 표로 정리한다.
+
+import argparse
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RECEIVER_DIR = os.path.abspath(os.path.join(HERE, "..", "receiver"))
+SERVER_PY = os.path.abspath(os.path.join(HERE, "..", "server", "index.py"))
+SENDER_PY = os.path.join(HERE, "synthetic_sender.py")
+
+_RESULT_PREFIX = "BENCH_RESULT "
+
+
+# ========== 측정 유틸 ==========
+
+def percentile(values, p):
+    """nearest-rank 백분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    s = sorted(values)
+    k = max(math.ceil(p / 100.0 * len(s)) - 1, 0)
+    return s[min(k, len(s) - 1)]
+
+
+def rss_mb():
+    """현재 프로세스 RSS (MB)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+class CpuMeter:
+    """구간 CPU 사용률 (모든 스레드 합, 코어 1개 = 100%)"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        t = os.times()
+        self._cpu0, self._wall0 = t.user + t.system, time.monotonic()
+
+    def percent(self):
+        t = os.times()
+        wall = max(time.monotonic() - self._wall0, 1e-6)
+        return (t.user + t.system - self._cpu0) / wall * 100.0
+
+
+# ========== 수신기 측 (서브프로세스) ==========
+
+def run_receiver(args):
+    """헤드리스 수신기를 띄워 측정 후 결과 JSON 한 줄 출력"""
+    sys.path.insert(0, RECEIVER_DIR)
+    os.chdir(RECEIVER_DIR)
+
+    import gi
+    gi.require_version('Gst', '1.0')
+    from gi.repository import Gst
+    from PyQt5 import QtWidgets
+
+    Gst.init(None)
+    from ui_components import ReceiverWindow
+    from receiver_manager import MultiReceiverManager
+    from glib_qt_integration import integrate_glib_into_qt
+    from view_mode_manager import ViewModeManager
+    from gst_utils import probe_capabilities
+
+    app = QtWidgets.QApplication([sys.argv[0]])
+    ui = ReceiverWindow()
+    ui.resize(1280, 720)
+    ui.show()
+    probe_capabilities()
+    glib_integration = integrate_glib_into_qt()
+    view_manager = ViewModeManager(ui)
+    manager = MultiReceiverManager(ui, view_manager)
+    manager.start()
+
+    def pump(pred, timeout):
+        """Qt(+GLib) 이벤트를 돌리며 pred()가 참이 될 때까지 대기"""
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            app.processEvents()
+            if pred():
+                return True
+            time.sleep(0.002)
+        return False
+
+    n = args.count
+    shown = min(n, 4)
+    result = {"senders": n, "ttff_s": [], "switch_s": [], "switch_timeouts": 0, "kept_cells": 0}
+
+    # 1) 입장: 들어오는 순서대로 4분할 셀에 배치해 첫 프레임까지 시간 측정
+    view_manager.set_mode(4)
+    placed = []
+
+    def _place_new():
+        for sid, _ in manager.list_active_senders():
+            if sid not in placed and len(placed) < shown:
+                view_manager.assign(len(placed), sid)
+                placed.append(sid)
+        return len(placed) >= shown
+
+    cpu = CpuMeter()
+    if not pump(_place_new, args.join_timeout):
+        print(f"[BENCH] {len(placed)}/{shown} sender만 입장", file=sys.stderr)
+    pump(lambda: all(manager.peers[s].ttff_s is not None for s in placed if s in manager.peers),
+         args.join_timeout)
+    result["ttff_s"] = [manager.peers[s].ttff_s for s in placed
+                        if s in manager.peers and manager.peers[s].ttff_s is not None]
+    result["join_cpu_percent"] = cpu.percent()
+
+    # 2) 레이아웃 순환: apply_layout_data → 배정된 sender마다 첫 렌더 프레임까지
+    order = list(manager.peers.keys())
+    cpu.reset()
+    rss_peak = rss_mb()
+    for cycle in range(args.cycles):
+        for layout in args.layouts:
+            k = min(layout, len(order))
+            rot = order[cycle % len(order):] + order[:cycle % len(order)] if order else []
+            chosen = rot[:k]
+            # 같은 셀에 그대로 남는 sender는 재배정(requestAssign)이 없으므로 바뀌는 셀만 기다린다
+            current = dict(view_manager.cell_assignments)
+            moved = [sid for idx, sid in enumerate(chosen) if current.get(idx) != sid]
+            before = {sid: manager.peers[sid].switch_count for sid in moved}
+            view_manager.apply_layout_data({
+                "layout": layout,
+                "participants": [{"id": sid, "name": manager.peers[sid].sender_name} for sid in chosen],
+            })
+            done = pump(lambda: all(manager.peers[s].switch_count > before[s]
+                                    for s in moved if s in manager.peers), args.switch_timeout)
+            if not done:
+                result["switch_timeouts"] += 1
+            result["kept_cells"] += len(chosen) - len(moved)
+            for sid in moved:
+                p = manager.peers.get(sid)
+                if p and p.switch_count > before[sid] and p.switch_latency_s is not None:
+                    result["switch_s"].append(p.switch_latency_s)
+            rss_peak = max(rss_peak, rss_mb())
+            pump(lambda: False, args.dwell)
+    result["switch_cpu_percent"] = cpu.percent()
+    result["rss_mb"] = rss_peak
+
+    manager.stop()
+    glib_integration.stop()
+    print(_RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+# ========== 오케스트레이션 ==========
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_port(port, timeout=10.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def _terminate(proc, timeout=5.0):
+    if proc and proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def run_once(args, count):
+    port = args.port or _free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ,
+               SIGNALING_HOST="127.0.0.1", SIGNALING_PORT=str(port), SIGNALING_TLS="0",
+               MULTIPY_SIGNALING_URL=url, MULTIPY_STUN_SERVER="",
+               MULTIPY_DECODE_PROFILE=args.profile, MULTIPY_DECODE_SINK=args.sink,
+               QT_QPA_PLATFORM="offscreen")
+    quiet = None if args.verbose else subprocess.DEVNULL
+
+    server = receiver = senders = None
+    try:
+        server = subprocess.Popen([sys.executable, SERVER_PY], env=env, stdout=quiet, stderr=quiet)
+        if not _wait_port(port):
+            raise RuntimeError("시그널링 서버가 뜨지 않음")
+
+        receiver = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--receiver", "--count", str(count),
+             "--cycles", str(args.cycles), "--layouts", ",".join(map(str, args.layouts)),
+             "--dwell", str(args.dwell), "--join-timeout", str(args.join_timeout),
+             "--switch-timeout", str(args.switch_timeout)],
+            env=env, stdout=subprocess.PIPE, stderr=quiet, text=True)
+        time.sleep(1.0)  # 수신기가 receiver로 먼저 입장해야 sender join이 성공한다
+
+        senders = subprocess.Popen(
+            [sys.executable, SENDER_PY, "--url", url, "--count", str(count),
+             "--width", str(args.width), "--height", str(args.height), "--gop", str(args.gop)],
+            env=env, stdout=quiet, stderr=quiet)
+
+        for line in receiver.stdout:
+            if args.verbose:
+                sys.stdout.write(line)
+            if line.startswith(_RESULT_PREFIX):
+                return json.loads(line[len(_RESULT_PREFIX):])
+        raise RuntimeError(f"수신기 종료 (code={receiver.wait()}), 결과 없음")
+    finally:
+        _terminate(senders)
+        _terminate(receiver)
+        _terminate(server)
+
+
+def _ms(v):
+    return "-" if v is None else f"{v * 1000.0:7.0f}"
+
+
+def report(results):
+    print()
+    print(f"{'senders':>7} | {'TTFF p50':>8} {'p95':>7} {'p99':>7} | "
+          f"{'switch p50':>10} {'p95':>7} {'p99':>7} | {'CPU%':>6} {'RSS MB':>7} | timeouts")
+    for r in results:
+        t, s = r["ttff_s"], r["switch_s"]
+        print(f"{r['senders']:>7} | {_ms(percentile(t, 50)):>8} {_ms(percentile(t, 95))} "
+              f"{_ms(percentile(t, 99))} | {_ms(percentile(s, 50)):>10} {_ms(percentile(s, 95))} "
+              f"{_ms(percentile(s, 99))} | {r['switch_cpu_percent']:6.1f} {r['rss_mb']:7.1f} | "
+              f"{r['switch_timeouts']}")
+    print("(ms, switch = apply_layout_data 이후 각 셀의 첫 렌더 프레임까지)")
+
+
+def _int_list(s):
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="레이아웃 전환 지연 벤치마크")
+    ap.add_argument("--senders", type=_int_list, default=[1, 2, 4], help="측정할 sender 수 목록")
+    ap.add_argument("--layouts", type=_int_list, default=[1, 4, 2], help="순환할 레이아웃")
+    ap.add_argument("--cycles", type=int, default=5)
+    ap.add_argument("--dwell", type=float, default=0.5, help="전환 사이 대기 (초)")
+    ap.add_argument("--join-timeout", type=float, default=20.0)
+    ap.add_argument("--switch-timeout", type=float, default=5.0)
+    ap.add_argument("--width", type=int, default=1280)
+    ap.add_argument("--height", type=int, default=720)
+    ap.add_argument("--gop", type=int, default=300)
+    ap.add_argument("--profile", default="software", help="수신 디코드 프로파일")
+    ap.add_argument("--sink", default="fakesink", help="수신 싱크 (화면이 있으면 autovideosink 등)")
+    ap.add_argument("--port", type=int, default=0, help="시그널링 포트 (0이면 빈 포트)")
+    ap.add_argument("--json", help="결과를 JSON 파일로 저장")
+    ap.add_argument("--verbose", action="store_true")
+    # 내부용: 수신기 서브프로세스
+    ap.add_argument("--receiver", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--count", type=int, default=1, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.receiver:
+        run_receiver(args)
+        return
+
+    results = []
+    for n in args.senders:
+        print(f"[BENCH] senders={n} ...", flush=True)
+        try:
+            results.append(run_once(args, n))
+        except Exception as e:
+            print(f"[BENCH] senders={n} 실패: {e}")
+    if results:
+        report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
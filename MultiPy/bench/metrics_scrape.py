@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# metrics_scrape.py
+# /metrics 엔드포인트 점검: 실제 MetricsServer를 로컬 포트에 띄우고 스크레이퍼처럼 읽어 형식/값 확인
+#
+#   python3 metrics_scrape.py
+#
+# 수신기 전체 대신 peers만 가진 최소 관리자 객체와 stats_registry 샘플 하나로 렌더링한다.
+# 확인 항목
+#   - 200 + Prometheus 텍스트 Content-Type, 다른 경로는 404
+#   - 모든 샘플 줄이 "이름{레이블} 값" 형식이고 그 메트릭의 HELP/TYPE이 먼저 나옴
+#   - 등록한 sender 샘플/피어 속성/게이지 값이 그대로 노출됨
+#   - stop() 뒤에는 포트가 닫힘
+# 통과하면 종료 코드 0, 아니면 실패 항목을 출력하고 1.
+
+import os
+import re
+import sys
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "receiver")))
+
+from PyQt5 import QtCore  # noqa: E402
+
+from metrics_server import MetricsServer  # noqa: E402
+from stats import stats_registry  # noqa: E402
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (-?[0-9.e+-]+|NaN|[+-]Inf)$')
+
+
+def _get(url):
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        return resp.status, resp.headers.get("Content-Type", ""), resp.read().decode("utf-8")
+
+
+def parse_exposition(text):
+    """Prometheus 텍스트 → ({(이름, 레이블): 값}, 오류 목록)"""
+    values, errors, declared = {}, [], set()
+    for line in text.splitlines():
+        if not line:
+            continue
+        if line.startswith("# HELP ") or line.startswith("# TYPE "):
+            declared.add(line.split(" ")[2])
+            continue
+        m = _SAMPLE.match(line)
+        if not m:
+            errors.append(f"bad line: {line!r}")
+            continue
+        name, labels, value = m.groups()
+        if name not in declared:
+            errors.append(f"{name} without HELP/TYPE")
+        values[(name, labels or "")] = float(value)
+    return values, errors
+
+
+def main():
+    app = QtCore.QCoreApplication(sys.argv)   # LoopLagProbe QTimer용
+
+    sid = "scrape-sender"
+    stats_registry.register(sid).update(None, fps=29.5, drop_rate=0.0, width=1280, height=720)
+    peer = SimpleNamespace(sender_name='name "quoted"', ice_state=2, ttff_s=0.8, negotiation_s=0.1,
+                           switch_latency_s=None, switch_count=3)
+    manager = SimpleNamespace(peers={sid: peer})
+
+    server = MetricsServer(manager, "127.0.0.1", 0)
+    server.register_gauge("receiver_scrape_check", "Gauge registered by the scrape check", lambda: 42)
+    server.start()
+    base = f"http://127.0.0.1:{server.port}"
+    failures = []
+    try:
+        status, ctype, body = _get(base + "/metrics")
+        if status != 200 or not ctype.startswith("text/plain; version=0.0.4"):
+            failures.append(f"/metrics → {status} {ctype}")
+        values, errors = parse_exposition(body)
+        failures += errors
+
+        labels = f'{{sender_id="{sid}",sender="name \\"quoted\\""}}'
+        expected = {
+            ("receiver_sender_fps", labels): 29.5,
+            ("receiver_sender_width", labels): 1280.0,
+            ("receiver_sender_time_to_first_frame_seconds", labels): 0.8,
+            ("receiver_sender_switches", labels): 3.0,
+            ("receiver_senders", ""): 1.0,
+            ("receiver_scrape_check", ""): 42.0,
+        }
+        for key, want in expected.items():
+            got = values.get(key)
+            if got != want:
+                failures.append(f"{key[0]}{key[1]} = {got}, expected {want}")
+        if ("receiver_sender_switch_latency_seconds", labels) in values:
+            failures.append("None peer attribute exported")
+
+        try:
+            _get(base + "/nope")
+            failures.append("/nope did not return 404")
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                failures.append(f"/nope → {e.code}")
+    finally:
+        server.stop()
+        stats_registry.unregister(sid)
+
+    try:
+        _get(base + "/metrics")
+        failures.append("server still answering after stop()")
+    except (urllib.error.URLError, ConnectionError):
+        pass
+
+    for f in failures:
+        print("[FAIL]", f)
+    if not failures:
+        print(f"[OK] scraped {base}/metrics")
+    del app
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# set_mode.py
+# ViewModeManager 레이아웃 전환 비용 마이크로벤치마크 (오프스크린 Qt, 스트림 없음)
+#
+#   python3 set_mode.py --iterations 2000
+#
+#   set_mode           키보드 1~4 전환과 같은 전체 재구성
+#   apply_layout_data  관리자 페이지 screen/update (증분 반영)
+# 호출마다 이벤트 처리(deleteLater/polish 포함)까지 시간에 넣고,
+# 살아 있는 QWidget 수가 늘어나는지(= 전환마다 위젯 생성) 함께 출력한다.
+# 측정 전에 증분 반영 정확성 점검(check_reconcile)을 돌려 실패하면 종료 코드 1.
+
+import argparse
+import os
+import random
+import sys
+import time
+
+from layout_switch import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "receiver")))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtWidgets  # noqa: E402
+
+
+def _measure(app, fn, args_list):
+    """args_list의 각 인자로 fn 호출 → (호출당 초 목록, 위젯 수 증가량)"""
+    times = []
+    app.processEvents()
+    widgets0 = len(QtWidgets.QApplication.allWidgets())
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        app.processEvents()
+        times.append(time.perf_counter() - t0)
+    app.processEvents()
+    return times, len(QtWidgets.QApplication.allWidgets()) - widgets0
+
+
+def check_reconcile(vm):
+    """screen/update 밖에서 배정된 셀(자동 단일 모드, S 키 선택)도 증분 비교에서 풀리는지 확인"""
+    unassigned = []
+    vm.requestUnassign.connect(unassigned.append)
+    failures = []
+    try:
+        # 첫 sender 자동 배정 (receiver_manager._on_sender_share_started와 같은 경로)
+        vm.set_mode(1)
+        vm.assign(0, "auto-sender")
+        vm.apply_layout_data({"layout": 1, "participants": []})
+        if unassigned != [0] or vm.cell_assignments:
+            failures.append(f"auto assign → empty update: unassigned={unassigned}, "
+                            f"left={vm.cell_assignments}")
+
+        # S 키 선택 (포커스 셀 배정)
+        unassigned.clear()
+        vm.set_mode(4)
+        vm._set_focus(2)
+        vm._assign_to_focus("picked-sender")
+        vm.apply_layout_data({"layout": 4, "participants": [{"id": "other", "name": "other"}]})
+        if unassigned != [2] or vm.cell_assignments != {0: "other"}:
+            failures.append(f"picker assign → update: unassigned={unassigned}, "
+                            f"left={vm.cell_assignments}")
+    finally:
+        vm.requestUnassign.disconnect(unassigned.append)
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description="레이아웃 전환 비용 마이크로벤치마크")
+    ap.add_argument("--iterations", type=int, default=1000)
+    ap.add_argument("--warmup", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    from ui_components import ReceiverWindow
+    from view_mode_manager import ViewModeManager
+
+    app = QtWidgets.QApplication([sys.argv[0]])
+    ui = ReceiverWindow()
+    ui.show()
+    vm = ViewModeManager(ui)   # 매니저 미연결: 배정 요청 시그널은 받는 곳 없이 발행만 됨
+
+    real_stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        failures = check_reconcile(vm)
+    finally:
+        sys.stdout = real_stdout
+    for f in failures:
+        print("[FAIL]", f)
+    if failures:
+        ui.close()
+        return 1
+
+    rnd = random.Random(args.seed)
+    senders = [f"sender-{i}" for i in range(6)]
+
+    def modes(n):
+        return [(rnd.randint(1, 4),) for _ in range(n)]
+
+    def layouts(n):
+        out = []
+        for _ in range(n):
+            mode = rnd.randint(1, 4)
+            picked = rnd.sample(senders, mode)
+            out.append(({"layout": mode, "participants": [{"id": s, "name": s} for s in picked]},))
+        return out
+
+    cases = (("set_mode", vm.set_mode, modes), ("apply_layout_data", vm.apply_layout_data, layouts))
+
+    # 디버그 출력은 측정에서 제외
+    devnull = open(os.devnull, "w")
+    rows = []
+    for name, fn, gen in cases:
+        real_stdout, sys.stdout = sys.stdout, devnull
+        try:
+            _measure(app, fn, gen(args.warmup))
+            times, grown = _measure(app, fn, gen(args.iterations))
+        finally:
+            sys.stdout = real_stdout
+        rows.append((name, times, grown))
+
+    print(f"{'case':<18} {'calls':>6} | {'mean µs':>8} {'p50':>8} {'p95':>8} {'p99':>8} | "
+          f"{'widgets +':>9}")
+    for name, times, grown in rows:
+        us = [t * 1e6 for t in times]
+        print(f"{name:<18} {len(us):6d} | {sum(us) / len(us):8.0f} {percentile(us, 50):8.0f} "
+              f"{percentile(us, 95):8.0f} {percentile(us, 99):8.0f} | {grown:9d}")
+    ui.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
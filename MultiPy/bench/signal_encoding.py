@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# signal_encoding.py
+# 시그널 메시지 인코딩 비교: 전송 바이트 수 / 직렬화·역직렬화 시간 (메시지당)
+#
+#   python3 signal_encoding.py --number 20000
+#
+#   json            현재 'signal' 이벤트 (Socket.IO 텍스트 패킷 본문)
+#   json+zlib       참고용: JSON을 deflate (브라우저에서 동기 처리 불가라 채택 안 함)
+#   msgpack         dict를 그대로 MessagePack
+#   msgpack+tmpl    receiver/signal_codec.py ('signal-bin', SDP 줄 템플릿)
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import zlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "receiver")))
+
+import signal_codec  # noqa: E402
+
+# webrtcbin(recvonly H264) offer — receiver가 보내는 형태
+OFFER_SDP = "\r\n".join([
+    "v=0",
+    "o=- 3805447826171237398 0 IN IP4 0.0.0.0",
+    "s=-",
+    "t=0 0",
+    "a=ice-options:trickle",
+    "a=group:BUNDLE video0",
+    "m=video 9 UDP/TLS/RTP/SAVPF 96 97",
+    "c=IN IP4 0.0.0.0",
+    "a=setup:actpass",
+    "a=ice-ufrag:Kq5vJ0hqGyVtwhqOBMpUJ3cN0aS1ZMUI",
+    "a=ice-pwd:g7Xv9Tr+rJU9qKx6bq4yC0pIYpJ8xEaS",
+    "a=rtcp-mux",
+    "a=rtcp-rsize",
+    "a=recvonly",
+    "a=rtpmap:96 H264/90000",
+    "a=rtcp-fb:96 nack",
+    "a=rtcp-fb:96 nack pli",
+    "a=rtcp-fb:96 ccm fir",
+    "a=fmtp:96 packetization-mode=1;profile-level-id=42e01f;level-asymmetry-allowed=1",
+    "a=rtpmap:97 rtx/90000",
+    "a=fmtp:97 apt=96",
+    "a=mid:video0",
+    "a=fingerprint:sha-256 6B:8B:5D:EA:59:04:20:23:29:C8:87:1C:CC:87:32:BE:DD:8C:66:A5:"
+    "8E:50:55:EA:8C:D3:B6:5C:09:5E:D6:BC",
+    "",
+])
+
+# Chrome answer (sendonly H264, simulcast 없음)
+ANSWER_SDP = "\r\n".join([
+    "v=0",
+    "o=- 6251339412744834961 2 IN IP4 127.0.0.1",
+    "s=-",
+    "t=0 0",
+    "a=group:BUNDLE video0",
+    "a=extmap-allow-mixed",
+    "a=msid-semantic: WMS 9b1c6a2e-1f0e-4d6f-9a27-36c1a8f1f2d4",
+    "m=video 9 UDP/TLS/RTP/SAVPF 96 97",
+    "c=IN IP4 0.0.0.0",
+    "a=rtcp:9 IN IP4 0.0.0.0",
+    "a=ice-ufrag:4ZcD",
+    "a=ice-pwd:2/1muCWoOi3uHTiCyG7K4gYl",
+    "a=ice-options:trickle",
+    "a=fingerprint:sha-256 3F:0B:27:92:CA:21:7A:4C:8E:0D:7C:6A:2D:16:4B:B1:43:1C:CE:5D:"
+    "FA:9B:9E:21:7E:6F:4C:6D:42:93:19:D4",
+    "a=setup:active",
+    "a=mid:video0",
+    "a=extmap:1 urn:ietf:params:rtp-hdrext:toffset",
+    "a=extmap:2 http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time",
+    "a=extmap:3 urn:3gpp:video-orientation",
+    "a=extmap:4 http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01",
+    "a=sendonly",
+    "a=msid:9b1c6a2e-1f0e-4d6f-9a27-36c1a8f1f2d4 0e8b6f7e-3c1a-4a52-8f3e-5d2b9c7a1e60",
+    "a=rtcp-mux",
+    "a=rtcp-rsize",
+    "a=rtpmap:96 H264/90000",
+    "a=rtcp-fb:96 goog-remb",
+    "a=rtcp-fb:96 transport-cc",
+    "a=rtcp-fb:96 ccm fir",
+    "a=rtcp-fb:96 nack",
+    "a=rtcp-fb:96 nack pli",
+    "a=fmtp:96 level-asymmetry-allowed=1;packetization-mode=1;profile-level-id=42e01f",
+    "a=rtpmap:97 rtx/90000",
+    "a=fmtp:97 apt=96",
+    "a=ssrc-group:FID 2231627014 632943048",
+    "a=ssrc:2231627014 cname:4TOk42mSjXCkVIa6",
+    "a=ssrc:632943048 cname:4TOk42mSjXCkVIa6",
+    "",
+])
+
+CANDIDATES = [
+    {"candidate": f"candidate:{842163049 + i} 1 udp {1677729535 - i} 192.168.0.{10 + i} "
+                  f"{50000 + i} typ srflx raddr 10.0.0.{i} rport {50000 + i} generation 0 "
+                  f"ufrag 4ZcD network-cost 999",
+     "sdpMid": "video0", "sdpMLineIndex": 0, "usernameFragment": "4ZcD"}
+    for i in range(8)
+]
+
+SID = "Zk3VbQ1mUu7rL0YxAAAB"
+MESSAGES = (
+    ("offer", {"to": SID, "from": SID, "type": "offer",
+               "payload": {"type": "offer", "sdp": OFFER_SDP}}),
+    ("answer", {"from": SID, "type": "answer",
+                "payload": {"type": "answer", "sdp": ANSWER_SDP}}),
+    ("candidate", {"from": SID, "type": "candidate", "payload": CANDIDATES[0]}),
+    ("candidates x8", {"from": SID, "type": "candidates",
+                       "payload": {"candidates": CANDIDATES, "end": True}}),
+)
+
+
+def _codecs():
+    import msgpack
+
+    def j_enc(m):
+        return json.dumps(m, separators=(",", ":")).encode()
+
+    def jz_enc(m):
+        return zlib.compress(j_enc(m))
+
+    def mp_enc(m):
+        return msgpack.packb(m, use_bin_type=True)
+
+    def tmpl_enc(m):
+        # 봉투 {to, data} 포함 ('signal-bin' 이벤트 인자 그대로)
+        return msgpack.packb({"to": m.get("to"), "data": signal_codec.pack(m)}, use_bin_type=True)
+
+    def tmpl_dec(b):
+        env = msgpack.unpackb(b, raw=False)
+        return signal_codec.unpack(env["data"])
+
+    return (
+        ("json", j_enc, json.loads),
+        ("json+zlib", jz_enc, lambda b: json.loads(zlib.decompress(b))),
+        ("msgpack", mp_enc, lambda b: msgpack.unpackb(b, raw=False)),
+        ("msgpack+tmpl", tmpl_enc, tmpl_dec),
+    )
+
+
+def _per_call_us(fn, arg, number, repeat):
+    return min(timeit.repeat(lambda: fn(arg), number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description="시그널 메시지 인코딩 벤치마크")
+    ap.add_argument("--number", type=int, default=5000, help="측정 1회당 반복 수")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    if not signal_codec.AVAILABLE:
+        sys.exit("msgpack 모듈이 필요합니다 (pip install msgpack)")
+
+    codecs = _codecs()
+    print(f"{'message':<14} {'codec':<13} | {'bytes':>6} {'vs json':>8} | "
+          f"{'encode µs':>9} {'decode µs':>9}")
+    for label, msg in MESSAGES:
+        base = None
+        for name, enc, dec in codecs:
+            blob = enc(msg)
+            base = base or len(blob)
+            t_enc = _per_call_us(enc, msg, args.number, args.repeat)
+            t_dec = _per_call_us(dec, blob, args.number, args.repeat)
+            print(f"{label:<14} {name:<13} | {len(blob):6d} {len(blob) / base * 100:7.1f}% | "
+                  f"{t_enc:9.2f} {t_dec:9.2f}")
+        print()
+
+    # 왕복 검증 (템플릿에 없는 줄도 그대로 복원되는지)
+    for label, msg in MESSAGES:
+        out = signal_codec.unpack(signal_codec.pack(msg))
+        want = msg["payload"]
+        if msg["type"] == "candidates":
+            assert out["payload"]["candidates"] == want["candidates"], label
+        else:
+            assert out["payload"] == want, label
+    print("round-trip OK")
+
+
+if __name__ == "__main__":
+    main()
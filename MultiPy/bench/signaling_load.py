@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# signaling_load.py
+# 시그널링 서버 부하 테스트: 방 여러 개 × sender 소켓 수천 개를 서버 한 코어에 붙여 측정
+#
+#   python3 signaling_load.py --rooms 50 --senders 4000 --signals 5
+#
+# 서버(server/index.py)는 평문으로 띄우고 CPU 0번 코어에 고정한다.
+# --server-workers N: 서버를 워커 N개(+라우터)로 띄우고 CPU 0..N-1에 고정 (mqtt 백플레인 필요)
+# 클라이언트는 여러 프로세스(--procs)의 asyncio socketio.AsyncClient로 나눠 띄운다.
+#   1) 방마다 receiver 1개 입장
+#   2) sender N개가 방에 고르게 입장 (join-room ack 지연 측정)
+#   3) sender마다 signal 메시지 K개 → receiver 도착까지 중계 지연 측정
+# 서버 프로세스 CPU%/RSS와 함께 p50/p95/p99를 출력한다.
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from layout_switch import percentile, _free_port, _wait_port, _terminate, _RESULT_PREFIX
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVER_PY = os.path.abspath(os.path.join(HERE, "..", "server", "index.py"))
+
+
+def _proc_stat(pid):
+    """(CPU 초, RSS MB) — /proc 기반"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    tick = os.sysconf("SC_CLK_TCK")
+    cpu = (int(fields[11]) + int(fields[12])) / tick
+    rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    return cpu, rss
+
+
+def _tree_stat(pid):
+    """_proc_stat을 자식 프로세스(워커)까지 합산"""
+    cpu, rss = _proc_stat(pid)
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        children = []
+    for child in children:
+        try:
+            c, r = _tree_stat(child)
+        except OSError:
+            continue
+        cpu, rss = cpu + c, rss + r
+    return cpu, rss
+
+
+# ========== 클라이언트 워커 (서브프로세스) ==========
+
+async def _worker(args):
+    import socketio
+
+    url = args.url
+    rooms = [f"room-{i}" for i in range(args.rooms)]
+    mine = range(args.worker, args.senders, args.procs)   # 이 워커가 맡을 sender 번호
+    join_lat, relay_lat = [], []
+    received = 0
+
+    async def connect(client, room):
+        # ?room=: 멀티 워커 서버의 라우터가 같은 방을 한 워커로 보내는 키
+        await client.connect(f"{url}?room={room}", transports=["websocket"])
+
+    # 1) receiver: 워커 i가 i, i+procs, ... 번째 방을 맡는다
+    my_rooms = range(args.worker, args.rooms, args.procs)
+    # sender i는 i % rooms 번째 방 → 이 워커의 receiver가 받아야 할 메시지 수
+    expected = sum(len(range(r, args.senders, args.rooms)) for r in my_rooms) * args.signals
+    receivers = []
+    for r in my_rooms:
+        c = socketio.AsyncClient(reconnection=False)
+
+        @c.on("signal")
+        async def on_signal(data):
+            nonlocal received
+            sent = (data.get("payload") or {}).get("t")
+            if sent is not None:
+                relay_lat.append(time.time() - sent)
+            received += 1
+
+        await connect(c, rooms[r])
+        await c.call("join-room", {"role": "receiver", "name": rooms[r]})
+        receivers.append(c)
+
+    # 다른 워커의 receiver가 모두 입장할 때까지
+    await asyncio.sleep(args.settle)
+
+    # 2) sender 입장 (동시 연결 수 제한)
+    gate = asyncio.Semaphore(args.concurrency)
+    senders = []
+
+    async def join(i):
+        async with gate:
+            c = socketio.AsyncClient(reconnection=False)
+            await connect(c, rooms[i % args.rooms])
+            t0 = time.perf_counter()
+            ack = await c.call("join-room", {"role": "sender", "name": f"s{i}",
+                                             "room": rooms[i % args.rooms]})
+            if ack and ack.get("success"):
+                join_lat.append(time.perf_counter() - t0)
+                senders.append(c)
+            else:
+                await c.disconnect()
+
+    await asyncio.gather(*(join(i) for i in mine), return_exceptions=True)
+
+    # 3) signal 중계: sender → 서버 → 같은 방 receiver
+    await asyncio.sleep(args.settle)
+    t_sig = time.perf_counter()
+    for _ in range(args.signals):
+        await asyncio.gather(*(c.emit("signal", {"type": "candidate", "payload": {"t": time.time()}})
+                               for c in senders))
+    end = time.monotonic() + args.timeout
+    while time.monotonic() < end and received < expected:
+        await asyncio.sleep(0.05)
+    sig_wall = time.perf_counter() - t_sig
+
+    result = {"worker": args.worker, "joined": len(senders), "join_s": join_lat,
+              "relay_s": relay_lat, "sent": len(senders) * args.signals,
+              "received": received, "signal_wall_s": sig_wall}
+    print(_RESULT_PREFIX + json.dumps(result), flush=True)
+
+    await asyncio.gather(*(c.disconnect() for c in senders + receivers), return_exceptions=True)
+
+
+# ========== 오케스트레이션 ==========
+
+def main():
+    ap = argparse.ArgumentParser(description="시그널링 서버 부하 테스트")
+    ap.add_argument("--rooms", type=int, default=50)
+    ap.add_argument("--senders", type=int, default=2000, help="전체 sender 소켓 수")
+    ap.add_argument("--signals", type=int, default=5, help="sender당 signal 메시지 수")
+    ap.add_argument("--procs", type=int, default=max((os.cpu_count() or 2) - 1, 1),
+                    help="클라이언트 프로세스 수")
+    ap.add_argument("--concurrency", type=int, default=200, help="워커당 동시 입장 수")
+    ap.add_argument("--settle", type=float, default=2.0)
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--server-cpu", type=int, default=0, help="서버를 고정할 CPU 번호 (-1이면 고정 안 함)")
+    ap.add_argument("--server-workers", type=int, default=1, help="서버 워커 프로세스 수")
+    # 내부용
+    ap.add_argument("--worker", type=int, default=-1, help=argparse.SUPPRESS)
+    ap.add_argument("--url", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker >= 0:
+        asyncio.run(_worker(args))
+        return
+
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, SIGNALING_HOST="127.0.0.1", SIGNALING_PORT=str(port), SIGNALING_TLS="0")
+    cpus = set(range(args.server_cpu, args.server_cpu + args.server_workers))
+    pin = (lambda: os.sched_setaffinity(0, cpus)) if args.server_cpu >= 0 else None
+
+    server = subprocess.Popen([sys.executable, SERVER_PY, "--workers", str(args.server_workers)],
+                              env=env, preexec_fn=pin,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    workers = []
+    try:
+        if not _wait_port(port):
+            raise RuntimeError("시그널링 서버가 뜨지 않음")
+        cpu0, _ = _tree_stat(server.pid)
+        t0 = time.monotonic()
+        rss_peak = 0.0
+
+        for w in range(args.procs):
+            workers.append(subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--worker", str(w), "--url", url,
+                 "--rooms", str(args.rooms), "--senders", str(args.senders),
+                 "--signals", str(args.signals), "--procs", str(args.procs),
+                 "--concurrency", str(args.concurrency), "--settle", str(args.settle),
+                 "--timeout", str(args.timeout)],
+                stdout=subprocess.PIPE, text=True))
+
+        # 결과 줄이 파이프 버퍼보다 클 수 있으므로 워커마다 스레드로 끝까지 읽는다
+        outputs = [None] * len(workers)
+
+        def _collect(i, p):
+            outputs[i] = p.communicate()[0]
+
+        readers = [threading.Thread(target=_collect, args=(i, p)) for i, p in enumerate(workers)]
+        for t in readers:
+            t.start()
+        while any(t.is_alive() for t in readers):
+            rss_peak = max(rss_peak, _tree_stat(server.pid)[1])
+            time.sleep(0.2)
+        cpu1, rss_end = _tree_stat(server.pid)
+        wall = time.monotonic() - t0
+
+        results = [json.loads(line[len(_RESULT_PREFIX):])
+                   for out in outputs for line in (out or "").splitlines()
+                   if line.startswith(_RESULT_PREFIX)]
+    finally:
+        for p in workers:
+            _terminate(p)
+        _terminate(server)
+
+    join = [v for r in results for v in r["join_s"]]
+    relay = [v for r in results for v in r["relay_s"]]
+    joined = sum(r["joined"] for r in results)
+    sent = sum(r["sent"] for r in results)
+    received = sum(r["received"] for r in results)
+
+    def ms(v):
+        return "-" if v is None else f"{v * 1000.0:.1f}"
+
+    print(f"rooms={args.rooms} senders={joined}/{args.senders} (client procs={args.procs}, "
+          f"server workers={args.server_workers} pinned from CPU {args.server_cpu})")
+    print(f"join ack   p50={ms(percentile(join, 50))} p95={ms(percentile(join, 95))} "
+          f"p99={ms(percentile(join, 99))} ms")
+    print(f"relay      p50={ms(percentile(relay, 50))} p95={ms(percentile(relay, 95))} "
+          f"p99={ms(percentile(relay, 99))} ms  ({received}/{sent} delivered)")
+    print(f"server     CPU={(cpu1 - cpu0) / wall * 100.0:.1f}% of one core over {wall:.1f}s, "
+          f"RSS peak={max(rss_peak, rss_end):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# simulcast_switch.py
+# 사이멀캐스트 층 전환 점검: 층(SSRC)이 바뀌어도, 예전 층으로 돌아가도 계속 디코드되는지 확인
+#
+#   python3 simulcast_switch.py --layouts 1,4,3x3,4,1
+#
+# layout_switch.py처럼 시그널링 서버 + 헤드리스 수신기(MULTIPY_SIMULCAST=1) +
+# synthetic_sender.py --simulcast 하나를 띄우고, sender를 셀 0에 둔 채 레이아웃만 바꾼다.
+# 레이아웃 값은 프리셋 1~4 또는 "RxC"(RxC 그리드의 1칸짜리 셀 하나 → 작은 셀).
+# 단계마다 셀 높이로 고른 층(select_layer)의 해상도가 디코드되어 FPS > 0이 될 때까지 기다린다.
+# 모든 단계가 통과하면 종료 코드 0, 아니면 1.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from layout_switch import RECEIVER_DIR, SERVER_PY, SENDER_PY, _free_port, _terminate, _wait_port
+
+_RESULT_PREFIX = "SIMULCAST_RESULT "
+
+
+def _layout(value):
+    """"1" → 프리셋 1, "3x3" → 3×3 그리드의 왼쪽 위 한 칸만 쓰는 배치"""
+    if value.isdigit():
+        return int(value)
+    rows, _, cols = value.lower().partition("x")
+    return {"rows": int(rows), "cols": int(cols), "cells": [[0, 0, 1, 1]]}
+
+
+def run_receiver(args):
+    """헤드리스 수신기: sender 하나를 셀 0에 두고 레이아웃을 바꿔 가며 층 전환 확인"""
+    sys.path.insert(0, RECEIVER_DIR)
+    os.chdir(RECEIVER_DIR)
+
+    import gi
+    gi.require_version('Gst', '1.0')
+    from gi.repository import Gst
+    from PyQt5 import QtWidgets
+
+    Gst.init(None)
+    from ui_components import ReceiverWindow
+    from receiver_manager import MultiReceiverManager
+    from glib_qt_integration import integrate_glib_into_qt
+    from view_mode_manager import ViewModeManager
+    from gst_utils import probe_capabilities
+    from simulcast import select_layer
+    from stats import stats_registry
+
+    app = QtWidgets.QApplication([sys.argv[0]])
+    ui = ReceiverWindow()
+    ui.resize(1280, 720)
+    ui.show()
+    probe_capabilities()
+    glib_integration = integrate_glib_into_qt()
+    view_manager = ViewModeManager(ui)
+    manager = MultiReceiverManager(ui, view_manager)
+    manager.start()
+
+    def pump(pred, timeout):
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            app.processEvents()
+            if pred():
+                return True
+            time.sleep(0.002)
+        return False
+
+    result = {"rids": [], "steps": [], "error": None}
+    try:
+        if not pump(manager.list_active_senders, args.join_timeout):
+            raise RuntimeError("sender 입장 없음")
+        sid, name = manager.list_active_senders()[0]
+        peer = manager.peers[sid]
+        if not pump(lambda: peer.ttff_s is not None, args.join_timeout):
+            raise RuntimeError("첫 프레임 없음")
+        result["rids"] = list(peer.simulcast_rids)
+        if not peer.simulcast_rids:
+            raise RuntimeError("sender가 사이멀캐스트를 받아들이지 않음 (answer에 rid 없음)")
+
+        for value in args.layouts:
+            view_manager.apply_layout_data({"layout": _layout(value),
+                                            "participants": [{"id": sid, "name": name}]})
+            pump(lambda: False, 0.05)   # 셀 geometry 반영
+            size = view_manager.cell_pixel_size(0)
+            rid, scale = select_layer(size[1] if size else 0, peer.simulcast_rids)
+            want = (args.width // scale, args.height // scale)
+
+            def _decoding():
+                s = stats_registry.get(sid)
+                return (s.get("width"), s.get("height")) == want and s.get("fps", 0) > 0
+
+            t0 = time.monotonic()
+            ok = pump(_decoding, args.switch_timeout)
+            result["steps"].append({"layout": value, "rid": rid, "size": list(want), "ok": ok,
+                                    "switch_s": time.monotonic() - t0 if ok else None})
+            pump(lambda: False, args.dwell)
+    except Exception as e:
+        result["error"] = str(e)
+
+    manager.stop()
+    glib_integration.stop()
+    print(_RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+def run(args):
+    port = args.port or _free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ,
+               SIGNALING_HOST="127.0.0.1", SIGNALING_PORT=str(port), SIGNALING_TLS="0",
+               MULTIPY_SIGNALING_URL=url, MULTIPY_STUN_SERVER="", MULTIPY_SIMULCAST="1",
+               MULTIPY_DECODE_PROFILE=args.profile, MULTIPY_DECODE_SINK=args.sink,
+               QT_QPA_PLATFORM="offscreen")
+    quiet = None if args.verbose else subprocess.DEVNULL
+
+    server = receiver = sender = None
+    try:
+        server = subprocess.Popen([sys.executable, SERVER_PY], env=env, stdout=quiet, stderr=quiet)
+        if not _wait_port(port):
+            raise RuntimeError("시그널링 서버가 뜨지 않음")
+
+        receiver = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--receiver",
+             "--layouts", ",".join(args.layouts), "--width", str(args.width),
+             "--height", str(args.height), "--dwell", str(args.dwell),
+             "--join-timeout", str(args.join_timeout), "--switch-timeout", str(args.switch_timeout)],
+            env=env, stdout=subprocess.PIPE, stderr=quiet, text=True)
+        time.sleep(1.0)  # 수신기가 receiver로 먼저 입장해야 sender join이 성공한다
+
+        sender = subprocess.Popen(
+            [sys.executable, SENDER_PY, "--url", url, "--count", "1", "--simulcast",
+             "--width", str(args.width), "--height", str(args.height), "--gop", str(args.gop)],
+            env=env, stdout=quiet, stderr=quiet)
+
+        for line in receiver.stdout:
+            if args.verbose:
+                sys.stdout.write(line)
+            if line.startswith(_RESULT_PREFIX):
+                return json.loads(line[len(_RESULT_PREFIX):])
+        raise RuntimeError(f"수신기 종료 (code={receiver.wait()}), 결과 없음")
+    finally:
+        _terminate(sender)
+        _terminate(receiver)
+        _terminate(server)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="사이멀캐스트 층 전환 디코드 점검")
+    ap.add_argument("--layouts", type=lambda s: [v.strip() for v in s.split(",") if v.strip()],
+                    default=["1", "4", "3x3", "4", "1"], help="순환할 레이아웃 (h→m→l→m→h)")
+    ap.add_argument("--width", type=int, default=1280)
+    ap.add_argument("--height", type=int, default=720)
+    ap.add_argument("--gop", type=int, default=300)
+    ap.add_argument("--dwell", type=float, default=1.0, help="단계 사이 대기 (초)")
+    ap.add_argument("--join-timeout", type=float, default=20.0)
+    ap.add_argument("--switch-timeout", type=float, default=5.0)
+    ap.add_argument("--profile", default="software", help="수신 디코드 프로파일")
+    ap.add_argument("--sink", default="fakesink", help="수신 싱크")
+    ap.add_argument("--port", type=int, default=0, help="시그널링 포트 (0이면 빈 포트)")
+    ap.add_argument("--verbose", action="store_true")
+    # 내부용: 수신기 서브프로세스
+    ap.add_argument("--receiver", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.receiver:
+        run_receiver(args)
+        return 0
+
+    try:
+        result = run(args)
+    except Exception as e:
+        print(f"[FAIL] {e}")
+        return 1
+    if result["error"]:
+        print(f"[FAIL] {result['error']}")
+        return 1
+    print(f"rids: {','.join(result['rids'])}")
+    for step in result["steps"]:
+        took = "-" if step["switch_s"] is None else f"{step['switch_s'] * 1000.0:.0f} ms"
+        print(f"[{'OK' if step['ok'] else 'FAIL'}] layout {step['layout']:<5} → {step['rid']} "
+              f"{step['size'][0]}x{step['size'][1]} ({took})")
+    used = [s["rid"] for s in result["steps"]]
+    if len(set(used)) < 2:
+        print("[WARN] 층이 한 번도 바뀌지 않음 (--layouts로 셀 크기를 더 벌릴 것)")
+    return 0 if result["steps"] and all(s["ok"] for s in result["steps"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# software_decode.py
+# software 디코드 프로파일 CI 점검 (GPU/창/네트워크 없이 실행)
+#
+#   python3 software_decode.py --codec H264 --frames 60 --sink fakesink
+#   python3 software_decode.py --codec all --sink appsink
+#
+# videotestsrc → 코덱 인코더 → RTP 페이로더 → build_decode_branch(PROFILE_SOFTWARE) → fakesink/appsink
+# 을 한 파이프라인으로 EOS까지 돌려 싱크에 도착한 디코드 프레임 수를 확인한다.
+# 모든 코덱이 통과하면 종료 코드 0, 하나라도 실패하면 1 (인코더/디코더가 없는 코덱은 건너뜀).
+
+import argparse
+import os
+import sys
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "receiver")))
+
+from pipeline_builder import build_decode_branch, PROFILE_SOFTWARE  # noqa: E402
+from video_codecs import CODECS  # noqa: E402
+
+
+def _source(spec, frames, size):
+    """videotestsrc → 인코더 → 페이로더 (bin 하나, 없는 요소가 있으면 None)"""
+    pay = spec.depay.replace("depay", "pay")
+    w, h = size
+    for enc, args in spec.encoders:
+        if not (Gst.ElementFactory.find(enc) and Gst.ElementFactory.find(pay)):
+            continue
+        src = Gst.parse_bin_from_description(
+            f"videotestsrc num-buffers={frames} pattern=ball "
+            f"! video/x-raw,format=I420,width={w},height={h},framerate=30/1 "
+            f"! {enc} name=enc ! {pay} pt=96", True)
+        encoder = src.get_by_name("enc")
+        for k, v in args.items():
+            Gst.util_set_object_arg(encoder, k, v)
+        return enc, src
+    return None, None
+
+
+def run(codec, frames, size, sink_factory, timeout_s):
+    """Returns: True(통과) / False(실패) / None(건너뜀)"""
+    spec = CODECS[codec]
+    if not any(Gst.ElementFactory.find(n) for n in spec.software):
+        print(f"[SKIP] {codec}: software decoder 없음 ({', '.join(spec.software)})")
+        return None
+    enc, src = _source(spec, frames, size)
+    if not src:
+        print(f"[SKIP] {codec}: 인코더/페이로더 없음")
+        return None
+
+    branch = build_decode_branch(profile=PROFILE_SOFTWARE, sink_factory=sink_factory, codec=codec)
+    if not branch:
+        print(f"[FAIL] {codec}: software 디코드 브랜치 생성 실패")
+        return False
+    if sink_factory == "appsink":
+        branch.sink.set_property("emit-signals", False)
+        branch.sink.set_property("drop", True)
+        branch.sink.set_property("max-buffers", 1)
+
+    pipeline = Gst.Pipeline.new(f"software-decode-{codec}")
+    pipeline.add(src)
+    if not branch.add_to(pipeline) or not src.link(branch.head):
+        print(f"[FAIL] {codec}: link 실패")
+        return False
+    pipeline.set_state(Gst.State.PLAYING)
+    msg = pipeline.get_bus().timed_pop_filtered(
+        int(timeout_s * Gst.SECOND), Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    pipeline.set_state(Gst.State.NULL)
+
+    decoded = branch.frames.total
+    if msg is None:
+        print(f"[FAIL] {codec}: {timeout_s}s 안에 EOS 없음 ({decoded}/{frames} frames)")
+        return False
+    if msg.type == Gst.MessageType.ERROR:
+        err, dbg = msg.parse_error()
+        print(f"[FAIL] {codec}: {err.message} ({dbg})")
+        return False
+    # 인코더 지연/B프레임 때문에 마지막 몇 프레임은 모자랄 수 있음
+    ok = decoded >= frames * 0.9
+    print(f"[{'OK' if ok else 'FAIL'}] {codec}: {enc} → {branch.decoder.get_factory().get_name()} "
+          f"→ {sink_factory}, {decoded}/{frames} frames")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description="software 디코드 프로파일 점검")
+    ap.add_argument("--codec", default="H264", help="H264/H265/VP8/VP9/AV1 또는 all")
+    ap.add_argument("--frames", type=int, default=60)
+    ap.add_argument("--size", default="640x360")
+    ap.add_argument("--sink", default="fakesink", choices=("fakesink", "appsink"))
+    ap.add_argument("--timeout", type=float, default=30.0)
+    args = ap.parse_args()
+
+    Gst.init(None)
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    codecs = list(CODECS) if args.codec.lower() == "all" else [args.codec.upper()]
+    results = [run(c, args.frames, size, args.sink, args.timeout) for c in codecs]
+    if all(r is None for r in results):
+        print("실행할 수 있는 코덱 없음")
+        return 1
+    return 1 if False in results else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# synthetic_sender.py
+# 브라우저(static/js/index.js) 대신 videotestsrc → x264enc → webrtcbin 으로 송출하는 가상 sender
+#
+#   python3 synthetic_sender.py --url http://127.0.0.1:3101 --count 4
+#   python3 synthetic_sender.py --timecode      프레임마다 송출 시각을 그림 (receiver MULTIPY_LATENCY_PROBE=1로
+#                                               receiver_sender_glass_latency_ms 측정, receiver/latency.py)
+#   python3 synthetic_sender.py --simulcast     SIMULCAST_LAYERS 층마다 인코더/SSRC를 따로 두고 quality 힌트의
+#                                               layer 층만 내보냄 (브라우저 sendEncodings[].active와 같은 효과)
+#
+# index.js와 같은 시그널링을 따른다:
+#   join-room {role:'sender', name} (ack) → sender-share-started
+#   signal offer 수신 → answer 전송, ICE 후보는 signal candidate {candidate, sdpMLineIndex}
+
+import argparse
+import os
+import random
+import re
+import signal
+import sys
+import threading
+import time
+
+import gi
+
+gi.require_version('Gst', '1.0')
+gi.require_version('GstWebRTC', '1.0')
+gi.require_version('GstSdp', '1.0')
+gi.require_version('GstVideo', '1.0')
+from gi.repository import Gst, GstWebRTC, GstSdp, GstVideo, GLib
+
+import socketio
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "receiver")))
+
+from config import SIMULCAST_LAYERS  # noqa: E402
+from latency import encode_timecode, timecode_block  # noqa: E402
+
+_H264_RTPMAP = re.compile(r"a=rtpmap:(\d+) H264/90000", re.IGNORECASE)
+_RID_RECV = re.compile(r"^a=rid:(\S+) recv", re.MULTILINE)
+
+
+def _make(factory, **props):
+    e = Gst.ElementFactory.make(factory, None)
+    if e is None:
+        return None
+    for k, v in props.items():
+        e.set_property(k.replace("_", "-"), v)
+    return e
+
+
+def _make_encoder(gop, bitrate_kbps):
+    """x264enc 우선, 없으면 openh264enc"""
+    enc = _make("x264enc", tune="zerolatency", speed_preset="ultrafast",
+                key_int_max=gop, bitrate=bitrate_kbps)
+    if enc:
+        return enc
+    return _make("openh264enc", gop_size=gop, bitrate=bitrate_kbps * 1000)
+
+
+def _answer_with_layers(sdp, rids):
+    """answer의 video 섹션에 보낼 rid 층 광고 (index.js가 sendEncodings로 만드는 줄과 같음)"""
+    lines = sdp.splitlines()
+    start = next((i for i, l in enumerate(lines) if l.startswith("m=video")), None)
+    if start is None or not rids or any(l.startswith("a=simulcast:") for l in lines):
+        return sdp
+    end = next((i for i in range(start + 1, len(lines)) if lines[i].startswith("m=")), len(lines))
+    extra = [f"a=rid:{rid} send" for rid in rids] + ["a=simulcast:send " + ";".join(rids)]
+    return "\r\n".join(lines[:end] + extra + lines[end:]) + "\r\n"
+
+
+class TimecodeSource:
+    """appsrc로 회색 I420 프레임 + 맨 위 시간 코드 줄(송출 시각)을 fps 간격으로 밀어 넣음
+
+    시각은 프레임을 인코더로 넘기는 순간의 time.time()이라 캡처 직후 시점에 해당한다.
+    움직임이 없으면 인코더가 거의 빈 P 프레임만 내므로 세로 막대를 옆으로 움직인다.
+    """
+
+    def __init__(self, width, height, fps):
+        self.width, self.height, self.fps = width, height, fps
+        self.element = _make("appsrc", is_live=True, do_timestamp=True, format=Gst.Format.TIME,
+                             caps=Gst.Caps.from_string(
+                                 f"video/x-raw,format=I420,width={width},height={height},"
+                                 f"framerate={fps}/1"))
+        luma = width * height
+        self._base = bytes([96]) * luma + bytes([128]) * (luma // 2)
+        self._block = timecode_block(width)
+        self._running = False
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+
+    def _frame(self, n):
+        w, block = self.width, self._block
+        frame = bytearray(self._base)
+        bar = (n * 8) % max(w - 16, 1)
+        for y in range(block, self.height):
+            frame[y * w + bar:y * w + bar + 16] = b"\xeb" * 16
+        stamp = b"".join((b"\xeb" if bit else b"\x10") * block
+                         for bit in encode_timecode(time.time() * 1000.0))
+        for y in range(block):
+            frame[y * w:y * w + len(stamp)] = stamp
+        return frame
+
+    def _run(self):
+        period, n = 1.0 / self.fps, 0
+        t_next = time.monotonic()
+        while self._running:
+            t_next += period
+            buf = Gst.Buffer.new_wrapped(bytes(self._frame(n)))
+            if self.element.emit("push-buffer", buf) != Gst.FlowReturn.OK:
+                break
+            n += 1
+            time.sleep(max(0.0, t_next - time.monotonic()))
+
+
+class SyntheticSender:
+    """가상 sender 하나 (socket.io 클라이언트 + 송출 파이프라인)"""
+
+    def __init__(self, url, name, width=1280, height=720, fps=30, gop=300, bitrate_kbps=2000,
+                 timecode=False, simulcast=False):
+        self.url = url
+        self.name = name
+        self.width, self.height, self.fps = width, height, fps
+        self.gop, self.bitrate_kbps = gop, bitrate_kbps
+        self.timecode = timecode
+        self.simulcast = simulcast
+        self._timecode_src = None
+        self._layers = {}          # rid -> (valve, pay), 사이멀캐스트일 때만
+        self._offer_rids = ()      # receiver offer가 받겠다고 한 rid
+        self._active_rid = None
+        self.pipeline = None
+        self.webrtc = None
+        self._pending_candidates = []
+        self._remote_set = False
+
+        self.sio = socketio.Client(logger=False, engineio_logger=False, ssl_verify=False)
+        self.sio.on('connect', self._on_connect)
+        self.sio.on('signal', self._on_signal)
+        self.sio.on('room-deleted', lambda *_: GLib.idle_add(self.stop_pipeline))
+
+    # ========== 시그널링 ==========
+
+    def connect(self):
+        self.sio.connect(self.url, transports=['websocket'])
+
+    def disconnect(self):
+        GLib.idle_add(self.stop_pipeline)
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+    def _on_connect(self):
+        self.sio.emit('join-room', {'role': 'sender', 'name': self.name}, callback=self._on_join_ack)
+
+    def _on_join_ack(self, ack):
+        if not (ack or {}).get('success'):
+            print(f"[SYN][{self.name}] join 실패:", ack)
+            return
+        self.name = ack.get('name') or self.name
+        self.sio.emit('sender-share-started', {'senderId': self.sio.sid, 'name': self.name})
+
+    def _on_signal(self, data):
+        typ, payload = data.get('type'), data.get('payload')
+        if typ == 'offer' and payload:
+            sdp = payload['sdp'] if isinstance(payload, dict) else payload
+            GLib.idle_add(self._on_offer, sdp)
+        elif typ == 'candidate' and payload:
+            cand = payload.get('candidate')
+            mline = int(payload.get('sdpMLineIndex') or 0)
+            if cand:
+                GLib.idle_add(self._add_remote_candidate, mline, cand)
+        elif typ == 'quality' and payload and self.simulcast:
+            GLib.idle_add(self._set_layer, payload.get('layer'))
+
+    def _emit_signal(self, typ, payload):
+        self.sio.emit('signal', {'type': typ, 'from': self.sio.sid, 'payload': payload})
+
+    # ========== 송출 파이프라인 ==========
+
+    def _build_pipeline(self, pt):
+        self.stop_pipeline()
+        self.pipeline = Gst.Pipeline.new(f"syn-{self.name}")
+        if self.timecode:
+            self._timecode_src = TimecodeSource(self.width, self.height, self.fps)
+            src = self._timecode_src.element
+        else:
+            src = _make("videotestsrc", is_live=True, pattern="ball")
+        caps = _make("capsfilter", caps=Gst.Caps.from_string(
+            f"video/x-raw,width={self.width},height={self.height},framerate={self.fps}/1"))
+        conv = _make("videoconvert")
+        self.webrtc = _make("webrtcbin", bundle_policy="max-bundle")
+        chain = [src, caps, conv]
+        if not (self.simulcast and self._offer_rids):
+            chain += [_make_encoder(self.gop, self.bitrate_kbps),
+                      _make("rtph264pay", config_interval=-1, pt=pt)]
+        if not all([*chain, self.webrtc]):
+            raise RuntimeError("송출 요소 부족 (videotestsrc/x264enc|openh264enc/rtph264pay/webrtcbin)")
+
+        for e in [*chain, self.webrtc]:
+            self.pipeline.add(e)
+        for a, b in zip(chain, chain[1:]):
+            a.link(b)
+        out = chain[-1] if chain[-1] is not conv else self._build_layers(pt, conv)
+        if out is None:
+            raise RuntimeError("사이멀캐스트 송출 요소 부족 (tee/videoscale/valve/funnel)")
+        sink_pad = self.webrtc.request_pad_simple("sink_%u")
+        out.get_static_pad("src").link(sink_pad)
+
+        self.webrtc.connect('on-ice-candidate', self._on_local_candidate)
+        self.pipeline.set_state(Gst.State.PLAYING)
+        if self._timecode_src:
+            self._timecode_src.start()
+        if self._layers:
+            self._set_layer(next(iter(self._layers)))   # 처음엔 가장 큰 층
+
+    def _build_layers(self, pt, conv):
+        """conv → tee → 층마다 videoscale → 인코더 → rtph264pay(고유 SSRC) → valve → funnel
+
+        브라우저 사이멀캐스트처럼 층마다 SSRC가 다르고, 한 번에 한 층만 valve를 연다.
+        Returns: funnel (webrtcbin sink 앞, 요소가 모자라면 None)
+        """
+        self._layers.clear()
+        self._active_rid = None
+        tee, funnel = _make("tee"), _make("funnel")
+        if not (tee and funnel):
+            return None
+        self.pipeline.add(tee)
+        self.pipeline.add(funnel)
+        conv.link(tee)
+        for rid, scale, _ in SIMULCAST_LAYERS:
+            if rid not in self._offer_rids:
+                continue
+            chain = [
+                _make("queue", max_size_buffers=2, leaky=2),
+                _make("videoscale"),
+                _make("capsfilter", caps=Gst.Caps.from_string(
+                    f"video/x-raw,width={self.width // scale},height={self.height // scale}")),
+                _make_encoder(self.gop, max(100, self.bitrate_kbps // (scale * scale))),
+                _make("rtph264pay", config_interval=-1, pt=pt, ssrc=random.getrandbits(31)),
+                _make("valve", drop=True),
+            ]
+            if not all(chain):
+                return None
+            for e in chain:
+                self.pipeline.add(e)
+            for a, b in zip([tee, *chain], [*chain, funnel]):
+                a.link(b)
+            self._layers[rid] = (chain[-1], chain[-2])
+        return funnel if self._layers else None
+
+    def _set_layer(self, rid):
+        """rid 층의 valve만 열고 그 인코더에 키프레임 요청 (모르는 rid는 무시)"""
+        if rid not in self._layers or rid == self._active_rid:
+            return False
+        for r, (valve, _) in self._layers.items():
+            valve.set_property("drop", r != rid)
+        _, pay = self._layers[rid]
+        pay.get_static_pad("src").send_event(
+            GstVideo.video_event_new_upstream_force_key_unit(Gst.CLOCK_TIME_NONE, True, 0))
+        print(f"[SYN][{self.name}] simulcast layer {self._active_rid} → {rid} "
+              f"(ssrc {pay.get_property('ssrc')})", flush=True)
+        self._active_rid = rid
+        return False
+
+    def stop_pipeline(self):
+        if self._timecode_src:
+            self._timecode_src.stop()
+            self._timecode_src = None
+        if self.pipeline:
+            self.pipeline.set_state(Gst.State.NULL)
+        self.pipeline = self.webrtc = None
+        self._layers.clear()
+        self._active_rid = None
+        self._remote_set = False
+        self._pending_candidates.clear()
+        return False
+
+    def _on_offer(self, sdp_text):
+        m = _H264_RTPMAP.search(sdp_text)
+        pt = int(m.group(1)) if m else 102
+        self._offer_rids = tuple(_RID_RECV.findall(sdp_text)) if self.simulcast else ()
+        try:
+            self._build_pipeline(pt)
+        except Exception as e:
+            print(f"[SYN][{self.name}]", e)
+            return False
+
+        _, sdpmsg = GstSdp.SDPMessage.new_from_text(sdp_text)
+        offer = GstWebRTC.WebRTCSessionDescription.new(GstWebRTC.WebRTCSDPType.OFFER, sdpmsg)
+        promise = Gst.Promise.new_with_change_func(self._on_remote_set, None)
+        self.webrtc.emit('set-remote-description', offer, promise)
+        return False
+
+    def _on_remote_set(self, promise, _):
+        GLib.idle_add(self._create_answer)
+
+    def _create_answer(self):
+        if not self.webrtc:
+            return False
+        self._remote_set = True
+        for mline, cand in self._pending_candidates:
+            self.webrtc.emit('add-ice-candidate', mline, cand)
+        self._pending_candidates.clear()
+        promise = Gst.Promise.new_with_change_func(self._on_answer_created, None)
+        self.webrtc.emit('create-answer', None, promise)
+        return False
+
+    def _on_answer_created(self, promise, _):
+        reply = promise.get_reply()
+        answer = reply.get_value('answer') if reply else None
+        if answer is None or not self.webrtc:
+            print(f"[SYN][{self.name}] answer 생성 실패")
+            return
+        self.webrtc.emit('set-local-description', answer, Gst.Promise.new())
+        # 층 광고는 시그널링 answer에만 (receiver가 offer에 덧붙인 것과 대칭)
+        sdp = _answer_with_layers(answer.sdp.as_text(), tuple(self._layers))
+        self._emit_signal('answer', {'type': 'answer', 'sdp': sdp})
+
+    def _on_local_candidate(self, element, mlineindex, candidate):
+        self._emit_signal('candidate', {'candidate': candidate, 'sdpMLineIndex': int(mlineindex)})
+
+    def _add_remote_candidate(self, mline, cand):
+        if not self.webrtc or not self._remote_set:
+            self._pending_candidates.append((mline, cand))
+        else:
+            self.webrtc.emit('add-ice-candidate', mline, cand)
+        return False
+
+
+def main():
+    ap = argparse.ArgumentParser(description="가상 WebRTC sender (videotestsrc → H.264)")
+    ap.add_argument("--url", default="http://127.0.0.1:3101")
+    ap.add_argument("--count", type=int, default=1)
+    ap.add_argument("--name-prefix", default="syn")
+    ap.add_argument("--width", type=int, default=1280)
+    ap.add_argument("--height", type=int, default=720)
+    ap.add_argument("--fps", type=int, default=30)
+    ap.add_argument("--gop", type=int, default=300, help="키프레임 간격 (화면 공유 인코더처럼 길게)")
+    ap.add_argument("--bitrate", type=int, default=2000, help="kbit/s")
+    ap.add_argument("--timecode", action="store_true",
+                    help="videotestsrc 대신 송출 시각 코드를 그린 프레임 (glass-to-glass 측정용)")
+    ap.add_argument("--simulcast", action="store_true",
+                    help="offer의 rid 층마다 인코더/SSRC를 두고 quality 힌트의 layer만 송출")
+    args = ap.parse_args()
+
+    Gst.init(None)
+    loop = GLib.MainLoop()
+    senders = [SyntheticSender(args.url, f"{args.name_prefix}-{i}", args.width, args.height,
+                               args.fps, args.gop, args.bitrate, args.timecode, args.simulcast)
+               for i in range(args.count)]
+
+    def _quit(*_):
+        for s in senders:
+            s.disconnect()
+        GLib.timeout_add(200, loop.quit)
+        return False
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, sig, _quit)
+
+    # socket.io 연결은 블로킹이므로 GLib 루프 밖에서
+    for s in senders:
+        threading.Thread(target=s.connect, daemon=True).start()
+    print(f"[SYN] {args.count} sender(s) → {args.url}", flush=True)
+    loop.run()
+
+
+if __name__ == "__main__":
+    main()
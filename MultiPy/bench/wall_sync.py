@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# wall_sync.py
+# 비디오 월 전환 합의(receiver/wall.py) 시험: 노드 N개가 같은 배치를 얼마나 동시에 적용하는지
+#
+#   python3 wall_sync.py --nodes 4 --switches 50                 한 프로세스, 메모리 버스
+#   python3 wall_sync.py --nodes 4 --mqtt 127.0.0.1:1883         노드마다 프로세스, 실제 MQTT 브로커
+#
+# 캔버스를 가로로 N등분한 조각을 노드마다 하나씩 맡기고, 무작위 그리드 배치를 리더에게 넣는다.
+# 버전마다 노드별 적용 시각의 최대-최소(skew)와 submit → 적용 지연을 출력하고,
+# 조각 배치를 합친 sender 집합이 전역 배치와 같은지도 확인한다.
+# 예열(prepare) 지연은 --prepare-ms로 흉내 낸다 (실제 receiver는 디코드 on + 키프레임 요청).
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import threading
+import time
+
+from layout_switch import percentile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "receiver")))
+
+from wall import WallCoordinator, slice_senders  # noqa: E402
+
+KINDS = ("hello", "prepare", "ready", "commit")
+
+
+class MemoryBus:
+    """한 프로세스 안의 노드들끼리 MQTT 대신 쓰는 브로드캐스트 (구독자마다 전달 스레드)"""
+
+    def __init__(self, delay_ms=0.0):
+        self.delay = delay_ms / 1000.0
+        self.nodes = []
+
+    def attach(self, coord):
+        self.nodes.append(coord)
+
+    def publish(self, kind, payload):
+        msg = json.loads(json.dumps(payload))   # MQTT처럼 값 복사
+        for coord in list(self.nodes):
+            threading.Timer(self.delay, coord.handle, (kind, msg)).start()
+
+
+def _slices(n):
+    return [(i / n, 0.0, 1.0 / n, 1.0) for i in range(n)]
+
+
+def _layouts(rnd, n_nodes, count):
+    """조각 경계와 맞는 그리드(열 수 = 노드 수의 배수)와 어긋나는 PiP을 섞은 배치"""
+    out = []
+    for _ in range(count):
+        cols = n_nodes * rnd.randint(1, 2)
+        rows = rnd.randint(1, 2)
+        pip = [[round(rnd.uniform(0.1, 0.6), 3), 0.6, 0.3, 0.3]] if rnd.random() < 0.5 else []
+        tiles = rows * cols + len(pip)
+        people = [{"id": f"s{rnd.randint(0, 31)}", "name": ""} for _ in range(tiles)]
+        out.append({"layout": {"rows": rows, "cols": cols, "pip": pip}, "participants": people})
+    return out
+
+
+def _make_node(node, slc, publish, prepare_ms, applied):
+    def on_prepare(local_data, done):
+        threading.Timer(prepare_ms / 1000.0, done).start()
+
+    def on_commit(local_data, global_data):
+        applied.append((coord.applied, time.time(), sorted(slice_senders(local_data))))
+
+    coord = WallCoordinator(node, slc, publish, on_prepare, on_commit,
+                            lead_ms=ARGS.lead_ms, ready_timeout_ms=ARGS.ready_timeout_ms,
+                            heartbeat_s=0.2, ttl_s=1.0)
+    return coord
+
+
+# ----- MQTT: 노드마다 프로세스 -----
+def _mqtt_node(idx, n, broker, wall_id, prepare_ms, out_q, start_evt):
+    import paho.mqtt.client as mqtt
+
+    host, _, port = broker.partition(":")
+    topic = f"wall/{wall_id}"
+    applied = []
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    coord = _make_node(f"node-{idx}", _slices(n)[idx],
+                       lambda kind, p: client.publish(f"{topic}/{kind}", json.dumps(p)),
+                       prepare_ms, applied)
+
+    def on_message(_c, _u, msg):
+        kind = msg.topic.rsplit("/", 1)[1]
+        if kind == "submit":
+            coord.submit(json.loads(msg.payload))
+        elif kind in KINDS:
+            coord.handle(kind, json.loads(msg.payload))
+
+    client.on_connect = lambda c, *_: c.subscribe(f"{topic}/+")
+    client.on_message = on_message
+    client.connect(host, int(port or 1883))
+    client.loop_start()
+    coord.start()
+    start_evt.wait()
+    time.sleep(ARGS.settle_s)
+    coord.stop()
+    client.loop_stop()
+    out_q.put((idx, applied))
+
+
+def run_mqtt(layouts):
+    import paho.mqtt.client as mqtt
+
+    wall_id = f"bench-{os.getpid()}"
+    out_q, start_evt = mp.Queue(), mp.Event()
+    procs = [mp.Process(target=_mqtt_node,
+                        args=(i, ARGS.nodes, ARGS.mqtt, wall_id, ARGS.prepare_ms, out_q, start_evt))
+             for i in range(ARGS.nodes)]
+    for p in procs:
+        p.start()
+    time.sleep(1.0)   # 하트비트로 멤버십 수렴
+
+    host, _, port = ARGS.mqtt.partition(":")
+    admin = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    admin.connect(host, int(port or 1883))
+    admin.loop_start()
+    submitted = []
+    for data in layouts:
+        submitted.append(time.time())
+        # screen/update 대신 전용 토픽: 모든 노드가 받고 리더만 prepare
+        admin.publish(f"wall/{wall_id}/submit", json.dumps(data))
+        time.sleep(ARGS.interval_ms / 1000.0)
+    start_evt.set()
+    results = dict(out_q.get() for _ in procs)
+    for p in procs:
+        p.join()
+    admin.loop_stop()
+    return submitted, [results[i] for i in range(ARGS.nodes)]
+
+
+# ----- 한 프로세스 -----
+def run_memory(layouts):
+    bus = MemoryBus(ARGS.bus_delay_ms)
+    applied = [[] for _ in range(ARGS.nodes)]
+    nodes = []
+    for i, slc in enumerate(_slices(ARGS.nodes)):
+        coord = _make_node(f"node-{i}", slc, bus.publish, ARGS.prepare_ms, applied[i])
+        bus.attach(coord)
+        nodes.append(coord)
+    for coord in nodes:
+        coord.start()
+    time.sleep(0.5)
+
+    submitted = []
+    for data in layouts:
+        submitted.append(time.time())
+        for coord in nodes:   # screen/update는 모든 노드가 받는다
+            coord.submit(data)
+        time.sleep(ARGS.interval_ms / 1000.0)
+    time.sleep(ARGS.settle_s)
+    for coord in nodes:
+        coord.stop()
+    return submitted, applied
+
+
+def main():
+    global ARGS
+    ap = argparse.ArgumentParser(description="비디오 월 전환 동기화 시험")
+    ap.add_argument("--nodes", type=int, default=3)
+    ap.add_argument("--switches", type=int, default=30)
+    ap.add_argument("--interval-ms", type=float, default=400, help="배치 변경 간격")
+    ap.add_argument("--prepare-ms", type=float, default=40, help="노드별 예열 시간")
+    ap.add_argument("--lead-ms", type=float, default=150)
+    ap.add_argument("--ready-timeout-ms", type=float, default=1000)
+    ap.add_argument("--bus-delay-ms", type=float, default=2.0, help="메모리 버스 전달 지연")
+    ap.add_argument("--settle-s", type=float, default=2.0)
+    ap.add_argument("--mqtt", default="", help="host:port — 노드마다 프로세스를 띄워 브로커로 합의")
+    ap.add_argument("--seed", type=int, default=1)
+    ARGS = ap.parse_args()
+
+    layouts = _layouts(random.Random(ARGS.seed), ARGS.nodes, ARGS.switches)
+    devnull = open(os.devnull, "w")
+    real_stdout, sys.stdout = sys.stdout, devnull   # [WALL] 로그는 측정에서 제외
+    try:
+        submitted, applied = run_mqtt(layouts) if ARGS.mqtt else run_memory(layouts)
+    finally:
+        sys.stdout = real_stdout
+
+    by_version = {}
+    for node_applied in applied:
+        for version, t, senders in node_applied:
+            by_version.setdefault(version, []).append((t, senders))
+
+    skews, latencies, partial, mismatched = [], [], 0, 0
+    for version, entries in sorted(by_version.items()):
+        if len(entries) < ARGS.nodes:
+            partial += 1
+            continue
+        times = [t for t, _ in entries]
+        skews.append((max(times) - min(times)) * 1000.0)
+        latencies.append((max(times) - submitted[version - 1]) * 1000.0)
+        want = {p["id"] for p in layouts[version - 1]["participants"]}
+        got = set().union(*(set(s) for _, s in entries))
+        mismatched += got != want
+
+    print(f"nodes={ARGS.nodes} switches={ARGS.switches} transport={'mqtt' if ARGS.mqtt else 'memory'}")
+    print(f"applied on all nodes: {len(skews)}/{ARGS.switches} (partial={partial}, "
+          f"sender-set mismatch={mismatched})")
+    if skews:
+        print(f"{'metric':<22} | {'p50':>8} {'p95':>8} {'max':>8}")
+        for name, vals in (("apply skew ms", skews), ("submit→apply ms", latencies)):
+            print(f"{name:<22} | {percentile(vals, 50):8.2f} {percentile(vals, 95):8.2f} {max(vals):8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,67 @@
-from PyQt5 import QtCore, QtWidgets
+import os
+
+from PyQt5 import QtCore, QtWidgets, QtGui
+
+_ICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons", "person.png")
+_icon_source = None   # 원본 person.png (한 번만 디코딩)
+_icon_cache = {}      # 아이콘 크기(px) -> 스케일된 QPixmap
+
+
+def person_icon(px: int) -> QtGui.QPixmap:
+    """대기 화면 아이콘 (크기별로 한 번만 스케일)"""
+    global _icon_source
+    pm = _icon_cache.get(px)
+    if pm is None:
+        if _icon_source is None:
+            _icon_source = QtGui.QPixmap(_ICON_PATH)
+        pm = _icon_source.scaled(px, px, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        _icon_cache[px] = pm
+    return pm
+
+
+class Placeholder(QtWidgets.QWidget):
+    """셀마다 하나씩 만들어 재사용하는 대기 화면"""
+
+    ICON_MAX = 90
+    ICON_MIN = 24
+    ICON_STEP = 6   # 창 크기 조절 중에도 캐시가 몇 개로 끝나도록 단계화
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet("background: transparent; border: none;")
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setAlignment(QtCore.Qt.AlignCenter)
+
+        self._icon = QtWidgets.QLabel()
+        self._icon.setAlignment(QtCore.Qt.AlignCenter)
+        self._icon_px = 0
+        self._set_icon_px(self.ICON_MAX)
+
+        text = QtWidgets.QLabel("· · ·  대기 중  · · ·")
+        text.setAlignment(QtCore.Qt.AlignCenter)
+        text.setStyleSheet("""
+            QLabel {
+                color: #6b7280;
+                font-size: 22px;
+                font-weight: bold;
+            }
+        """)
+
+        layout.addWidget(self._icon)
+        layout.addSpacing(8)
+        layout.addWidget(text)
+
+    def _set_icon_px(self, px):
+        if px != self._icon_px:
+            self._icon_px = px
+            self._icon.setPixmap(person_icon(px))
+
+    def resizeEvent(self, e):
+        # 작은 셀에서는 아이콘도 줄임 (셀 짧은 변의 1/4)
+        px = min(self.ICON_MAX, max(self.ICON_MIN, min(self.width(), self.height()) // 4))
+        self._set_icon_px(px - px % self.ICON_STEP)
+        super().resizeEvent(e)
 
 
 class Cell(QtWidgets.QFrame):
@@ -6,22 +69,44 @@ class Cell(QtWidgets.QFrame):
 
     def __init__(self):
         super().__init__()
+        self.setStyleSheet("""
+            QFrame {
+                background: white;
+                border: 1px solid black;
+            }
+        """)
         self._layout = QtWidgets.QVBoxLayout(self)
         self._layout.setContentsMargins(0, 0, 0, 0)
         self._layout.setSpacing(0)
+        self._content = None
+        self.placeholder = Placeholder(self)
+        self.show_placeholder()
 
     def mousePressEvent(self, e):
         self.clicked.emit()
 
+    def content(self):
+        return self._content
+
     def put_widget(self, w: QtWidgets.QWidget):
-        while self._layout.count():
-            item = self._layout.takeAt(0)
-            if item.widget():
-                item.widget().setParent(None)
+        if w is self._content:
+            return
+        self.clear()
         self._layout.addWidget(w)
+        self._content = w
+        if w is self.placeholder:
+            w.show()
+
+    def show_placeholder(self):
+        """대기 화면으로 전환 (새 위젯을 만들지 않음)"""
+        self.put_widget(self.placeholder)
 
     def clear(self):
         while self._layout.count():
             item = self._layout.takeAt(0)
-            if item.widget():
-                item.widget().setParent(None)
+            w = item.widget()
+            if w is self.placeholder:
+                w.hide()   # 대기 화면은 셀에 붙여 둔 채 숨김
+            elif w:
+                w.setParent(None)
+        self._content = None
@@ -0,0 +1,67 @@
+# command_queue.py
+# 수신기 상태 변경을 GLib 메인 루프 한 곳에서 순서대로 처리하는 명령 큐
+
+import threading
+from collections import deque
+
+from gi.repository import GLib
+
+
+class CommandQueue:
+    """어느 스레드에서든 post(), GLib 메인 루프에서 FIFO 순서로 일괄 실행
+
+    Socket.IO 스레드, Qt 슬롯, GLib 콜백이 모두 여기로 명령을 넣고
+    receiver 상태(peers/_order/_cell_assign)는 drain 안에서만 바뀐다.
+    쌓인 명령은 한 번의 idle 콜백에서 모두 처리하므로 ICE 후보 20개 같은 버스트도
+    메인 루프를 한 번만 깨운다. key가 같은 명령이 아직 대기 중이면 자리를 유지한 채
+    인자만 최신 값으로 바꾼다 (예: sender-list 전체 갱신).
+    """
+
+    def __init__(self, name="receiver"):
+        self.name = name
+        self._items = deque()     # [fn, args, key] (key 갱신을 위해 list)
+        self._keyed = {}          # key -> 대기 중인 item
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+        # 메트릭
+        self.posted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.max_batch = 0
+
+    def post(self, fn, *args, key=None):
+        with self._lock:
+            self.posted += 1
+            item = self._keyed.get(key) if key is not None else None
+            if item is not None:
+                item[0], item[1] = fn, args
+                self.coalesced += 1
+                return
+            item = [fn, args, key]
+            self._items.append(item)
+            if key is not None:
+                self._keyed[key] = item
+            if self._scheduled:
+                return
+            self._scheduled = True
+        GLib.idle_add(self._drain)
+
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def _drain(self):
+        with self._lock:
+            batch = list(self._items)
+            self._items.clear()
+            self._keyed.clear()
+            self._scheduled = False
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(batch))
+        for fn, args, _ in batch:
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[CMD][{self.name}] {getattr(fn, '__name__', fn)} failed:", e)
+        return False
@@ -0,0 +1,212 @@
+# compositor.py
+# 모든 sender 스트림을 하나의 파이프라인/믹서/싱크로 합성하는 공유 컴포지터
+
+import gi
+
+gi.require_version('Gst', '1.0')
+gi.require_version('GstVideo', '1.0')
+
+from gi.repository import Gst, GstVideo
+from gst_utils import _make, _first_available, _set_props_if_supported
+from config import COMPOSITOR_ELEMENTS, COMPOSITOR_CANVAS, COMPOSITOR_FPS, COMPOSITOR_THREADS
+
+
+class SharedCompositor:
+    """단일 Gst.Pipeline + 믹서(glvideomixer/compositor) + 싱크 하나로 모든 sender를 합성
+
+    각 PeerReceiver는 자신의 webrtcbin과 디코드 브랜치를 이 파이프라인에 추가하고,
+    브랜치 끝을 믹서의 요청 패드에 연결한다. 레이아웃 변경은 네이티브 창을 옮기는 대신
+    믹서 패드의 xpos/ypos/width/height/alpha 속성만 갱신한다.
+    믹서 출력은 tee를 거쳐 싱크로 가고, 프로그램 출력(program_out.py)이 같은 tee에서 인코딩한다.
+    """
+
+    NAME = "webrtc-compositor-pipeline"
+    MIXER_ELEMENTS = COMPOSITOR_ELEMENTS
+    CANVAS = COMPOSITOR_CANVAS
+    FPS = COMPOSITOR_FPS
+
+    def __init__(self):
+        self.pipeline = Gst.Pipeline.new(self.NAME)
+        self.canvas_w, self.canvas_h = self.CANVAS
+        self.fps = self.FPS
+        self._winid = None
+        self._pads = {}      # sender_id -> 믹서 sink pad
+        self._rects = {}     # sender_id -> 정규화 사각형 (x, y, w, h), 0.0~1.0
+        self._layers = {}    # sender_id -> 레이아웃 겹침 순서 (0=그리드, PiP은 1부터)
+        self._zorder = 1     # 0은 배경
+
+        self.mixer = _first_available(*self.MIXER_ELEMENTS)
+        if not self.mixer:
+            raise RuntimeError("compositor/glvideomixer 생성 실패")
+        self._is_gl = self.mixer.get_factory().get_name().startswith("gl")
+        if COMPOSITOR_THREADS:
+            _set_props_if_supported(self.mixer, max_threads=COMPOSITOR_THREADS)
+
+        self._build()
+        self._setup_bus()
+        print(f"[COMP] {self.NAME}: {self.mixer.get_factory().get_name()} "
+              f"{self.canvas_w}x{self.canvas_h}@{self.fps}")
+
+    def _build(self):
+        """배경 → 믹서 → tee → (변환) → 싱크 구성"""
+        bg, caps = self._build_mixer_input()
+        self.tee = _make("tee")
+        _set_props_if_supported(self.tee, allow_not_linked=True)
+
+        tail = []
+        if self._is_gl:
+            self.sink = _first_available("glimagesink")
+        else:
+            tail.append(_make("videoconvert"))
+            self.sink = _first_available("glimagesink", "xvimagesink", "autovideosink")
+        q = _make("queue")
+
+        chain = [self.mixer, caps, self.tee, *tail, q, self.sink]
+        if not all([bg, *chain]):
+            raise RuntimeError("컴포지터 요소 부족")
+
+        # 캔버스를 위젯 크기에 맞춰 늘려야 정규화 좌표가 화면 좌표와 일치한다
+        _set_props_if_supported(self.sink, sync=False, force_aspect_ratio=False,
+                                handle_events=False)
+
+        self._add_chain(bg, chain)
+
+    def _build_mixer_input(self):
+        """배경 videotestsrc + 믹서 출력 capsfilter"""
+        # 배경: 입력이 하나도 없어도 라이브 믹서가 출력을 내도록 검은 화면 공급
+        bg = _make("videotestsrc")
+        bg.set_property("is-live", True)
+        bg.set_property("pattern", "black")
+
+        memory = "(memory:GLMemory)" if self._is_gl else ""
+        caps = _make("capsfilter")
+        caps.set_property("caps", Gst.Caps.from_string(
+            f"video/x-raw{memory},width={self.canvas_w},height={self.canvas_h},"
+            f"framerate={self.fps}/1"))
+        return bg, caps
+
+    def _add_chain(self, bg, chain):
+        """배경 + 믹서부터 시작하는 chain을 파이프라인에 추가/링크"""
+        self.pipeline.add(bg)
+        for e in chain:
+            self.pipeline.add(e)
+        for a, b in zip(chain, chain[1:]):
+            if not a.link(b):
+                print(f"[COMP] link 실패: {a.get_name()} → {b.get_name()}")
+
+        bg_pad = self.mixer.request_pad_simple("sink_%u")
+        bg.get_static_pad("src").link(bg_pad)
+        for k, v in (("xpos", 0), ("ypos", 0), ("zorder", 0),
+                     ("width", self.canvas_w), ("height", self.canvas_h)):
+            bg_pad.set_property(k, v)
+
+    def _setup_bus(self):
+        bus = self.pipeline.get_bus()
+        bus.set_sync_handler(self._on_sync_message)
+        bus.add_signal_watch()
+        bus.connect("message::error", self._on_error)
+
+    # ========== 파이프라인 상태 ==========
+
+    def start(self):
+        ret = self.pipeline.set_state(Gst.State.PLAYING)
+        print("[COMP] set_state ->", ret.value_nick)
+
+    def stop(self):
+        try:
+            self.pipeline.set_state(Gst.State.NULL)
+        except Exception:
+            pass
+
+    # ========== 오버레이 ==========
+
+    def set_window_handle(self, winid: int):
+        """합성 출력을 그릴 네이티브 창 지정"""
+        self._winid = winid
+        try:
+            GstVideo.VideoOverlay.set_window_handle(self.sink, winid)
+        except Exception:
+            # glimagesink 등 bin 싱크는 prepare-window-handle 때 다시 지정된다
+            pass
+
+    def _on_sync_message(self, bus, msg):
+        try:
+            if GstVideo.is_video_overlay_prepare_window_handle_message(msg):
+                if self._winid is not None:
+                    GstVideo.VideoOverlay.set_window_handle(msg.src, self._winid)
+                    print(f"[COMP] overlay handle set (0x{self._winid:x})")
+                    return Gst.BusSyncReply.DROP
+        except Exception as e:
+            print("[COMP] sync handler error:", e)
+        return Gst.BusSyncReply.PASS
+
+    def _on_error(self, bus, msg):
+        err, dbg = msg.parse_error()
+        print(f"[COMP][ERROR] {msg.src.get_name()}: {err.message} (debug: {dbg})")
+
+    # ========== 브랜치 연결 ==========
+
+    def attach_branch(self, sender_id: str, src_element):
+        """sender 디코드 브랜치의 마지막 요소를 믹서 요청 패드에 연결"""
+        self.detach_branch(sender_id)
+        pad = self.mixer.request_pad_simple("sink_%u")
+        if not pad:
+            print(f"[COMP] {sender_id}: mixer pad 요청 실패")
+            return False
+        pad.set_property("zorder", self._zorder)
+        self._zorder += 1
+        pad.set_property("alpha", 0.0)  # 셀에 배치되기 전까지 숨김
+        if src_element.get_static_pad("src").link(pad) != Gst.PadLinkReturn.OK:
+            print(f"[COMP] {sender_id}: mixer pad link 실패")
+            self.mixer.release_request_pad(pad)
+            return False
+        self._pads[sender_id] = pad
+        rect = self._rects.get(sender_id)
+        if rect:
+            self._apply_rect(pad, rect, self._layers.get(sender_id))
+        return True
+
+    def detach_branch(self, sender_id: str):
+        pad = self._pads.pop(sender_id, None)
+        if not pad:
+            return
+        peer = pad.get_peer()
+        if peer:
+            peer.unlink(pad)
+        self.mixer.release_request_pad(pad)
+
+    # ========== 레이아웃 ==========
+
+    def place(self, sender_id: str, rect, layer=None):
+        """sender를 정규화 사각형 rect=(x, y, w, h)에 표시 (layer: PiP 겹침 순서)"""
+        self._rects[sender_id] = tuple(rect)
+        if layer is not None:
+            self._layers[sender_id] = layer
+        pad = self._pads.get(sender_id)
+        if pad:
+            self._apply_rect(pad, rect, self._layers.get(sender_id))
+
+    def hide(self, sender_id: str):
+        # 알파 0인 패드는 믹서가 합성에서 건너뛴다
+        self._rects.pop(sender_id, None)
+        self._layers.pop(sender_id, None)
+        pad = self._pads.get(sender_id)
+        if pad:
+            pad.set_property("alpha", 0.0)
+
+    def hide_all(self):
+        for sid in list(self._pads.keys()):
+            self.hide(sid)
+        self._rects.clear()
+        self._layers.clear()
+
+    def _apply_rect(self, pad, rect, layer=None):
+        x, y, w, h = rect
+        if layer is not None:
+            # 그리드 셀은 서로 겹치지 않으므로 같은 층(1), PiP만 그 위로 (0은 배경)
+            pad.set_property("zorder", 1 + layer)
+        pad.set_property("xpos", int(round(x * self.canvas_w)))
+        pad.set_property("ypos", int(round(y * self.canvas_h)))
+        pad.set_property("width", int(round(w * self.canvas_w)))
+        pad.set_property("height", int(round(h * self.canvas_h)))
+        pad.set_property("alpha", 1.0)
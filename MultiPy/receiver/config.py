@@ -1,11 +1,12 @@
 # config.py
 # 전역 설정 값들을 관리하는 모듈
 
+import os
 import ssl
 
-# 서버 설정
-SIGNALING_URL = "https://localhost:3001"
-RECEIVER_NAME = "Receiver-1"
+# 서버 설정 (MULTIPY_* 환경 변수는 벤치마크/헤드리스 실행용 재정의)
+SIGNALING_URL = os.environ.get("MULTIPY_SIGNALING_URL", "https://localhost:3001")
+RECEIVER_NAME = os.environ.get("MULTIPY_RECEIVER_NAME", "Receiver-1")
 
 # SSL 설정
 ssl._create_default_https_context = ssl._create_unverified_context
@@ -17,12 +18,119 @@ INFO_POPUP_MARGIN = 16
 SWITCH_COOLDOWN_MS = 150
 
 # GStreamer 설정
-STUN_SERVER = "stun://stun.l.google.com:19302"
-GST_VIDEO_CAPS = ("application/x-rtp,media=video,encoding-name=H264,clock-rate=90000,"
-                  "payload=102,packetization-mode=(string)1,profile-level-id=(string)42e01f")
+STUN_SERVER = os.environ.get("MULTIPY_STUN_SERVER", "stun://stun.l.google.com:19302")  # 빈 값이면 미사용
 ALWAYS_PLAYING = True
 
+# 수신 코덱 (video_codecs.py): 시작 시 디코더를 프로브해 디코드 비용이 싼 순서로 offer에 넣음
+VIDEO_CODECS = ("H264", "H265", "VP8", "VP9", "AV1")   # 프로브할 후보
+CODEC_ORDER = os.environ.get("MULTIPY_CODECS", "")     # "VP9,H264"처럼 지정하면 비용 순서 대신 이 목록/순서
+CODEC_MAX_DECODE_MS = 8.0      # 프로브 샘플 프레임당 디코드가 이보다 느린 코덱은 광고하지 않음
+CODEC_PROBE_FRAMES = 10
+CODEC_PROBE_SIZE = (640, 360)
+H264_PROFILES = ("640032", "42e01f")   # offer할 profile-level-id (High 5.0 → Constrained Baseline)
+
+# 공유 컴포지터 모드: 모든 sender를 하나의 파이프라인/믹서/싱크로 합성
+# (셀이 NATIVE_TILE_LIMIT보다 많은 레이아웃은 이 모드에서만 받음)
+COMPOSITOR_MODE = os.environ.get("MULTIPY_COMPOSITOR", "0") == "1"
+COMPOSITOR_ELEMENTS = ("glvideomixer", "compositor")  # 우선순위 순
+COMPOSITOR_CANVAS = (1920, 1080)
+COMPOSITOR_FPS = 30
+COMPOSITOR_THREADS = 0   # compositor(CPU) 합성 스레드 수 (0이면 GStreamer 기본값)
+
+# 선언형 레이아웃 (layout_spec.py)
+LAYOUT_MAX_GRID = 8      # 행/열 최대
+LAYOUT_MAX_TILES = 16    # 셀(그리드 칸 + PiP) 최대
+NATIVE_TILE_LIMIT = 4    # 컴포지터 없이 셀마다 네이티브 창을 쓰는 경우 최대 셀 수 (넘는 배치는 거부)
+
+# 비디오 월 (wall.py): 여러 receiver가 논리 캔버스 하나를 나눠 표시 (빈 값이면 비활성)
+# 월 멤버는 모두 시그널링 방 WALL_ID에 들어가고, sender는 멤버마다 연결을 따로 맺는다
+WALL_ID = os.environ.get("MULTIPY_WALL", "")
+WALL_NODE = os.environ.get("MULTIPY_WALL_NODE") or f"{RECEIVER_NAME}-{os.getpid()}"
+WALL_SLICE = os.environ.get("MULTIPY_WALL_SLICE", "0,0,1,1")   # 이 화면의 조각 "x,y,w,h"
+WALL_SWITCH_LEAD_MS = 150    # commit 후 실제 전환까지 여유 (모든 노드가 메시지를 받을 시간)
+WALL_READY_TIMEOUT_MS = 1000  # 준비 안 된 노드를 기다리는 최대 시간
+
+# MQTT (관리자 페이지/월 합의)
+MQTT_HOST = os.environ.get("MULTIPY_MQTT_HOST", "localhost")
+MQTT_PORT = int(os.environ.get("MULTIPY_MQTT_PORT", "1883"))
+
+# 워밍 풀: 미리 PLAYING + RECVONLY transceiver + offer까지 준비해 둘 PeerReceiver 수 (0이면 비활성)
+PEER_POOL_SIZE = 2
+
+# 디코드 브랜치 프로파일: "auto" | "jetson"(NVMM 고정) | "generic" | "software"(코덱별 소프트웨어 디코더)
+DECODE_PROFILE = os.environ.get("MULTIPY_DECODE_PROFILE", "auto")
+DECODE_SINK = os.environ.get("MULTIPY_DECODE_SINK") or None   # 싱크 팩토리 강제 (예: "fakesink")
+
+# 녹화 (recorder.py): sender별 디코드 전 H.264를 분할 MP4로 저장 (MQTT record/update로 시작/중지)
+RECORD_ENABLED = True          # False면 디코드 브랜치에 녹화용 tee를 넣지 않음
+RECORD_DIR = os.environ.get("MULTIPY_RECORD_DIR", os.path.expanduser("~/multipy-recordings"))
+RECORD_SEGMENT_S = 300         # 조각 길이 (다음 키프레임에서 자름)
+RECORD_FRAGMENT_MS = 1000      # fragmented MP4 조각 단위 (비정상 종료 시 잃는 최대 구간)
+RECORD_QUEUE_MS = 3000         # 디스크 지연 흡수 (넘치면 녹화 쪽만 오래된 버퍼부터 버림)
+RECORD_MAX_BYTES = 20 * 1024 ** 3   # RECORD_DIR 총량 상한 (넘으면 오래된 조각부터 삭제, 0이면 무제한)
+RECORD_STOP_TIMEOUT_MS = 2000  # 중지 시 마지막 조각 마무리(EOS) 대기 상한
+
+# 프로그램 출력 (program_out.py): 현재 배치를 합성해 한 번만 인코딩 → 파일/SRT/RTSP (MQTT program/update)
+PROGRAM_ENABLED = True         # 네이티브 창 모드에서 디코드 브랜치 싱크 앞에 raw tee를 넣음
+PROGRAM_OUTPUT = os.environ.get("MULTIPY_PROGRAM_OUTPUT", "")   # 시작하자마자 내보낼 출력 (빈 값이면 MQTT로만)
+PROGRAM_CANVAS = (1920, 1080)
+PROGRAM_FPS = 30
+PROGRAM_BITRATE_KBPS = 6000
+PROGRAM_KEYFRAME_S = 2
+PROGRAM_ENCODERS = ("nvv4l2h264enc", "vaapih264enc", "v4l2h264enc", "x264enc")   # 하드웨어 우선, x264 대체
+PROGRAM_QUEUE_MS = 500         # 인코더가 밀리면 프로그램 출력 쪽 프레임만 버림
+PROGRAM_STOP_TIMEOUT_MS = 3000  # 중지 시 파일 마무리(EOS) 대기 상한
+
+# 지연 프로파일 (latency.py): sender별 지터 버퍼/싱크 동기화, MQTT latency/update로 실행 중 전환
+#   latency_ms       webrtcbin(rtpbin) 지터 버퍼 크기
+#   drop_on_latency  latency 안에 못 채운 패킷을 기다리지 않고 버림
+#   sync             싱크를 파이프라인 클록에 맞춰 표시 (False면 도착 즉시, 컴포지터 모드는 공유 싱크라 제외)
+#   max_lateness_ms  sync일 때 이보다 늦은 프레임은 버림 (-1이면 늦어도 표시)
+LATENCY_PROFILES = {
+    "low": {"latency_ms": 50, "drop_on_latency": True, "sync": False, "max_lateness_ms": -1},
+    "smooth": {"latency_ms": 250, "drop_on_latency": False, "sync": True, "max_lateness_ms": 40},
+}
+LATENCY_PROFILE = os.environ.get("MULTIPY_LATENCY_PROFILE", "low")   # 새 sender 기본 프로파일
+# glass-to-glass 측정: synthetic_sender.py --timecode가 프레임에 그린 송출 시각을 표시 직전에 읽음
+LATENCY_PROBE = os.environ.get("MULTIPY_LATENCY_PROBE", "0") == "1"
+
+# 시작 시 디코더 프로브 (샘플 인코드/디코드 대기 시간)
+DECODER_PROBE_TIMEOUT_S = 2.0
+
+# 통계 (stats.stats_registry로 조회)
+STATS_INTERVAL_MS = 1000
+STATS_HISTORY = 60       # sender별 링버퍼 샘플 수
+STATS_LOG = False        # True면 샘플마다 한 줄 출력
+
+# 적응형 화질: 셀 크기에 맞춰 sender 송출 해상도/비트레이트 요청
+QUALITY_ADAPTIVE = True
+QUALITY_UPDATE_DELAY_MS = 300      # 레이아웃 변경 후 힌트 계산까지 대기
+QUALITY_BITS_PER_PIXEL = 0.08      # 화면 공유 콘텐츠 기준 bpp
+QUALITY_FPS = 30
+QUALITY_MIN_BITRATE = 150_000
+QUALITY_MAX_BITRATE = 6_000_000
+QUALITY_THUMBNAIL = (320, 180)     # 셀 밖 sender
+QUALITY_THUMBNAIL_FPS = 5
+
+# 사이멀캐스트 (simulcast.py): offer에 rid 층을 광고하고, 셀 높이로 sender마다 한 층만 켜게 함
+# (rid, 캡처 대비 축소 배율, 이 층을 고를 최소 셀 높이 px) — 큰 층부터
+# rid 협상은 시그널링 SDP에만 있고 webrtcbin은 층마다 바뀌는 SSRC를 그냥 받으므로 기본은 끔
+# (켜기 전에 bench/simulcast_switch.py로 층 전환 디코드 확인)
+SIMULCAST_ENABLED = os.environ.get("MULTIPY_SIMULCAST", "0") == "1"
+SIMULCAST_LAYERS = (("h", 1, 541), ("m", 2, 271), ("l", 4, 0))
+
+# 메트릭 HTTP 엔드포인트 (Prometheus 텍스트 형식, 0이면 비활성)
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 0
+METRICS_LAG_INTERVAL_MS = 250   # 이벤트 루프 지연 측정 주기
+
+# GLib ↔ Qt 루프 통합: "auto" | "qt"(Qt의 GLib 디스패처) | "thread"(전용 GLib 스레드) | "poll"(QTimer 폴링)
+GLIB_INTEGRATION = os.environ.get("MULTIPY_GLIB_INTEGRATION", "auto")
+
 # 타이머 설정
-GLIB_TIMER_INTERVAL_MS = 5
+GLIB_TIMER_INTERVAL_MS = 5   # poll 모드 전용
 UI_OVERLAY_DELAY_MS = 50
+VISIBILITY_SETTLE_MS = 200   # 셀 배정 변경 후 디코드 on/off 반영까지 대기
+KEYFRAME_MIN_INTERVAL_MS = 500   # sender별 키프레임(PLI) 요청 최소 간격
+CANDIDATE_BATCH_MS = 20   # 로컬 ICE 후보를 묶어 보내는 창 (0이면 후보마다 즉시 전송)
 ICE_STATE_CHECK_DELAY_MS = 800
\ No newline at end of file
@@ -1,16 +1,105 @@
 # glib_qt_integration.py
 # GLib와 PyQt5 이벤트 루프 통합
 
+import threading
+
 from PyQt5 import QtCore
 from gi.repository import GLib
-from config import GLIB_TIMER_INTERVAL_MS
+from config import GLIB_TIMER_INTERVAL_MS, GLIB_INTEGRATION
+
+# 통합 모드
+MODE_QT = "qt"          # Qt 이벤트 디스패처가 GLib 기반 → 기본 컨텍스트를 Qt 루프가 직접 처리
+MODE_THREAD = "thread"  # 전용 스레드에서 GLib.MainLoop 실행, UI 작업은 run_in_qt로 전달
+MODE_POLL = "poll"      # QTimer로 GLIB_TIMER_INTERVAL_MS마다 ctx.iteration(False) (이전 방식)
+
+
+class _QtInvoker(QtCore.QObject):
+    """다른 스레드에서 넘어온 callable을 Qt 메인 스레드에서 실행"""
+
+    invoke = QtCore.pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.invoke.connect(self._run, QtCore.Qt.QueuedConnection)
+
+    @QtCore.pyqtSlot(object)
+    def _run(self, fn):
+        try:
+            fn()
+        except Exception as e:
+            print("[QT] queued call failed:", e)
+
+
+# import는 메인 스레드에서 일어나므로 여기서 만들면 스레드 소속이 Qt 메인 스레드가 된다
+_invoker = _QtInvoker()
+
+
+def run_in_qt(fn, *args):
+    """fn(*args)를 Qt 메인 스레드 이벤트 루프에서 실행 (어느 스레드에서 호출해도 안전)
+
+    위젯/winId를 다루는 작업은 GLib 콜백에서 직접 하지 말고 이걸로 넘긴다.
+    GLib.idle_add/timeout_add의 콜백으로 바로 써도 한 번만 실행되도록 False를 반환한다.
+    """
+    _invoker.invoke.emit(lambda: fn(*args))
+    return False
+
+
+def qt_uses_glib_dispatcher() -> bool:
+    """Qt 메인 스레드 디스패처가 GLib 기본 컨텍스트를 돌리는지 (Linux 기본 빌드)"""
+    d = QtCore.QAbstractEventDispatcher.instance(QtCore.QCoreApplication.instance().thread())
+    return bool(d) and "glib" in d.metaObject().className().lower()
+
+
+class GLibIntegration:
+    """선택된 통합 방식의 핸들 (stop()으로 정리)"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self._timer = None
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        if self.mode == MODE_POLL:
+            ctx = GLib.MainContext.default()
+            self._timer = QtCore.QTimer()
+            self._timer.setInterval(GLIB_TIMER_INTERVAL_MS)
+            self._timer.timeout.connect(lambda: ctx.iteration(False))
+            self._timer.start()
+        elif self.mode == MODE_THREAD:
+            self._loop = GLib.MainLoop()
+            self._thread = threading.Thread(target=self._loop.run, name="glib-main", daemon=True)
+            self._thread.start()
+        print(f"[GLIB] integration mode: {self.mode}")
+        return self
+
+    def stop(self):
+        if self._timer:
+            self._timer.stop()
+            self._timer = None
+        if self._loop:
+            self._loop.quit()
+            self._thread.join(timeout=1.0)
+            self._loop = self._thread = None
+
 
+def integrate_glib_into_qt(mode=GLIB_INTEGRATION):
+    """GLib 이벤트 루프를 PyQt5에 통합
 
-def integrate_glib_into_qt():
-    """GLib 이벤트 루프를 PyQt5에 통합"""
-    ctx = GLib.MainContext.default()
-    timer = QtCore.QTimer()
-    timer.setInterval(GLIB_TIMER_INTERVAL_MS)
-    timer.timeout.connect(lambda: ctx.iteration(False))
-    timer.start()
-    return timer
\ No newline at end of file
+    Args:
+        mode: "auto" | "qt" | "thread" | "poll"
+              auto는 Qt 디스패처가 GLib 기반이면 qt, 아니면 thread
+    Returns:
+        GLibIntegration
+    """
+    glib_dispatcher = qt_uses_glib_dispatcher()
+    if mode == "auto":
+        mode = MODE_QT if glib_dispatcher else MODE_THREAD
+    elif mode == MODE_QT and not glib_dispatcher:
+        print("[GLIB] Qt dispatcher is not GLib-based (QT_NO_GLIB?) → thread")
+        mode = MODE_THREAD
+    elif mode == MODE_THREAD and glib_dispatcher:
+        # 두 스레드가 같은 기본 컨텍스트를 두고 경쟁하게 되므로 Qt 디스패처에 맡긴다
+        print("[GLIB] Qt already dispatches the default GLib context → qt")
+        mode = MODE_QT
+    return GLibIntegration(mode).start()
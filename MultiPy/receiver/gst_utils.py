@@ -3,11 +3,16 @@
 
 import os
 import platform
+import time
 import gi
 
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst
 
+from config import (DECODER_PROBE_TIMEOUT_S, VIDEO_CODECS, CODEC_ORDER, CODEC_MAX_DECODE_MS,
+                    CODEC_PROBE_FRAMES, CODEC_PROBE_SIZE, DECODE_PROFILE)
+from video_codecs import CODECS, ESTIMATED_COST_MS, HARDWARE_COST_FACTOR, is_software
+
 def _make(name):
     """GStreamer 엘리먼트 생성 헬퍼"""
     return Gst.ElementFactory.make(name) if name else None
@@ -31,41 +36,208 @@ def _set_props_if_supported(element, **kwargs):
         except Exception:
             pass
 
-def get_decoder_and_sink():
-    """플랫폼별 HW 디코더와 비디오 싱크 선택"""
+def is_jetson():
+    return os.path.isfile("/etc/nv_tegra_release")
+
+def _platform_candidates():
+    """플랫폼별 코덱별 디코더/변환기/싱크 후보 (우선순위 순, 하드웨어 → 소프트웨어)"""
     sysname = platform.system().lower()
-    decoder, conv, sink = None, None, None
 
-    # 디코더 선택
     if "linux" in sysname:
-        if os.path.isfile("/etc/nv_tegra_release"):
-            # NVIDIA Jetson
-            decoder = _first_available("nvv4l2decoder", "omxh264dec")
-            conv = _first_available("nvvidconv", "videoconvert")
+        if is_jetson():
+            # NVIDIA Jetson (AV1은 Orin 이상에서만 nvv4l2decoder가 받음, 프로브로 걸러짐)
+            hardware = {c: ("nvv4l2decoder",) for c in CODECS}
+            hardware["H264"] += ("omxh264dec",)
+            convs = ("nvvidconv", "videoconvert")
         else:
-            # 일반 Linux
-            decoder = _first_available("vaapih264dec", "v4l2h264dec", "avdec_h264")
-            conv = _first_available("videoconvert")
+            # 일반 Linux (vaapi* = gstreamer-vaapi, va* = 1.22+ va 플러그인)
+            hardware = {c: (f"vaapi{c.lower()}dec", f"va{c.lower()}dec", f"v4l2{c.lower()}dec")
+                        for c in CODECS}
+            convs = ("videoconvert",)
+        sinks = ("nv3dsink", "glimagesink", "xvimagesink", "autovideosink")
     elif "windows" in sysname:
-        decoder = _first_available("d3d11h264dec", "avdec_h264")
-        conv = _first_available("d3d11convert", "videoconvert")
+        hardware = {c: (f"d3d11{c.lower()}dec",) for c in CODECS}
+        convs = ("d3d11convert", "videoconvert")
+        sinks = ("d3d11videosink", "autovideosink")
     elif "darwin" in sysname:
-        decoder = _first_available("vtdec", "avdec_h264")
-        conv = _first_available("videoconvert")
+        hardware = {"H264": ("vtdec",), "H265": ("vtdec",)}
+        convs = ("videoconvert",)
+        sinks = ("glimagesink", "avfvideosink", "autovideosink")
     else:
-        decoder = _first_available("avdec_h264")
-        conv = _first_available("videoconvert")
+        hardware = {}
+        convs = ("videoconvert",)
+        sinks = ("autovideosink",)
+    decoders = {c: hardware.get(c, ()) + CODECS[c].software for c in VIDEO_CODECS if c in CODECS}
+    # 프로파일을 고정하면 그 프로파일로 디코드할 수 있는 후보만 프로브 (못 하는 코덱은 offer하지 않음)
+    if DECODE_PROFILE == "software":
+        decoders = {c: CODECS[c].software for c in decoders}
+    elif DECODE_PROFILE == "jetson":
+        decoders = {c: tuple(n for n in names if n == "nvv4l2decoder") for c, names in decoders.items()}
+    return decoders, convs, sinks
 
-    # 싱크 선택
-    if "windows" in sysname:
-        sink = _first_available("d3d11videosink", "autovideosink")
-    elif "darwin" in sysname:
-        sink = _first_available("avfvideosink", "autovideosink")
-    else:
-        sink = _first_available("glimagesink", "xvimagesink", "autovideosink")
-    
-    if sink:
-        print(f"[INFO] 비디오 싱크 사용: {sink.get_name()}")
+# ========== 샘플 디코드 프로브 ==========
+
+def _make_sample(spec, frames):
+    """디코더 검증/비용 측정용 샘플 (parse 출력 형식 버퍼 목록), 인코더가 없으면 None"""
+    w, h = CODEC_PROBE_SIZE
+    for enc, args in spec.encoders:
+        if not Gst.ElementFactory.find(enc):
+            continue
+        desc = (f"videotestsrc num-buffers={frames} pattern=ball "
+                f"! video/x-raw,format=I420,width={w},height={h},framerate=30/1 "
+                f"! {enc} name=enc ! {spec.parse or 'identity'} ! {spec.parsed_caps} "
+                f"! appsink name=out sync=false")
+        try:
+            pipe = Gst.parse_launch(desc)
+        except Exception:
+            continue
+        encoder = pipe.get_by_name("enc")
+        for k, v in args.items():
+            Gst.util_set_object_arg(encoder, k, v)
+        sink = pipe.get_by_name("out")
+        pipe.set_state(Gst.State.PLAYING)
+        out = []
+        while len(out) < frames:
+            sample = sink.emit("try-pull-sample", int(DECODER_PROBE_TIMEOUT_S * Gst.SECOND))
+            if not sample:
+                break
+            buf = sample.get_buffer()
+            out.append(buf.extract_dup(0, buf.get_size()))
+        pipe.set_state(Gst.State.NULL)
+        if out:
+            return out
+    return None
+
+def _decode_cost_ms(name, spec, sample):
+    """후보 디코더로 샘플을 디코드해 프레임당 ms (실패하면 None)
+
+    첫 프레임은 디코더 초기화(하드웨어 장치 열기 등)가 섞이므로 빼고 나머지로 잰다.
+    샘플이 없으면 READY 전환 가능 여부만 확인하고 0.0을 돌려준다.
+    """
+    if not Gst.ElementFactory.find(name):
+        return None
+    if sample is None:
+        # 장치 열기 실패 등은 READY 전환에서 걸림
+        e = _make(name)
+        if not e:
+            return None
+        ok = e.set_state(Gst.State.READY) != Gst.StateChangeReturn.FAILURE
+        e.set_state(Gst.State.NULL)
+        return 0.0 if ok else None
+
+    desc = (f"appsrc name=src format=time caps={spec.parsed_caps} "
+            f"! {spec.parse or 'identity'} ! {name} ! appsink name=out sync=false")
+    try:
+        pipe = Gst.parse_launch(desc)
+    except Exception:
+        return None
+    src, sink = pipe.get_by_name("src"), pipe.get_by_name("out")
+    timeout = int(DECODER_PROBE_TIMEOUT_S * Gst.SECOND)
+    try:
+        if pipe.set_state(Gst.State.PLAYING) == Gst.StateChangeReturn.FAILURE:
+            return None
+        src.emit("push-buffer", Gst.Buffer.new_wrapped(sample[0]))
+        if sink.emit("try-pull-sample", timeout) is None:
+            return None
+        t0 = time.monotonic()
+        for data in sample[1:]:
+            src.emit("push-buffer", Gst.Buffer.new_wrapped(data))
+        src.emit("end-of-stream")
+        got = 0
+        while got < len(sample) - 1 and sink.emit("try-pull-sample", timeout) is not None:
+            got += 1
+        return (time.monotonic() - t0) * 1000.0 / got if got else 0.0
+    except Exception:
+        return None
+    finally:
+        pipe.set_state(Gst.State.NULL)
+
+# ========== 능력 레지스트리 ==========
+
+class DecoderCapabilities:
+    """수신기 시작 시 1회 프로브한 코덱별 디코더/변환기/싱크 팩토리 캐시
+
+    모든 PeerReceiver가 공유하며, 새 sender가 붙을 때마다 레지스트리를 다시 훑지 않고
+    캐시된 팩토리 이름으로 요소만 생성한다. order는 offer에 넣을 코덱 순서(디코드 비용 순).
+    """
+
+    def __init__(self, decoders, conv, sink, jetson=False, costs=None, order=None):
+        self.decoders = decoders  # 코덱 -> 팩토리 이름 (디코드 가능한 코덱만)
+        self.conv = conv
+        self.sink = sink
+        self.jetson = jetson
+        self.costs = costs or {}  # 코덱 -> 프로브 샘플 프레임당 디코드 ms (샘플이 없으면 추정값)
+        self.order = order or list(decoders)
+
+    @property
+    def decoder(self):
+        """H.264 디코더 팩토리 이름 (없으면 None)"""
+        return self.decoders.get("H264")
+
+    def make_decoder(self, codec="H264"):
+        return _make(self.decoders.get(codec))
+
+    def make_converter(self):
+        return _make(self.conv)
+
+    def make_sink(self):
+        sink = _make(self.sink)
         _set_props_if_supported(sink, force_aspect_ratio=True, fullscreen=False, handle_events=False)
+        return sink
+
+    def describe(self):
+        codecs = ", ".join(f"{c}={self.decoders[c]} ({self.costs.get(c, 0.0):.2f} ms)" for c in self.order)
+        return f"[{codecs or 'no decoder'}] → {self.conv} → {self.sink}"
+
+
+def _codec_order(decoders, costs):
+    """offer 코덱 순서: CODEC_ORDER가 있으면 그대로, 없으면 CODEC_MAX_DECODE_MS 이하를 비용 순"""
+    if CODEC_ORDER:
+        wanted = [c.strip().upper() for c in CODEC_ORDER.split(",") if c.strip()]
+        return [c for c in wanted if c in decoders]
+    ranked = sorted(decoders, key=costs.get)
+    return [c for c in ranked if costs[c] <= CODEC_MAX_DECODE_MS] or ranked[:1]
+
 
-    return decoder, conv, sink
\ No newline at end of file
+_capabilities = None
+
+def probe_capabilities(force=False):
+    """레지스트리 프로브 + 코덱별 디코더 검증/비용 측정 (결과는 프로세스 내 캐시)"""
+    global _capabilities
+    if _capabilities is not None and not force:
+        return _capabilities
+
+    candidates, convs, sinks = _platform_candidates()
+    decoders, costs = {}, {}
+    for codec, names in candidates.items():
+        spec = CODECS[codec]
+        sample = _make_sample(spec, CODEC_PROBE_FRAMES)
+        if sample is None:
+            print(f"[CAPS] {codec} 샘플 인코더 없음 → READY 전환으로만 검증, 비용은 추정값")
+        for name in names:
+            cost = _decode_cost_ms(name, spec, sample)
+            if cost is None:
+                if Gst.ElementFactory.find(name):
+                    print(f"[CAPS] {codec} {name}: 샘플 디코드 실패 → 건너뜀")
+                continue
+            if sample is None:
+                cost = ESTIMATED_COST_MS[codec] * (1.0 if is_software(codec, name) else HARDWARE_COST_FACTOR)
+            decoders[codec], costs[codec] = name, cost
+            break
+
+    conv = next((n for n in convs if Gst.ElementFactory.find(n)), None)
+    sink = next((n for n in sinks if Gst.ElementFactory.find(n)), None)
+
+    _capabilities = DecoderCapabilities(decoders, conv, sink, jetson=is_jetson(),
+                                        costs=costs, order=_codec_order(decoders, costs))
+    print(f"[CAPS] decoder path: {_capabilities.describe()}")
+    return _capabilities
+
+def get_capabilities():
+    """캐시된 능력 반환 (아직 프로브 전이면 지금 프로브)"""
+    return probe_capabilities()
+
+def get_decoder_and_sink():
+    """플랫폼별 HW 디코더와 비디오 싱크 선택 (캐시된 팩토리로 새 요소 생성)"""
+    caps = get_capabilities()
+    return caps.make_decoder(), caps.make_converter(), caps.make_sink()
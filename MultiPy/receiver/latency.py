@@ -0,0 +1,180 @@
+# latency.py
+# 지연 프로파일 적용 + glass-to-glass 측정용 시간 코드
+#
+# 프로파일 (config.LATENCY_PROFILES)
+#   low     작은 지터 버퍼 + drop-on-latency, 싱크는 도착 즉시 표시
+#   smooth  큰 지터 버퍼, 싱크를 클록에 맞춰 일정한 간격으로 표시
+# webrtcbin latency는 rtpbin을 거쳐 이미 만들어진 지터 버퍼에도 반영되므로 재협상 없이 바꿀 수 있다.
+#
+# 시간 코드: 프레임 맨 위 줄에 48칸 흑백 블록 = 송출 시각(epoch ms 하위 40비트) + 8비트 체크섬
+#   bench/synthetic_sender.py --timecode 가 그리고, GlassProbe가 싱크 직전에 읽어
+#   (표시 예정 시각 - 송출 시각)을 잰다. 송신/수신 호스트가 다르면 NTP/PTP로 시계를 맞춰야 한다.
+
+import time
+
+import gi
+
+gi.require_version('Gst', '1.0')
+gi.require_version('GstBase', '1.0')
+gi.require_version('GstVideo', '1.0')
+from gi.repository import Gst, GstBase, GstVideo
+
+from config import LATENCY_PROFILES
+
+TIMECODE_BITS = 40
+TIMECODE_BLOCKS = TIMECODE_BITS + 8
+_TIMECODE_MASK = (1 << TIMECODE_BITS) - 1
+
+
+def resolve_profile(name):
+    """프로파일 이름 → 설정 dict (없는 이름은 ValueError)"""
+    try:
+        return LATENCY_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown latency profile {name!r} (choices: {', '.join(LATENCY_PROFILES)})")
+
+
+def apply_jitterbuffer(webrtc, profile):
+    """webrtcbin/rtpbin 지터 버퍼 설정 (세션 도중에도 기존 지터 버퍼까지 반영됨)"""
+    webrtc.set_property("latency", int(profile["latency_ms"]))
+    rtpbin = webrtc.get_by_name("rtpbin")
+    if rtpbin:
+        rtpbin.set_property("drop-on-latency", bool(profile["drop_on_latency"]))
+
+
+def apply_sink(sink, profile):
+    """네이티브 창 싱크 동기화 (컴포지터 모드는 sink가 None)"""
+    if not sink:
+        return
+    lateness = profile["max_lateness_ms"]
+    sink.set_property("sync", bool(profile["sync"]))
+    try:
+        sink.set_property("max-lateness", lateness * Gst.MSECOND if lateness >= 0 else -1)
+    except Exception:
+        pass
+
+
+# ========== 시간 코드 ==========
+
+def timecode_block(width):
+    """블록 한 칸의 크기(px): 해상도가 바뀌어도(적응형 화질) 같은 비율로 읽히도록 폭 기준"""
+    return max(4, width // 64)
+
+
+def encode_timecode(ms):
+    """epoch ms → 48비트 (MSB 먼저)"""
+    value = int(ms) & _TIMECODE_MASK
+    check = sum(value.to_bytes(5, "big")) & 0xFF
+    word = (value << 8) | check
+    return [(word >> (TIMECODE_BLOCKS - 1 - i)) & 1 for i in range(TIMECODE_BLOCKS)]
+
+
+def decode_timecode(bits):
+    """48비트 → epoch ms 하위 40비트 (체크섬이 안 맞으면 None)"""
+    word = 0
+    for b in bits:
+        word = (word << 1) | b
+    value, check = word >> 8, word & 0xFF
+    if sum(value.to_bytes(5, "big")) & 0xFF != check:
+        return None
+    return value
+
+
+def timecode_age_ms(value, now_ms):
+    """now_ms - value (40비트 랩어라운드 고려)"""
+    return ((int(now_ms) - value) & _TIMECODE_MASK) if value is not None else None
+
+
+# 형식별 (픽셀 간격, 밝기로 볼 바이트 위치): YUV는 Y, RGB 계열은 G 채널
+_LUMA_LAYOUT = {
+    **{f: (1, 0) for f in ("I420", "YV12", "NV12", "NV21", "Y42B", "Y444", "GRAY8")},
+    **{f: (4, 1) for f in ("RGBA", "BGRA", "RGBx", "BGRx")},
+    **{f: (4, 2) for f in ("ARGB", "ABGR", "xRGB", "xBGR")},
+    **{f: (3, 1) for f in ("RGB", "BGR")},
+    "YUY2": (2, 0), "UYVY": (2, 1),
+}
+
+
+class GlassProbe:
+    """싱크(또는 컴포지터 입력) 패드에서 시간 코드를 읽어 glass-to-glass 지연 집계
+
+    sync 싱크는 버퍼가 패드에 도착한 뒤 클록까지 기다렸다 그리므로 그 대기도 더한다.
+    NVMM/GL 메모리 프레임은 읽을 수 없어 측정하지 않는다.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self._sink = None        # 클록 대기 계산용 GstBaseSink (bin 싱크면 안쪽 요소)
+        self._layout = None      # (width, height, stride, pixel_stride, offset) 또는 False(측정 불가)
+        self._sum = 0.0
+        self._max = 0.0
+        self._n = 0
+
+    def attach(self, pad, sink=None):
+        if isinstance(sink, Gst.Bin):
+            sink = next(iter(sink.iterate_sinks()), None)
+        self._sink = sink if isinstance(sink, GstBase.BaseSink) else None
+        pad.add_probe(Gst.PadProbeType.BUFFER, self._on_buffer)
+
+    def sample(self):
+        """지난 호출 이후 (평균 ms, 최대 ms) 또는 None"""
+        n, total, peak = self._n, self._sum, self._max
+        self._n, self._sum, self._max = 0, 0.0, 0.0
+        return (total / n, peak) if n else None
+
+    def _read_layout(self, pad):
+        caps = pad.get_current_caps()
+        s = caps.get_structure(0) if caps else None
+        if not s or caps.get_features(0).contains("memory:NVMM") or \
+                caps.get_features(0).contains("memory:GLMemory"):
+            return False
+        fmt = s.get_value("format")
+        if fmt not in _LUMA_LAYOUT:
+            return False
+        info = GstVideo.VideoInfo.new_from_caps(caps)
+        pixel_stride, offset = _LUMA_LAYOUT[fmt]
+        return info.width, info.height, info.stride[0], pixel_stride, offset
+
+    def _on_buffer(self, pad, info):
+        if self._layout is None:
+            self._layout = self._read_layout(pad)
+            if not self._layout:
+                print(f"[LAT][{self.label}] 시스템 메모리 프레임이 아니라 glass-to-glass 측정 불가")
+        if not self._layout:
+            return Gst.PadProbeReturn.OK
+
+        buf = info.get_buffer()
+        ok, mapinfo = buf.map(Gst.MapFlags.READ)
+        if not ok:
+            return Gst.PadProbeReturn.OK
+        try:
+            width, _, stride, pixel_stride, offset = self._layout
+            block = timecode_block(width)
+            row = (block // 2) * stride
+            data = mapinfo.data
+            bits = [1 if data[row + (i * block + block // 2) * pixel_stride + offset] >= 128 else 0
+                    for i in range(TIMECODE_BLOCKS)]
+        finally:
+            buf.unmap(mapinfo)
+
+        age = timecode_age_ms(decode_timecode(bits), time.time() * 1000.0)
+        if age is None or age > 60_000:
+            return Gst.PadProbeReturn.OK   # 시간 코드가 없는 스트림
+        age += self._render_wait_ms(pad, buf)
+        self._sum += age
+        self._max = max(self._max, age)
+        self._n += 1
+        return Gst.PadProbeReturn.OK
+
+    def _render_wait_ms(self, pad, buf):
+        """sync 싱크가 이 버퍼를 그리기까지 남은 시간 (클록 기준)"""
+        sink = self._sink
+        if not sink or not sink.get_property("sync") or buf.pts == Gst.CLOCK_TIME_NONE:
+            return 0.0
+        clock = sink.get_clock()
+        event = pad.get_sticky_event(Gst.EventType.SEGMENT, 0)
+        if not clock or not event:
+            return 0.0
+        running = event.parse_segment().to_running_time(Gst.Format.TIME, buf.pts)
+        wait = sink.get_base_time() + running + sink.get_latency() - clock.get_time()
+        return max(wait, 0) / Gst.MSECOND
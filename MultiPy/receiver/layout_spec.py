@@ -0,0 +1,105 @@
+# layout_spec.py
+# 선언형 화면 배치: 행/열 그리드 + span + PiP 사각형 → 셀별 정규화 사각형
+#
+# screen/update 의 "layout" 값
+#   1 ~ 4                         기존 프리셋 (키보드 1~4와 동일)
+#   "3x3"                         rows×cols 균등 그리드
+#   {"rows": 3, "cols": 3,
+#    "cells": [[r, c, rs, cs], ...],   생략하면 행 우선으로 1×1 칸 rows*cols개
+#    "pip":   [[x, y, w, h], ...]}     그리드 위에 겹치는 사각형 (0.0~1.0, 나중 것이 위)
+# participants는 cells 순서, 이어서 pip 순서로 셀에 배정된다.
+
+from collections import namedtuple
+
+from config import LAYOUT_MAX_GRID, LAYOUT_MAX_TILES
+
+# grid: QGridLayout 위치 (row, col, rspan, cspan), PiP이면 None / z: 0=그리드, 1..=PiP 순서
+Tile = namedtuple("Tile", "x y w h z grid")
+
+# 기존 ReceiverWindow.apply_layout의 모드 1~4 배치 (2×2 그리드 기준)
+PRESETS = {
+    1: [(0, 0, 2, 2)],
+    2: [(0, 0, 2, 1), (0, 1, 2, 1)],
+    3: [(0, 0, 2, 1), (0, 1, 1, 1), (1, 1, 1, 1)],
+    4: [(0, 0, 1, 1), (0, 1, 1, 1), (1, 0, 1, 1), (1, 1, 1, 1)],
+}
+
+
+class LayoutSpec:
+    """셀 배치 한 벌 (tiles[i]가 i번째 셀)"""
+
+    __slots__ = ("rows", "cols", "tiles", "source")
+
+    def __init__(self, rows, cols, cells, pip=(), source=None, max_tiles=LAYOUT_MAX_TILES):
+        self.rows, self.cols = rows, cols
+        tiles = []
+        occupied = {}   # (row, col) -> 그 칸을 차지한 셀
+        for r, c, rs, cs in cells:
+            if not (0 <= r and 0 <= c and rs >= 1 and cs >= 1 and r + rs <= rows and c + cs <= cols):
+                raise ValueError(f"cell {(r, c, rs, cs)} outside {rows}x{cols} grid")
+            for slot in ((rr, cc) for rr in range(r, r + rs) for cc in range(c, c + cs)):
+                if slot in occupied:
+                    raise ValueError(f"cell {(r, c, rs, cs)} overlaps cell {occupied[slot]} at {slot}")
+                occupied[slot] = (r, c, rs, cs)
+            tiles.append(Tile(c / cols, r / rows, cs / cols, rs / rows, 0, (r, c, rs, cs)))
+        for i, (x, y, w, h) in enumerate(pip, start=1):
+            if not (0.0 <= x < 1.0 and 0.0 <= y < 1.0 and w > 0 and h > 0):
+                raise ValueError(f"pip rect {(x, y, w, h)} out of range")
+            tiles.append(Tile(x, y, min(w, 1.0 - x), min(h, 1.0 - y), i, None))
+        if max_tiles and len(tiles) > max_tiles:
+            raise ValueError(f"{len(tiles)} tiles > LAYOUT_MAX_TILES({LAYOUT_MAX_TILES})")
+        self.tiles = tuple(tiles)
+        self.source = source   # screen/request 응답에 그대로 돌려줄 원래 값
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __eq__(self, other):
+        return (isinstance(other, LayoutSpec) and
+                (self.rows, self.cols, self.tiles) == (other.rows, other.cols, other.tiles))
+
+    def __repr__(self):
+        return f"LayoutSpec({self.source!r}, tiles={len(self.tiles)})"
+
+
+def preset(mode: int) -> LayoutSpec:
+    return LayoutSpec(2, 2, PRESETS[mode], source=mode)
+
+
+def parse_layout(value, limits=True) -> LayoutSpec:
+    """screen/update의 layout 값 → LayoutSpec (잘못된 값은 ValueError)
+
+    limits=False: 행/열·셀 수 상한 검사 생략 (비디오 월 전역 캔버스, 조각마다 다시 검사)
+    """
+    if isinstance(value, LayoutSpec):
+        return value
+    if isinstance(value, bool):
+        raise ValueError(f"invalid layout {value!r}")
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        mode = int(value)
+        if mode not in PRESETS:
+            raise ValueError(f"unknown layout preset {mode}")
+        return preset(mode)
+    if isinstance(value, str):
+        rows, sep, cols = value.lower().partition("x")
+        if not sep:
+            raise ValueError(f"invalid layout {value!r}")
+        return _checked(int(rows), int(cols), None, (), value, limits)
+    if isinstance(value, dict):
+        rows, cols = int(value.get("rows", 1)), int(value.get("cols", 1))
+        cells = value.get("cells")
+        pip = [tuple(float(v) for v in rect) for rect in value.get("pip") or ()]
+        return _checked(rows, cols, cells, pip, value, limits)
+    raise ValueError(f"invalid layout {value!r}")
+
+
+def _checked(rows, cols, cells, pip, source, limits=True):
+    max_grid = LAYOUT_MAX_GRID if limits else float("inf")
+    if not (1 <= rows <= max_grid and 1 <= cols <= max_grid):
+        raise ValueError(f"grid {rows}x{cols} exceeds LAYOUT_MAX_GRID({LAYOUT_MAX_GRID})")
+    if cells is None:
+        cells = [(r, c, 1, 1) for r in range(rows) for c in range(cols)]
+    else:
+        cells = [tuple(int(v) for v in cell) for cell in cells]
+    return LayoutSpec(rows, cols, cells, pip, source=source,
+                      max_tiles=LAYOUT_MAX_TILES if limits else None)
@@ -21,6 +21,9 @@ from receiver_manager import MultiReceiverManager
 from glib_qt_integration import integrate_glib_into_qt
 from view_mode_manager import ViewModeManager 
 from mqtt_manager import MqttManager
+from gst_utils import probe_capabilities
+from metrics_server import MetricsServer
+from config import METRICS_HOST, METRICS_PORT
 
 # GStreamer 초기화
 Gst.init(None)
@@ -38,8 +41,11 @@ def main():
     ui.raise_()
     ui.setFocus()
     
+    # 디코더/싱크 능력 프로브 (1회, 모든 피어가 공유)
+    probe_capabilities()
+
     # GLib와 PyQt5 이벤트 루프 통합
-    _glib_timer = integrate_glib_into_qt()
+    glib_integration = integrate_glib_into_qt()
     
     view_manager = ViewModeManager(ui)   
 
@@ -50,6 +56,18 @@ def main():
     # Mqtt - MultiReceiverManager 양방향 연결
     mqtt_manager = MqttManager(receiver_manager=manager, view_mode_manager=view_manager)
     manager.mqtt_publisher = mqtt_manager  # MQTT 클라이언트 설정
+
+    # 메트릭 엔드포인트 (선택)
+    metrics = None
+    if METRICS_PORT:
+        metrics = MetricsServer(manager, METRICS_HOST, METRICS_PORT)
+        metrics.register_gauge("receiver_command_queue_depth", "Commands waiting for the main loop",
+                               manager.commands.depth)
+        metrics.register_gauge("receiver_command_queue_max_batch", "Largest batch drained in one wakeup",
+                               lambda: manager.commands.max_batch)
+        metrics.register_gauge("receiver_command_queue_coalesced", "Commands merged into a pending one",
+                               lambda: manager.commands.coalesced)
+        metrics.start()
     
     # 종료 핸들러 정의 및 연결
     def _quit(*_):
@@ -61,6 +79,9 @@ def main():
     
     ui.quitRequested.connect(_quit)
     app.aboutToQuit.connect(manager.stop)
+    app.aboutToQuit.connect(glib_integration.stop)
+    if metrics:
+        app.aboutToQuit.connect(metrics.stop)
     signal.signal(signal.SIGINT, _quit)
     signal.signal(signal.SIGTERM, _quit)
     
@@ -0,0 +1,171 @@
+# metrics_server.py
+# Prometheus 텍스트 형식 메트릭 HTTP 엔드포인트 (/metrics)
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gi.repository import GLib
+from PyQt5 import QtCore
+
+from stats import stats_registry
+from config import METRICS_LAG_INTERVAL_MS
+
+# (메트릭 이름, 통계 샘플 키, 설명)
+_SENDER_SAMPLE_METRICS = (
+    ("receiver_sender_fps", "fps", "Rendered frames per second"),
+    ("receiver_sender_drop_rate", "drop_rate", "Fraction of frames entering the decoder that were not rendered"),
+    ("receiver_sender_bitrate_mbps", "bitrate_mbps", "Received RTP bitrate in Mbit/s"),
+    ("receiver_sender_width", "width", "Rendered frame width in pixels"),
+    ("receiver_sender_height", "height", "Rendered frame height in pixels"),
+    ("receiver_sender_jitter_ms", "jitter_ms", "RTP interarrival jitter in milliseconds"),
+    ("receiver_sender_loss_rate", "loss_rate", "RTP packet loss fraction over the last interval"),
+    ("receiver_sender_decode_latency_ms", "decode_latency_ms", "Average decoder latency in milliseconds"),
+    ("receiver_sender_glass_latency_ms", "glass_latency_ms",
+     "Average capture-to-display latency from synthetic sender timecodes in milliseconds"),
+    ("receiver_sender_pli_count", "pli_count", "PLI requests sent to the sender (cumulative)"),
+)
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(v) -> str:
+    return repr(float(v))
+
+
+class LoopLagProbe:
+    """주기 타이머가 예정보다 얼마나 늦게 실행되는지로 이벤트 루프 지연 측정"""
+
+    def __init__(self, interval_ms=METRICS_LAG_INTERVAL_MS):
+        self.interval_s = interval_ms / 1000.0
+        self.last_lag_s = 0.0
+        self.max_lag_s = 0.0
+        self._expected = None
+
+    def _tick(self):
+        now = time.monotonic()
+        if self._expected is not None:
+            lag = max(now - self._expected, 0.0)
+            self.last_lag_s = lag
+            self.max_lag_s = max(self.max_lag_s, lag)
+        self._expected = now + self.interval_s
+        return True
+
+    def install_glib(self):
+        self._expected = time.monotonic() + self.interval_s
+        GLib.timeout_add(int(self.interval_s * 1000), self._tick)
+        return self
+
+    def install_qt(self, parent=None):
+        self._expected = time.monotonic() + self.interval_s
+        self._timer = QtCore.QTimer(parent)
+        self._timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self._timer.start(int(self.interval_s * 1000))
+        return self
+
+
+class MetricsServer:
+    """수신기 상태를 /metrics로 노출하는 로컬 HTTP 서버 (데몬 스레드)"""
+
+    def __init__(self, manager, host, port):
+        self.manager = manager
+        self.host, self.port = host, port
+        self._gauges = []  # (name, help, fn -> float|None)
+        self._httpd = None
+
+        self.glib_lag = LoopLagProbe().install_glib()
+        self.qt_lag = LoopLagProbe().install_qt()
+        self.register_gauge("receiver_glib_loop_lag_seconds",
+                            "GLib main loop timer lateness (last tick)", lambda: self.glib_lag.last_lag_s)
+        self.register_gauge("receiver_glib_loop_lag_max_seconds",
+                            "GLib main loop timer lateness (max since start)", lambda: self.glib_lag.max_lag_s)
+        self.register_gauge("receiver_qt_loop_lag_seconds",
+                            "Qt event loop timer lateness (last tick)", lambda: self.qt_lag.last_lag_s)
+        self.register_gauge("receiver_qt_loop_lag_max_seconds",
+                            "Qt event loop timer lateness (max since start)", lambda: self.qt_lag.max_lag_s)
+        self.register_gauge("receiver_senders", "Connected senders",
+                            lambda: len(self.manager.peers))
+
+    def register_gauge(self, name, help_text, fn):
+        """프로세스 단위 게이지 추가 (fn은 스크레이프 시점에 HTTP 스레드에서 호출)"""
+        self._gauges.append((name, help_text, fn))
+
+    def start(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = server.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # 스크레이프마다 콘솔 출력하지 않음
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]   # port 0이면 OS가 고른 포트
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        print(f"[METRICS] serving http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+            print("[METRICS] stopped")
+
+    # ========== 렌더링 ==========
+
+    def render(self) -> str:
+        lines = []
+        peers = list(self.manager.peers.items())
+        snapshot = stats_registry.snapshot()
+
+        def labels(sid, peer):
+            return f'sender_id="{_escape(sid)}",sender="{_escape(peer.sender_name)}"'
+
+        for name, key, help_text in _SENDER_SAMPLE_METRICS:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for sid, peer in peers:
+                v = snapshot.get(sid, {}).get(key)
+                if v is not None:
+                    lines.append(f"{name}{{{labels(sid, peer)}}} {_fmt(v)}")
+
+        per_peer = (
+            ("receiver_sender_ice_state", "ICE connection state (GstWebRTCICEConnectionState)", "ice_state"),
+            ("receiver_sender_time_to_first_frame_seconds", "Join to first rendered frame", "ttff_s"),
+            ("receiver_sender_negotiation_seconds", "Offer sent to remote answer applied", "negotiation_s"),
+            ("receiver_sender_switch_latency_seconds", "Cell assignment to first rendered frame (last switch)",
+             "switch_latency_s"),
+            ("receiver_sender_switches", "Cell assignments since join", "switch_count"),
+        )
+        for name, help_text, attr in per_peer:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for sid, peer in peers:
+                try:
+                    v = getattr(peer, attr)
+                except Exception:
+                    v = None
+                if v is not None:
+                    lines.append(f"{name}{{{labels(sid, peer)}}} {_fmt(v)}")
+
+        for name, help_text, fn in self._gauges:
+            try:
+                v = fn()
+            except Exception:
+                v = None
+            if v is None:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_fmt(v)}"]
+
+        return "\n".join(lines) + "\n"
@@ -1,21 +1,41 @@
 import json, paho.mqtt.client as mqtt
 from PyQt5 import QtCore
 
+from config import (MQTT_HOST, MQTT_PORT, WALL_ID, WALL_NODE, WALL_SLICE,
+                    WALL_SWITCH_LEAD_MS, WALL_READY_TIMEOUT_MS)
+from glib_qt_integration import run_in_qt
+from wall import WallCoordinator, parse_slice, slice_senders
+
 # 전역 변수로 receiver_manager 저장
 receiver_manager = None
 class MqttManager:
-    def __init__(self, receiver_manager=None, view_mode_manager=None, ip="localhost", port=1883):
+    def __init__(self, receiver_manager=None, view_mode_manager=None, ip=MQTT_HOST, port=MQTT_PORT):
+        self.receiver_manager = receiver_manager
+        self.view_mode_manager = view_mode_manager
+
+        # 비디오 월: screen/update는 월 합의를 거쳐 자기 조각만 적용
+        self.wall = None
+        if WALL_ID:
+            self.wall_topic = f"wall/{WALL_ID}"
+            self.wall = WallCoordinator(WALL_NODE, parse_slice(WALL_SLICE), self._wall_publish,
+                                        self._wall_prepare, self._wall_commit,
+                                        lead_ms=WALL_SWITCH_LEAD_MS,
+                                        ready_timeout_ms=WALL_READY_TIMEOUT_MS)
+            print(f"[WALL] {WALL_ID}: node={WALL_NODE} slice={self.wall.slice}")
+
         self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
         self.client.on_connect = self._on_connect
         self.client.on_message = self._on_message
         self.client.connect(ip, port)
         self.client.loop_start()
-        self.receiver_manager = receiver_manager
-        self.view_mode_manager = view_mode_manager
+        if self.wall:
+            self.wall.start()
         
     # ---------- MQTT 중단 ----------
     def stop(self):
         """MQTT 클라이언트 종료"""
+        if self.wall:
+            self.wall.stop()
         self.client.loop_stop()
         self.client.disconnect()
         
@@ -39,16 +59,60 @@ class MqttManager:
         """MQTT 메시지 발행"""
         self.client.publish(topic, payload)
 
+    # ---------- 비디오 월 ----------
+    def _wall_publish(self, kind, payload):
+        self.publish(f"{self.wall_topic}/{kind}", json.dumps(payload))
+
+    def _wall_prepare(self, local_data, done):
+        """조각에 들어갈 sender 디코드 예열 후 ready"""
+        if self.receiver_manager:
+            self.receiver_manager.prepare_senders(slice_senders(local_data), done)
+        else:
+            done()
+
+    def _wall_commit(self, local_data, global_data):
+        def _apply():
+            if self.view_mode_manager:
+                self.view_mode_manager.apply_layout_data(local_data)
+            if self.receiver_manager:
+                self.receiver_manager.end_prewarm()
+        run_in_qt(_apply)
+
+    def _answers_admin(self):
+        """월에서는 리더 한 대만 관리자 요청에 응답"""
+        return not self.wall or self.wall.is_leader()
+
     # ---------- 콜백 ----------
     def _on_connect(self, client, userdata, flag, rc, prop=None):
         client.subscribe("participant/request") # "participant/request" 토픽으로 구독, 참여자 목록 요청 
         client.subscribe("screen/request") # "screen/request" 토픽으로 구독, 화면 상태 요청
         client.subscribe("screen/update") # "screen/update" 토픽으로 구독, 관리자의 화면 배치 정보 수신
+        if self.wall:
+            client.subscribe(f"{self.wall_topic}/+")  # 월 합의 (hello/prepare/ready/commit)
+        client.subscribe("record/update") # "record/update" 토픽으로 구독, 녹화 시작/중지 {"action": "start"|"stop", "senders": [id, ...]}
+        client.subscribe("record/request") # "record/request" 토픽으로 구독, 녹화 상태 요청
+        client.subscribe("program/update") # "program/update" 토픽으로 구독, 프로그램 출력 {"action": "start", "output": "srt://..."} | {"action": "stop"}
+        client.subscribe("program/request") # "program/request" 토픽으로 구독, 프로그램 출력 상태 요청
+        client.subscribe("latency/update") # "latency/update" 토픽으로 구독, 지연 프로파일 전환 {"profile": "low"|"smooth", "senders": [id, ...]}
+        client.subscribe("latency/request") # "latency/request" 토픽으로 구독, 지연 프로파일 상태 요청
 
     def _on_message(self, client, userdata, msg):
+        if self.wall and msg.topic.startswith(self.wall_topic + "/"):
+            try:
+                self.wall.handle(msg.topic.rsplit("/", 1)[1], json.loads(msg.payload.decode()))
+            except Exception as e:
+                print(f"[WALL] {msg.topic} 처리 중 오류: {e}")
+            return
+
         print(f"Topic: {msg.topic}")        # 토픽 확인
         print(f"Message: {msg.payload.decode()}")  # 메시지 내용 확인
     
+        # 월에서는 모든 노드가 같은 sender를 받으므로 녹화/프로그램 출력도 리더 한 대만
+        if (msg.topic in ("participant/request", "screen/request", "record/update", "record/request",
+                          "program/update", "program/request", "latency/request")
+                and not self._answers_admin()):
+            return
+
         if msg.topic == "participant/request":
             print(f"관리자가 사용자 목록을 요청합니다.")
 
@@ -60,11 +124,33 @@ class MqttManager:
             current_screen_info = self._get_current_screen_info()
             self.publish("screen/response", json.dumps(current_screen_info))
         
+        elif msg.topic in ("record/update", "record/request"):
+            try:
+                self._on_record_message(msg.topic, msg.payload)
+            except Exception as e:
+                print(f"[ERROR] {msg.topic} 처리 중 오류: {e}")
+
+        elif msg.topic in ("program/update", "program/request"):
+            try:
+                self._on_program_message(msg.topic, msg.payload)
+            except Exception as e:
+                print(f"[ERROR] {msg.topic} 처리 중 오류: {e}")
+
+        elif msg.topic in ("latency/update", "latency/request"):
+            try:
+                self._on_latency_message(msg.topic, msg.payload)
+            except Exception as e:
+                print(f"[ERROR] {msg.topic} 처리 중 오류: {e}")
+
         elif msg.topic == "screen/update":
             print(f"관리자로부터 화면 배치 변경 요청을 받았습니다.")
             try:
                 layout_data = json.loads(msg.payload.decode())
                 print(f"받은 화면 배치 데이터: {layout_data}")
+
+                if self.wall:
+                    self.wall.submit(layout_data)   # 리더만 prepare 시작
+                    return
         
                 from PyQt5 import QtCore
         
@@ -85,10 +171,69 @@ class MqttManager:
                 import traceback
                 traceback.print_exc()
 
+    def _on_record_message(self, topic, payload):
+        """record/update: 녹화 시작/중지 (senders 생략 시 전체) / record/request: 상태 응답"""
+        if not self.receiver_manager:
+            return
+        if topic == "record/update":
+            data = json.loads(payload.decode() or "{}")
+            action, senders = data.get("action"), data.get("senders")
+            # 변경은 GLib 루프에서 적용되므로 응답도 적용 뒤에 (done)
+            if action == "start":
+                self.receiver_manager.start_recording(senders, done=self._publish_record_status)
+            elif action == "stop":
+                self.receiver_manager.stop_recording(senders, done=self._publish_record_status)
+            else:
+                print(f"[ERROR] record/update: 알 수 없는 action {action!r}")
+            return
+        self._publish_record_status()
+
+    def _publish_record_status(self):
+        self.publish("record/response", json.dumps(self.receiver_manager.recording_status()))
+
+    def _on_program_message(self, topic, payload):
+        """program/update: 프로그램 출력 시작/중지 / program/request: 상태 응답"""
+        if not self.receiver_manager:
+            return
+        if topic == "program/update":
+            data = json.loads(payload.decode() or "{}")
+            action = data.get("action")
+            if action == "start" and data.get("output"):
+                self.receiver_manager.start_program(data["output"], done=self._publish_program_status)
+            elif action == "stop":
+                self.receiver_manager.stop_program(done=self._publish_program_status)
+            else:
+                print(f"[ERROR] program/update: 잘못된 요청 {data!r}")
+            return
+        self._publish_program_status()
+
+    def _publish_program_status(self):
+        self.publish("program/response", json.dumps(self.receiver_manager.program_status()))
+
+    def _on_latency_message(self, topic, payload):
+        """latency/update: 지연 프로파일 전환 (senders 생략 시 기본값 + 전체) / latency/request: 상태 응답
+
+        월에서는 노드마다 자기 피어가 있으므로 update는 모든 노드가, 응답은 리더만 한다.
+        """
+        if not self.receiver_manager:
+            return
+        if topic == "latency/update":
+            data = json.loads(payload.decode() or "{}")
+            done = self._publish_latency_status if self._answers_admin() else None
+            self.receiver_manager.set_latency_profile(data.get("profile"), data.get("senders"), done=done)
+            return
+        self._publish_latency_status()
+
+    def _publish_latency_status(self):
+        self.publish("latency/response", json.dumps(self.receiver_manager.latency_status()))
+
     # 현재 화면 정보 가져오기 (screen/request 처리용)
     def _get_current_screen_info(self):
         """현재 화면 배치 정보 반환"""
         try:
+            if self.wall:
+                # 월은 조각이 아닌 전역 배치를 돌려준다
+                return self.wall.layout_data or {"layout": 1, "participants": []}
             if not self.view_mode_manager:
                 return {"layout": 1, "participants": []}
         
@@ -0,0 +1,79 @@
+# peer_pool.py
+# 미리 준비해 둔 PeerReceiver 워밍 풀
+
+import threading
+from gi.repository import GLib
+
+
+class PeerPool:
+    """PLAYING 상태 + RECVONLY transceiver + offer까지 준비된 미바인딩 PeerReceiver 풀
+
+    sender가 입장하면 acquire()로 즉시 하나를 꺼내 bind()하고,
+    빈 자리는 GLib 메인 루프 idle에서 하나씩 백그라운드로 다시 채운다.
+    """
+
+    def __init__(self, size: int, factory):
+        """
+        Args:
+            size: 유지할 워밍 피어 수
+            factory: () -> 미바인딩 PeerReceiver
+        """
+        self.size = size
+        self._factory = factory
+        self._idle = []
+        self._lock = threading.Lock()
+        self._refill_scheduled = False
+        self._stopped = False
+
+    def start(self):
+        self._schedule_refill()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            idle, self._idle = self._idle, []
+        for peer in idle:
+            try:
+                peer.stop()
+            except Exception:
+                pass
+
+    def available(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def acquire(self, sender_id: str, sender_name: str, on_down=None):
+        """워밍 피어 하나를 sender에 바인딩해 반환 (풀이 비었으면 None)"""
+        with self._lock:
+            peer = self._idle.pop(0) if self._idle else None
+        self._schedule_refill()
+        if peer:
+            peer.bind(sender_id, sender_name, on_down=on_down)
+        return peer
+
+    def _schedule_refill(self):
+        with self._lock:
+            if self._refill_scheduled or self._stopped:
+                return
+            self._refill_scheduled = True
+        GLib.idle_add(self._refill)
+
+    def _refill(self):
+        # 한 번에 하나씩만 만들어 메인 루프를 오래 막지 않음
+        with self._lock:
+            need = self.size - len(self._idle)
+            if need <= 0 or self._stopped:
+                self._refill_scheduled = False
+                return False
+        try:
+            peer = self._factory()
+            peer.start()
+        except Exception as e:
+            print("[POOL] warm peer 생성 실패:", e)
+            with self._lock:
+                self._refill_scheduled = False
+            return False
+        with self._lock:
+            self._idle.append(peer)
+            print(f"[POOL] warm peers: {len(self._idle)}/{self.size}")
+        return True  # 다음 idle에서 계속 채움
@@ -1,7 +1,7 @@
 # peer_receiver.py
 # WebRTC 피어 수신기 클래스
 
-import gi, json
+import gi, json, itertools, threading, time
 
 gi.require_version('Gst', '1.0')
 gi.require_version('GstWebRTC', '1.0')
@@ -10,27 +10,42 @@ gi.require_version('GstVideo', '1.0')
 
 from gi.repository import Gst, GstWebRTC, GstSdp, GLib, GstVideo
 from PyQt5 import QtCore
-from gst_utils import _make, get_decoder_and_sink
-from config import STUN_SERVER, GST_VIDEO_CAPS, UI_OVERLAY_DELAY_MS, ICE_STATE_CHECK_DELAY_MS
-import time, sys
+from gst_utils import _make, get_capabilities
+from pipeline_builder import build_decode_branch, PROFILE_JETSON
+from video_codecs import codec_from_caps, transceiver_caps
+from recorder import RecordBranch
+from program_out import ProgramTap
+import latency
+import simulcast
+from stats import stats_registry, parse_inbound_rtp
+from signal_codec import emit_signal
+from config import (STUN_SERVER, UI_OVERLAY_DELAY_MS, ICE_STATE_CHECK_DELAY_MS,
+                    STATS_INTERVAL_MS, STATS_LOG, KEYFRAME_MIN_INTERVAL_MS, DECODE_SINK,
+                    CANDIDATE_BATCH_MS, LATENCY_PROFILE, LATENCY_PROBE,
+                    SIMULCAST_ENABLED)
+
+_pipeline_seq = itertools.count()
+
 
 class PeerReceiver:
     """WebRTC 피어 연결을 관리하는 수신기 클래스"""
     
     def __init__(self, sio, sender_id, sender_name, ui_window,
-                 on_ready=None, on_down=None):
+                 on_ready=None, on_down=None, compositor=None, features=None):
         """
         Args:
             sio: Socket.IO 클라이언트 인스턴스
-            sender_id: Sender의 고유 ID
+            sender_id: Sender의 고유 ID (None이면 워밍 풀용 미바인딩 피어, bind()로 연결)
             sender_name: Sender의 표시 이름
             ui_window: UI 윈도우 인스턴스
             on_ready: (더 이상 사용하지 않음) 전환 완료 콜백
             on_down: 연결 종료 콜백 함수 (sender_id, reason)
+            compositor: 공유 컴포지터 (None이면 sender별 독립 파이프라인)
+            features: 시그널링 서버가 지원하는 선택 기능 집합 (매니저와 공유, join ack 후 채워짐)
         """
         self.sio = sio
         self.sender_id = sender_id
-        self.sender_name = sender_name
+        self.sender_name = sender_name or sender_id or "(warm)"
         self.ui = ui_window
         self.current_fps = 0.0
         self.drop_rate = 0.0
@@ -39,6 +54,10 @@ class PeerReceiver:
         # 콜백
         self._on_ready = on_ready  # 현재는 호출하지 않음
         self._on_down = on_down
+
+        # 공유 컴포지터 모드에서는 파이프라인을 공유하고 자신의 요소만 관리
+        self._compositor = compositor
+        self._elements = []
         
         # WebRTC 연결 상태 플래그들
         self._gst_playing = False
@@ -48,54 +67,115 @@ class PeerReceiver:
         self._transceivers = []
         self._transceivers_added = False
 
+        # 시그널링 (미바인딩 동안 offer/ICE 후보 보류)
+        self._signal_lock = threading.Lock()
+        self._offer_sent = False
+        self._local_desc_set = False   # set-local-description 완료 후에만 offer 전송
+        self._pending_local_candidates = []
+        self._features = features if features is not None else set()
+        self._outgoing_candidates = []   # 묶음 전송 대기
+        self._flush_scheduled = False
+        self._gathering_done = False
+        self._end_sent = False
+
         # 렌더링 관련
-        self._display_bin = None
-        self._visible = True
+        self._branch = None        # DecodeBranch (pipeline_builder)
+        self._visible = False      # 셀에 배치된 경우에만 디코드 (set_visible)
         self._winid = None
+
+        # 녹화 (recorder.py): 요청 상태와 현재 녹화 브랜치 (스트림 연결 전 요청이면 연결 후 시작)
+        self._record_wanted = False
+        self._record = None
+
+        # 프로그램 출력 (program_out.py, 네이티브 창 모드): 디코드된 프레임을 프로그램 믹서로 분기
+        self._program_wanted = False
+        self._program_tap = None
+
+        # 지연 프로파일 (latency.py): 지터 버퍼는 webrtcbin 생성 시, 싱크 동기화는 스트림 연결 시 적용
+        self.latency_profile = LATENCY_PROFILE
+        self._glass = latency.GlassProbe(sender_name or "pool") if LATENCY_PROBE else None
+
+        # 사이멀캐스트 (simulcast.py): offer에 덧붙인 extmap, sender가 받아들인 rid (빈 튜플이면 단일 층)
+        self._simulcast_exts = ()
+        self.simulcast_rids = ()
+        self._layer_funnel = None   # 층별 SSRC 패드 → 디코드 브랜치 (사이멀캐스트일 때만)
         
         # 공유 상태 플래그 (sender-share-started/stopped로 갱신)
         self.share_active = True
 
-        # 통계 관련 상태
-        self._byte_accum = 0
-        self._last_ts = time.time()
-        self._bitrate_mbps = 0.0
+        # 통계 관련 상태 (stats.stats_registry로 조회)
+        self.stats = stats_registry.register(sender_id) if sender_id else None
         self._width = None
         self._height = None
 
+        # 타이밍 (메트릭: 첫 프레임까지 시간, 협상 시간)
+        self._t_joined = time.monotonic() if sender_id else None
+        self._t_offer_sent = None
+        self.negotiation_s = None
+
+        # 셀 전환 (배정 → 첫 렌더 프레임) 지연
+        self._t_keyframe_req = 0.0
+        self._t_switch = None
+        self._switch_done = None   # 스트리밍 스레드가 기록, stats tick이 수거
+        self.switch_latency_s = None
+        self.switch_count = 0
+
         # GStreamer 파이프라인 초기화
         self._setup_pipeline()
 
-        # 1초 주기 통계 tick
-        GLib.timeout_add(1000, self._stats_tick)
+        # 주기 통계 tick
+        self._stats_timer = GLib.timeout_add(STATS_INTERVAL_MS, self._stats_tick)
 
     def _stats_tick(self):
+        if not self.stats or not self._branch:
+            return True  # 워밍 풀 피어/스트림 연결 전에는 통계 없음
+        # 네트워크 통계는 webrtcbin get-stats 프로미스로 비동기 수집
+        p = Gst.Promise.new_with_change_func(self._on_webrtc_stats, None)
+        self.webrtc.emit('get-stats', None, p)
+        return True  # 타이머 계속 반복
+
+    def _on_webrtc_stats(self, promise, _):
+        """get-stats 응답 + 패드 프로브 카운터 → 통계 링버퍼에 샘플 1개 추가"""
         try:
-            # 해상도 가져오기
-            if self._display_bin:
-                sink = self._display_bin.get_property("video-sink")
-                if sink:
-                    pad = sink.get_static_pad("sink")
-                    if pad:
-                        caps = pad.get_current_caps()
-                        if caps:
-                            s = caps.get_structure(0)
-                            self.width = s.get_value("width")
-                            self.height = s.get_value("height")
-
-            # Mbps 계산 (bitrate는 on_incoming_stream에서 identity나 rtpjitterbuffer 활용 가능)
-            mbps = self.bitrate / 1e6 if hasattr(self, "bitrate") else 0.0
-
-            print(f"[STATS][{self.sender_name}] "
-                f"FPS={self.current_fps:.2f}, "
-                f"drop={self.drop_rate:.2f}, "
-                f"avg={self.avg_fps:.2f}, "
-                f"Mbps={mbps:.2f}, "
-                f"res={getattr(self, 'width', '?')}x{getattr(self, 'height', '?')}")
+            branch = self._branch
+            if not branch or not self.stats:
+                return
+            inbound = parse_inbound_rtp(promise.get_reply())
+            self.current_fps, self.drop_rate, self.avg_fps = branch.frames.sample()
+            self._width, self._height = branch.resolution()
+            switch = {}
+            if self._switch_done is not None:
+                switch["switch_latency_ms"] = self._switch_done * 1000.0
+                self._switch_done = None
+            glass = self._glass.sample() if self._glass else None
+            if glass:
+                switch["glass_latency_ms"], switch["glass_latency_max_ms"] = glass
+            sample = self.stats.update(
+                inbound,
+                fps=self.current_fps, avg_fps=self.avg_fps, drop_rate=self.drop_rate,
+                width=self._width, height=self._height,
+                decode_latency_ms=branch.frames.decode_latency_ms(),
+                **switch,
+            )
+            if STATS_LOG:
+                print(f"[STATS][{self.sender_name}] FPS={self.current_fps:.2f}, "
+                      f"drop={self.drop_rate:.2f}, Mbps={sample.get('bitrate_mbps', 0.0):.2f}, "
+                      f"res={self._width}x{self._height}")
         except Exception as e:
-            print(f"[STATS][{self.sender_name}] stats_tick error:", e)
+            print(f"[STATS][{self.sender_name}] stats error:", e)
 
-        return True  # 타이머 계속 반복
+    @property
+    def ice_state(self):
+        """ICE 연결 상태 (GstWebRTCICEConnectionState 정수)"""
+        return int(self.webrtc.get_property('ice-connection-state'))
+
+    @property
+    def ttff_s(self):
+        """sender 연결 시점부터 첫 프레임 렌더까지 걸린 시간 (초)"""
+        first = self._branch.frames.first_frame_ts if self._branch else None
+        if first is None or self._t_joined is None:
+            return None
+        return max(first - self._t_joined, 0.0)
 
     def update_window_from_widget(self, w):
         try:
@@ -111,25 +191,33 @@ class PeerReceiver:
 
     def _setup_pipeline(self):
         """GStreamer 파이프라인 초기화"""
-        self.pipeline = Gst.Pipeline.new(f"webrtc-pipeline-{self.sender_id}")
+        if self._compositor:
+            self.pipeline = self._compositor.pipeline
+        else:
+            self.pipeline = Gst.Pipeline.new(f"webrtc-pipeline-{next(_pipeline_seq)}")
         self.webrtc = _make("webrtcbin")
         
         if not self.webrtc:
             raise RuntimeError("webrtcbin 생성 실패")
 
         self.pipeline.add(self.webrtc)
-        self.webrtc.set_property('stun-server', STUN_SERVER)
+        self._elements.append(self.webrtc)
+        if STUN_SERVER:
+            self.webrtc.set_property('stun-server', STUN_SERVER)
+        latency.apply_jitterbuffer(self.webrtc, latency.resolve_profile(self.latency_profile))
 
         # WebRTC 이벤트 연결
         self._connect_webrtc_signals()
         
-        # 버스 설정
-        self._setup_bus()
+        # 버스 설정 (공유 파이프라인의 버스는 컴포지터가 관리)
+        if not self._compositor:
+            self._setup_bus()
 
     def _connect_webrtc_signals(self):
         """WebRTC 관련 시그널 연결"""
         self.webrtc.connect('notify::ice-connection-state', self._on_ice_conn_change)
         self.webrtc.connect('on-ice-candidate', self.on_ice_candidate)
+        self.webrtc.connect('notify::ice-gathering-state', self._on_gathering_state)
         self.webrtc.connect('pad-added', self.on_incoming_stream)
         self.webrtc.connect('on-negotiation-needed', self._on_negotiation_needed)
 
@@ -152,6 +240,8 @@ class PeerReceiver:
     
     def prepare_window_handle(self):
         """윈도우 핸들 준비"""
+        if self._compositor:
+            return False  # 컴포지터 모드는 sender별 네이티브 창을 쓰지 않음
         try:
             w = self.ui.ensure_widget(self.sender_id, self.sender_name)
             w.setAttribute(QtCore.Qt.WA_NativeWindow, True)
@@ -164,8 +254,8 @@ class PeerReceiver:
     def _force_overlay_handle(self):
         """오버레이 핸들 강제 재설정"""
         try:
-            if self._winid and self._display_bin:
-                sink = self._display_bin.get_property("video-sink")
+            if self._winid and self._branch:
+                sink = self._branch.sink
                 if sink:
                     GstVideo.VideoOverlay.set_window_handle(sink, self._winid)
                     print(f"[UI][{self.sender_name}] overlay rebind (0x{self._winid:x})")
@@ -189,11 +279,39 @@ class PeerReceiver:
     
     def start(self):
         """파이프라인 시작"""
+        if self._compositor:
+            # 공유 파이프라인은 이미 PLAYING → 자신의 요소만 상태 동기화
+            self.webrtc.sync_state_with_parent()
+            self._gst_playing = True
+            print(f"[GST][{self.sender_name}] joined shared pipeline")
+            self._ensure_transceivers()
+            return
         ret = self.pipeline.set_state(Gst.State.PLAYING)
         print(f"[GST][{self.sender_name}] set_state ->", ret.value_nick)
 
     def stop(self):
         """파이프라인 완전 정지"""
+        if self._stats_timer:
+            GLib.source_remove(self._stats_timer)
+            self._stats_timer = 0
+        if self.sender_id:
+            stats_registry.unregister(self.sender_id)
+        if self._record:
+            self._record.close_now()
+            self._record = None
+        if self._program_tap:
+            self._program_tap.close_now()
+            self._program_tap = None
+        if self._compositor:
+            self._compositor.detach_branch(self.sender_id)
+            for e in reversed(self._elements):
+                try:
+                    e.set_state(Gst.State.NULL)
+                    self.pipeline.remove(e)
+                except Exception:
+                    pass
+            self._elements.clear()
+            return
         try:
             self.pipeline.set_state(Gst.State.NULL)
         except:
@@ -202,6 +320,8 @@ class PeerReceiver:
     def pause_pipeline(self):
         """공유 중지 시 파이프라인 일시정지"""
         # NOTE: ALWAYS_PLAYING 옵션은 외부 config에 둘 수 있음
+        if self._compositor:
+            return  # 공유 파이프라인을 멈추면 다른 sender도 멈춘다
         try:
             self.pipeline.set_state(Gst.State.PAUSED)
             print(f"[GST][{self.sender_name}] → PAUSED (share stopped)")
@@ -211,6 +331,8 @@ class PeerReceiver:
     def resume_pipeline(self):
         """공유 재개 시 파이프라인 재생"""
         self.share_active = True
+        if self._compositor:
+            return
         try:
             self.pipeline.set_state(Gst.State.PLAYING)
             print(f"[GST][{self.sender_name}] → PLAYING (share started)")
@@ -218,6 +340,116 @@ class PeerReceiver:
         except Exception as e:
             print(f"[GST][{self.sender_name}] resume err:", e)
 
+    def set_visible(self, visible: bool):
+        """셀 배치 여부에 따라 디코드 on/off (RTP 세션과 ICE는 유지)"""
+        if visible == self._visible:
+            return
+        self._visible = visible
+        if self._branch:
+            self._branch.set_decoding(visible)
+            if visible:
+                # 다음 자연 IDR을 기다리지 않도록 즉시 키프레임 요청
+                self.request_keyframe(force=True)
+        print(f"[GST][{self.sender_name}] decode {'ON' if visible else 'OFF (hidden)'}")
+
+    # ========== 녹화 ==========
+
+    @property
+    def recording(self):
+        return self._record is not None
+
+    def start_recording(self):
+        """디코드 전 H.264 분할 MP4 녹화 시작 (스트림이 아직 없으면 연결되는 대로)"""
+        self._record_wanted = True
+        if self._record or not self._branch:
+            return
+        if not self._branch.tee:
+            print(f"[REC][{self.sender_name}] RECORD_ENABLED=False → 녹화 불가")
+            return
+        rec = RecordBranch(self.sender_name, self._branch.codec)
+        if rec.attach(self.pipeline, self._branch.tee):
+            self._record = rec
+
+    def stop_recording(self):
+        self._record_wanted = False
+        rec, self._record = self._record, None
+        if rec:
+            rec.stop()
+
+    # ========== 프로그램 출력 ==========
+
+    def start_program_tap(self):
+        """디코드된 프레임을 intervideosink(program-<sid>)로 분기 (스트림이 아직 없으면 연결되는 대로)
+
+        컴포지터 모드는 공유 컴포지터 출력을 그대로 인코딩하므로 분기할 필요가 없다.
+        """
+        self._program_wanted = True
+        if self._program_tap or not self._branch or not self._branch.raw_tee:
+            return
+        tap = ProgramTap(self.sender_id, nvmm=self._branch.profile == PROFILE_JETSON)
+        if tap.attach(self.pipeline, self._branch.raw_tee):
+            self._program_tap = tap
+
+    def stop_program_tap(self):
+        self._program_wanted = False
+        tap, self._program_tap = self._program_tap, None
+        if tap:
+            tap.close_now()
+
+    # ========== 지연 프로파일 ==========
+
+    def set_latency_profile(self, name):
+        """지터 버퍼/싱크 동기화 전환 (재협상 없이 실행 중 적용, GLib 루프에서)"""
+        profile = latency.resolve_profile(name)
+        self.latency_profile = name
+        latency.apply_jitterbuffer(self.webrtc, profile)
+        if self._branch:
+            latency.apply_sink(self._branch.sink, profile)
+        print(f"[GST][{self.sender_name}] latency profile → {name} "
+              f"({profile['latency_ms']} ms, sync={profile['sync']})")
+
+    # ========== 키프레임 요청 / 셀 전환 측정 ==========
+
+    def request_keyframe(self, force=False):
+        """sender에 키프레임 요청 (webrtcbin이 RTCP PLI로 전송)
+
+        연속 전환 시 PLI 폭주를 막기 위해 KEYFRAME_MIN_INTERVAL_MS 안의 재요청은 무시한다.
+        force=True는 디코드를 막 재개해 키프레임이 반드시 필요한 경우에만 사용한다.
+        Returns:
+            실제로 요청을 보냈으면 True
+        """
+        if not self._branch:
+            return False
+        now = time.monotonic()
+        if not force and (now - self._t_keyframe_req) * 1000.0 < KEYFRAME_MIN_INTERVAL_MS:
+            return False
+        self._t_keyframe_req = now
+        ok = self._branch.request_keyframe()
+        if not ok:
+            print(f"[RTC][{self.sender_name}] keyframe request not handled upstream")
+        return ok
+
+    def begin_switch(self):
+        """셀 (재)배정 시점: 디코드 on + 키프레임 요청 + 첫 렌더 프레임까지 시간 측정 시작"""
+        self._t_switch = time.monotonic()
+        if not self._branch:
+            return  # 스트림 연결 시 on_incoming_stream에서 이어서 측정
+        self._branch.on_next_frame(self._on_switch_frame)
+        if self._visible:
+            self.request_keyframe()
+        else:
+            self.set_visible(True)  # 켜기는 즉시 (끄기만 가시성 스케줄러가 지연)
+
+    def _on_switch_frame(self):
+        t0, self._t_switch = self._t_switch, None
+        if t0 is None:
+            return
+        self.switch_latency_s = time.monotonic() - t0
+        self._switch_done = self.switch_latency_s
+        self.switch_count += 1
+        print(f"[SWITCH][{self.sender_name}] first frame after "
+              f"{self.switch_latency_s * 1000.0:.0f} ms")
+
     # ========== GStreamer 이벤트 핸들러들 ==========
     
     def _on_state_changed(self, bus, msg):
@@ -274,7 +506,8 @@ class PeerReceiver:
         """Transceiver 생성 보장"""
         if self._transceivers_added:
             return
-        self._add_recv(GST_VIDEO_CAPS)
+        # 디코드 가능한 코덱 전부를 디코드 비용 순으로 (sender는 offer 순서대로 고른다)
+        self._add_recv(transceiver_caps(get_capabilities().order))
         self._transceivers_added = True
 
     def _on_negotiation_needed(self, element, *args):
@@ -300,52 +533,173 @@ class PeerReceiver:
         if not reply: self._negotiating=False; return
         offer = reply.get_value('offer')
         if not offer: self._negotiating=False; return
-        self._pending_offer_sdp = offer.sdp.as_text()
+        sdp_text = offer.sdp.as_text()
+        if SIMULCAST_ENABLED:
+            # 시그널링으로 보낼 텍스트에만 rid 층 광고 (로컬 description은 단일 스트림 그대로)
+            sdp_text, self._simulcast_exts = simulcast.offer_with_layers(sdp_text)
+        with self._signal_lock:
+            self._pending_offer_sdp = sdp_text
+            self._offer_sent = False
+            self._local_desc_set = False
         p2 = Gst.Promise.new_with_change_func(self._on_local_desc_set, element)
         element.emit('set-local-description', offer, p2)
 
     def _on_local_desc_set(self, promise, element):
         """로컬 SDP 설정 완료 핸들러"""
         print(f"[RTC][{self.sender_name}] Local description set (offer)")
-        if self._gst_playing and self.sender_id:
+        with self._signal_lock:
+            self._local_desc_set = True
+        # sender_id는 bind()와 경합하므로 _send_offer가 잠금 안에서 확인
+        if self._gst_playing:
             self._send_offer()
         self._negotiating = False
  
     def _send_offer(self):
         """시그널링 서버로 Offer 전송"""
-        if not self._pending_offer_sdp:
-            return
-        self.sio.emit('signal', {
-            'to': self.sender_id,
+        with self._signal_lock:
+            if not (self._pending_offer_sdp and self._local_desc_set and self.sender_id) \
+                    or self._offer_sent:
+                return
+            self._offer_sent = True
+            self._t_offer_sent = time.monotonic()
+            to, sdp_text, name = self.sender_id, self._pending_offer_sdp, self.sender_name
+        emit_signal(self.sio, self._features, {
+            'to': to,
             'from': self.sio.sid,
             'type': 'offer',
-            'payload': {'type': 'offer', 'sdp': self._pending_offer_sdp}
+            'payload': {'type': 'offer', 'sdp': sdp_text}
         })
-        print(f'[SIO][{self.sender_name}] offer 전송 → {self.sender_id}')
+        print(f'[SIO][{name}] offer 전송 → {to}')
+
+    def bind(self, sender_id, sender_name, on_down=None):
+        """워밍 풀 피어를 sender에 연결하고 준비된 offer/ICE 후보를 즉시 전송"""
+        with self._signal_lock:
+            self.sender_id = sender_id
+            self.sender_name = sender_name or sender_id
+            pending, self._pending_local_candidates = self._pending_local_candidates, []
+        self.stats = stats_registry.register(sender_id)
+        self._t_joined = time.monotonic()
+        if on_down:
+            self._on_down = on_down
+        print(f"[RTC][{self.sender_name}] warm peer bound (offer ready={bool(self._pending_offer_sdp)})")
+
+        if self._gst_playing:
+            self._send_offer()   # 로컬 description이 아직이면 _on_local_desc_set에서 전송
+        for mline, cand in pending:
+            self.on_ice_candidate(self.webrtc, mline, cand)
+        if self._batch_candidates():
+            self._flush_candidates()  # 풀에서 이미 수집이 끝났으면 end-of-candidates까지
 
     def apply_remote_answer(self, sdp_text: str):
         """원격 Answer SDP 적용"""
+        if SIMULCAST_ENABLED:
+            sdp_text, self.simulcast_rids = simulcast.strip_answer(sdp_text, self._simulcast_exts)
+            if self.simulcast_rids:
+                print(f"[RTC][{self.sender_name}] simulcast layers: {', '.join(self.simulcast_rids)}")
         ok, sdpmsg = GstSdp.SDPMessage.new()
         if ok != GstSdp.SDPResult.OK: return False
         GstSdp.sdp_message_parse_buffer(sdp_text.encode('utf-8'), sdpmsg)
         answer = GstWebRTC.WebRTCSessionDescription.new(GstWebRTC.WebRTCSDPType.ANSWER, sdpmsg)
         self.webrtc.emit('set-remote-description', answer, None)
+        if self._t_offer_sent is not None:
+            self.negotiation_s = time.monotonic() - self._t_offer_sent
         print(f"[RTC][{self.sender_name}] Remote ANSWER 적용 완료")
         return False   
 
+    def _batch_candidates(self):
+        return CANDIDATE_BATCH_MS > 0 and "candidates" in self._features
+
     def on_ice_candidate(self, element, mlineindex, candidate):
-        """ICE 후보 수신 시 시그널링 서버로 전송"""
-        self.sio.emit('signal', {
+        """ICE 후보 수신 시 시그널링 서버로 전송 (서버가 지원하면 짧은 창으로 묶어서)"""
+        payload = {'candidate': candidate,
+                   'sdpMid': f"video{mlineindex}",
+                   'sdpMLineIndex': int(mlineindex)}
+        with self._signal_lock:
+            if not self.sender_id:
+                self._pending_local_candidates.append((mlineindex, candidate))
+                return
+            if self._batch_candidates():
+                self._outgoing_candidates.append(payload)
+                if self._flush_scheduled:
+                    return
+                self._flush_scheduled = True
+                GLib.timeout_add(CANDIDATE_BATCH_MS, self._flush_candidates)
+                return
+        emit_signal(self.sio, self._features, {
             'to': self.sender_id,
             'from': self.sio.sid,
             'type': 'candidate',
-            'payload': {'candidate': candidate,
-                        'sdpMid': f"video{mlineindex}",
-                        'sdpMLineIndex': int(mlineindex)}
+            'payload': payload
         })
+
+    def _on_gathering_state(self, element, pspec):
+        if element.get_property('ice-gathering-state') != GstWebRTC.WebRTCICEGatheringState.COMPLETE:
+            return
+        with self._signal_lock:
+            self._gathering_done = True
+            bound = bool(self.sender_id)
+        if bound and self._batch_candidates():
+            GLib.idle_add(self._flush_candidates)  # 남은 후보 + end-of-candidates 즉시 전송
+
+    def _flush_candidates(self):
+        """묶어 둔 로컬 후보를 'candidates' 메시지 하나로 전송"""
+        with self._signal_lock:
+            self._flush_scheduled = False
+            cands, self._outgoing_candidates = self._outgoing_candidates, []
+            end = self._gathering_done and not self._end_sent
+            if end:
+                self._end_sent = True
+            to = self.sender_id
+        if to and (cands or end):
+            emit_signal(self.sio, self._features, {
+                'to': to,
+                'from': self.sio.sid,
+                'type': 'candidates',
+                'payload': {'candidates': cands, 'end': end}
+            })
+        return False
         
     # ========== 미디어 스트림 처리 ==========
-    
+
+    def _link_stream_pad(self, pad, branch):
+        """webrtcbin src 패드 → 디코드 브랜치 (사이멀캐스트면 funnel의 새 요청 패드로)
+
+        층(rid)마다 SSRC가 달라 webrtcbin 패드가 층마다 생기거나 타깃만 바뀌므로,
+        이전 패드를 떼지 않고 모두 funnel에 붙여 둔다. sender는 한 층만 켜므로 한 번에 한 SSRC만 흐르고,
+        예전에 쓰던 층(h→m→h)으로 돌아가도 그 패드는 이미 연결돼 있다.
+        """
+        if self._layer_funnel:
+            sinkpad = self._layer_funnel.request_pad_simple("sink_%u")
+            sinkpad.connect("unlinked", self._on_layer_pad_unlinked)
+        else:
+            sinkpad = branch.head.get_static_pad("sink")
+        if pad.link(sinkpad) != Gst.PadLinkReturn.OK:
+            if self._layer_funnel:
+                self._layer_funnel.release_request_pad(sinkpad)
+            return False
+        return True
+
+    def _on_layer_pad_unlinked(self, sinkpad, _peer):
+        # SSRC 타임아웃으로 webrtcbin 패드가 사라진 경우 funnel 요청 패드 반납
+        funnel = self._layer_funnel
+        if funnel:
+            GLib.idle_add(lambda: funnel.release_request_pad(sinkpad) and False)
+
+    def _add_layer_pad(self, pad, codec):
+        """디코드 브랜치가 이미 있을 때 생긴 패드: 사이멀캐스트 층이면 funnel에 추가"""
+        if not self._layer_funnel:
+            print(f"[RTC][{self.sender_name}] 추가 스트림 무시 (사이멀캐스트 아님): {pad.get_name()}")
+            return
+        if codec != self._branch.codec:
+            print(f"[RTC][{self.sender_name}] 층 패드 코덱 불일치 무시: {self._branch.codec} → {codec}")
+            return
+        if not self._link_stream_pad(pad, self._branch):
+            print(f"[RTC][{self.sender_name}] 층 pad link 실패")
+            return
+        if self._visible:
+            self.request_keyframe(force=True)
+        print(f"[RTC][{self.sender_name}] simulcast layer pad added ({pad.get_name()})")
+
     def on_incoming_stream(self, webrtc, pad):
         """들어오는 미디어 스트림 처리"""
         caps = pad.get_current_caps()
@@ -355,111 +709,56 @@ class PeerReceiver:
         if not caps_str.startswith("application/x-rtp"):
             return
 
-        depay = _make("rtph264depay")
-        parse = _make("h264parse")
-        decoder, conv, _ = get_decoder_and_sink()
-
-        q = _make("queue")
-        fpssink = _make("fpsdisplaysink")
-
-        # 여기서 OS별 싱크 생성
-        sink = None
-        if sys.platform.startswith("linux"):
-            # Jetson / 일반 Linux
-            sink = _make("nv3dsink") or _make("glimagesink")
-        elif sys.platform == "win32":
-            sink = _make("d3d11videosink")
-        elif sys.platform == "darwin":
-            sink = _make("glimagesink")
-
-        if sink:
-            sink.set_property("sync", False)              # 지연 방지
-            fpssink.set_property("video-sink", sink)      # fpsdisplaysink → 실제 싱크 연결
-
-
-        # FPS 측정 싱크 설정
-        if fpssink:
-            fpssink.set_property("signal-fps-measurements", True)
-            fpssink.set_property("text-overlay", False)
-            fpssink.set_property("sync", False)  # [MODIFIED] 측정만 하고 렌더링은 빠르게
-            if sink:
-                fpssink.set_property("video-sink", sink)  # [MODIFIED] 강제 지정
-            fpssink.connect("fps-measurements", self._on_fps_measurements)
-
-        if not all([depay, parse, decoder, conv, q, fpssink]):
+        codec = codec_from_caps(caps.get_structure(0))
+        if self._branch:
+            self._add_layer_pad(pad, codec)
+            return
+        if codec not in get_capabilities().decoders:
+            print(f"[RTC][{self.sender_name}] 디코드할 수 없는 코덱: {caps_str}")
+            return
+        branch = build_decode_branch(compositor=self._compositor is not None, sink_factory=DECODE_SINK,
+                                     codec=codec)
+        if not branch:
             print(f"[RTC][{self.sender_name}] 요소 부족으로 링크 실패")
             return
 
-        # 파이프라인 구성
-        for e in (depay, parse, decoder, conv, q, fpssink):
-            self.pipeline.add(e)
-            e.sync_state_with_parent()
-
-        identity = _make("identity")
-        if identity:
-            identity.set_property("signal-handoffs", True)
-            identity.connect("handoff", self._on_rtp_handoff)
-
-        # 요소 추가
-        for e in (depay, identity, parse, decoder, conv, q, fpssink):
-            self.pipeline.add(e)
-            e.sync_state_with_parent()
+        if not branch.add_to(self.pipeline):
+            return
+        self._elements.extend(branch.elements)
+
+        # 사이멀캐스트: 층별 SSRC 패드를 모두 받도록 브랜치 앞에 funnel
+        if self.simulcast_rids:
+            funnel = _make("funnel")
+            if funnel:
+                self.pipeline.add(funnel)
+                funnel.sync_state_with_parent()
+                funnel.link(branch.head)
+                self._elements.append(funnel)
+                self._layer_funnel = funnel
 
         # pad 링크
-        if pad.link(depay.get_static_pad("sink")) != Gst.PadLinkReturn.OK:
+        if not self._link_stream_pad(pad, branch):
             print(f"[RTC][{self.sender_name}] pad link 실패")
             return
 
-        # 링크
-        depay.link(identity)
-        identity.link(parse)
-        parse.link(decoder)
-        decoder.link(conv)
-        conv.link(q)
-        q.link(fpssink)
-
-        # FPS 콜백 연결
-        fpssink.connect("fps-measurements", self._on_fps_measurements)
-
-        self._display_bin = fpssink
-        print(f"[OK][{self.sender_name}] Incoming video linked → {decoder.name}")
-
-    # ========== FPS 콜백 ==========
-    def _on_fps_measurements(self, element, fps, drop, avg):
-        self.current_fps = fps
-        self.drop_rate = drop
-        self.avg_fps = avg
-
-        # 해상도
-        if self._width is None or self._height is None:
-            try:
-                sink = self._display_bin.get_property("video-sink")
-                if sink:
-                    pad = sink.get_static_pad("sink")
-                    if pad:
-                        caps = pad.get_current_caps()
-                        if caps:
-                            s = caps.get_structure(0)
-                            self._width = s.get_value("width")
-                            self._height = s.get_value("height")
-            except Exception:
-                self._width, self._height = None, None
-
-        res_str = f"{self._width}x{self._height}" if self._width and self._height else "?"
-
-        print(f"[STATS][{self.sender_name}] "
-            f"FPS={fps:.2f}, drop={drop:.2f}, avg={avg:.2f}, "
-            f"Mbps={self._bitrate_mbps:.2f}, res={res_str}")
-
-
-    # ========== 비트레이트 계산 ==========
-    def _on_rtp_handoff(self, identity, buffer):
-        size = buffer.get_size()
-        self._byte_accum += size
-        now = time.time()
-        elapsed = now - self._last_ts
-        if elapsed >= 1.0:
-            # Mbps로 변환
-            self._bitrate_mbps = (self._byte_accum * 8) / (elapsed * 1_000_000)
-            self._byte_accum = 0
-            self._last_ts = now
+        if self._compositor:
+            self._compositor.attach_branch(self.sender_id, branch.tail)
+
+        latency.apply_sink(branch.sink, latency.resolve_profile(self.latency_profile))
+        if self._glass:
+            self._glass.label = self.sender_name
+            self._glass.attach((branch.sink or branch.tail).get_static_pad("sink"), branch.sink)
+
+        # 셀에 배치되지 않은 sender는 디코드하지 않음
+        branch.set_decoding(self._visible)
+        self._branch = branch
+        if self._t_switch is not None:
+            branch.on_next_frame(self._on_switch_frame)
+        if self._visible:
+            self.request_keyframe(force=True)
+        if self._record_wanted:
+            self.start_recording()
+        if self._program_wanted:
+            self.start_program_tap()
+        print(f"[OK][{self.sender_name}] Incoming video linked → {branch.codec} {branch.decoder.name} "
+              f"({branch.profile}{', compositor' if self._compositor else ''})")
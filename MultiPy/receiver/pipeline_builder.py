@@ -0,0 +1,394 @@
+# pipeline_builder.py
+# 수신 디코드 브랜치(depay → 디코더 → 싱크) 구성 및 패드 프로브 기반 프레임 측정
+
+import time
+import gi
+
+gi.require_version('Gst', '1.0')
+gi.require_version('GstVideo', '1.0')
+from gi.repository import Gst, GstVideo, GLib
+
+from gst_utils import _make, _set_props_if_supported, get_capabilities
+from config import DECODE_PROFILE, RECORD_ENABLED, PROGRAM_ENABLED
+from video_codecs import CODECS, is_software
+
+# 프로파일
+PROFILE_JETSON = "jetson"      # nvv4l2decoder → NVMM 고정 → nv3dsink (시스템 메모리 왕복 없음)
+PROFILE_GENERIC = "generic"    # 시작 시 프로브된 디코더/변환기/싱크
+PROFILE_SOFTWARE = "software"  # avdec_h264 등 소프트웨어 디코더 → videoconvert → 싱크 (일반 Linux/CI용)
+
+NVMM_CAPS = "video/x-raw(memory:NVMM)"
+QUEUE_LEAKY_DOWNSTREAM = 2   # queue leaky=downstream: 가득 차면 오래된 버퍼부터 버림
+
+
+_BUFFER_PROBE = Gst.PadProbeType.BUFFER | Gst.PadProbeType.BUFFER_LIST
+
+
+def _probe_count(info):
+    """프로브 정보의 버퍼 수 (버퍼 리스트면 길이)"""
+    if info.type & Gst.PadProbeType.BUFFER_LIST:
+        blist = info.get_buffer_list()
+        return blist.length() if blist else 0
+    return 1
+
+
+class FrameCounter:
+    """패드 프로브 기반 FPS/드롭/디코드 지연 측정
+
+    디코더 입력(압축 프레임)과 싱크 입력(디코드 프레임)에서 버퍼 수만 세므로
+    fpsdisplaysink처럼 CPU 메모리 싱크를 강제하지 않고 NVMM 버퍼도 매핑하지 않는다.
+    디코드 지연은 디코더 입출력 버퍼의 PTS를 맞춰 계산한다.
+    """
+
+    _MAX_INFLIGHT = 64
+
+    def __init__(self):
+        self._in = 0
+        self._out = 0
+        self._total_out = 0
+        self._t0 = None
+        self._last_ts = time.monotonic()
+        self.first_frame_ts = None
+        self._inflight = {}        # pts -> 디코더 입력 시각
+        self._latency_sum = 0.0
+        self._latency_n = 0
+
+    def attach(self, in_pad, out_pad, dec_src_pad=None):
+        if in_pad:
+            in_pad.add_probe(_BUFFER_PROBE, self._on_in)
+        if out_pad:
+            out_pad.add_probe(_BUFFER_PROBE, self._on_out)
+        if dec_src_pad:
+            dec_src_pad.add_probe(Gst.PadProbeType.BUFFER, self._on_decoded)
+
+    def _on_in(self, pad, info):
+        self._in += _probe_count(info)
+        if info.type & Gst.PadProbeType.BUFFER and len(self._inflight) < self._MAX_INFLIGHT:
+            pts = info.get_buffer().pts
+            if pts != Gst.CLOCK_TIME_NONE:
+                self._inflight[pts] = time.monotonic()
+        return Gst.PadProbeReturn.OK
+
+    def _on_decoded(self, pad, info):
+        t_in = self._inflight.pop(info.get_buffer().pts, None)
+        if t_in is not None:
+            self._latency_sum += time.monotonic() - t_in
+            self._latency_n += 1
+        if len(self._inflight) >= self._MAX_INFLIGHT:
+            self._inflight.clear()  # 재정렬/드롭으로 짝이 안 맞는 PTS 정리
+        return Gst.PadProbeReturn.OK
+
+    def _on_out(self, pad, info):
+        n = _probe_count(info)
+        self._out += n
+        self._total_out += n
+        if self.first_frame_ts is None:
+            self.first_frame_ts = self._t0 = time.monotonic()
+        return Gst.PadProbeReturn.OK
+
+    @property
+    def total(self):
+        """지금까지 싱크(또는 컴포지터 입력)에 도착한 프레임 수"""
+        return self._total_out
+
+    def decode_latency_ms(self):
+        """지난 호출 이후 평균 디코드 지연 (ms)"""
+        n, total = self._latency_n, self._latency_sum
+        self._latency_n, self._latency_sum = 0, 0.0
+        return total / n * 1000.0 if n else None
+
+    def sample(self):
+        """지난 호출 이후 구간의 (fps, drop_rate, avg_fps) 반환"""
+        now = time.monotonic()
+        elapsed = max(now - self._last_ts, 1e-6)
+        fin, fout = self._in, self._out
+        self._in = self._out = 0
+        self._last_ts = now
+
+        fps = fout / elapsed
+        drop = max(fin - fout, 0) / fin if fin else 0.0
+        avg = self._total_out / (now - self._t0) if self._t0 and now > self._t0 else 0.0
+        return fps, drop, avg
+
+
+class DecodeBranch:
+    """depay부터 싱크(또는 컴포지터 입력)까지의 디코드 브랜치
+
+    parse와 디코더 사이의 valve로 디코드만 끄고 켤 수 있다 (RTP 세션/ICE는 그대로 유지).
+    tee는 valve 앞에 있어 디코드를 꺼도 녹화 브랜치(recorder.py)에는 계속 흐른다.
+    raw_tee는 네이티브 창 모드에서 싱크 바로 앞의 디코드된 프레임 분기점 (프로그램 출력용).
+    """
+
+    def __init__(self, profile, elements, decoder, valve, sink=None, tee=None, raw_tee=None,
+                 codec="H264"):
+        self.profile = profile
+        self.codec = codec         # video_codecs.CODECS 키 (녹화 parse/mux 선택)
+        self.elements = elements   # 링크 순서대로
+        self.decoder = decoder
+        self.valve = valve
+        self.sink = sink           # 컴포지터 모드에서는 None
+        self.tee = tee             # 녹화 브랜치 연결점 (RECORD_ENABLED가 아니면 None)
+        self.raw_tee = raw_tee     # 프로그램 출력 연결점 (컴포지터 모드/PROGRAM_ENABLED=False면 None)
+        self.frames = FrameCounter()
+        self._gate_probe = None
+        self._next_frame_probe = None
+
+    @property
+    def head(self):
+        return self.elements[0]
+
+    @property
+    def tail(self):
+        return self.elements[-1]
+
+    def add_to(self, pipeline):
+        """파이프라인에 추가/링크하고 프레임 프로브 설치"""
+        for e in self.elements:
+            pipeline.add(e)
+            e.sync_state_with_parent()
+        for a, b in zip(self.elements, self.elements[1:]):
+            if not a.link(b):
+                print(f"[PIPE] link 실패: {a.get_name()} → {b.get_name()}")
+                return False
+        out_pad = (self.sink or self.tail).get_static_pad("sink")
+        self.frames.attach(self.decoder.get_static_pad("sink"), out_pad,
+                           self.decoder.get_static_pad("src"))
+        return True
+
+    # ========== 디코드 on/off ==========
+
+    def set_decoding(self, active: bool):
+        """False: 디코더 앞에서 버퍼 폐기 / True: 다음 키프레임부터 디코드 재개"""
+        pad = self.valve.get_static_pad("sink")
+        if not active:
+            if self._gate_probe is not None:
+                pad.remove_probe(self._gate_probe)
+                self._gate_probe = None
+            self.valve.set_property("drop", True)
+            return
+        if not self.valve.get_property("drop") or self._gate_probe is not None:
+            return
+        # 델타 프레임부터 디코드하면 깨진 화면이 나오므로 키프레임까지 계속 버림
+        self._gate_probe = pad.add_probe(Gst.PadProbeType.BUFFER, self._keyframe_gate)
+
+    def _keyframe_gate(self, pad, info):
+        if info.get_buffer().has_flags(Gst.BufferFlags.DELTA_UNIT):
+            return Gst.PadProbeReturn.DROP
+        self.valve.set_property("drop", False)
+        self._gate_probe = None
+        return Gst.PadProbeReturn.REMOVE
+
+    def request_keyframe(self):
+        """업스트림 force-key-unit 이벤트 → webrtcbin(rtpsession)이 RTCP PLI로 변환"""
+        ev = GstVideo.video_event_new_upstream_force_key_unit(Gst.CLOCK_TIME_NONE, True, 0)
+        return self.head.send_event(ev)
+
+    def on_next_frame(self, callback):
+        """다음 렌더 프레임이 싱크(또는 컴포지터 입력)에 도착하면 callback() 한 번 호출
+
+        스트리밍 스레드에서 호출되므로 callback은 시각 기록 정도만 해야 한다.
+        다시 호출하면 이전 대기는 취소된다.
+        """
+        pad = (self.sink or self.tail).get_static_pad("sink")
+        if self._next_frame_probe is not None:
+            pad.remove_probe(self._next_frame_probe)
+
+        def _once(pad, info):
+            self._next_frame_probe = None
+            callback()
+            return Gst.PadProbeReturn.REMOVE
+
+        self._next_frame_probe = pad.add_probe(_BUFFER_PROBE, _once)
+
+    def resolution(self):
+        """표시 중인 프레임 해상도 (width, height) 또는 (None, None)"""
+        pad = (self.sink or self.tail).get_static_pad("sink")
+        caps = pad.get_current_caps() if pad else None
+        if not caps:
+            return None, None
+        s = caps.get_structure(0)
+        return s.get_value("width"), s.get_value("height")
+
+
+class TeeBranch:
+    """tee 요청 패드에 붙였다 떼는 부가 브랜치 (녹화, 프로그램 출력)
+
+    stop()은 IDLE 프로브로 tee에서 뗀 뒤 EOS를 흘려 mux/파일을 마무리하고,
+    eos_pad에 EOS가 도착하면 (데이터가 끊겨 안 오면 stop_timeout_ms 뒤) 요소를 제거한다.
+    """
+
+    def __init__(self, label, elements, eos_pad=None, stop_timeout_ms=2000):
+        self.label = label
+        self.elements = elements if all(elements) else []
+        self.stop_timeout_ms = stop_timeout_ms
+        self._pipeline = None
+        self._tee = None
+        self._tee_pad = None
+        self._stopping = False
+        self._finished = False
+        self._on_done = None
+        if self.elements and eos_pad:
+            eos_pad.add_probe(Gst.PadProbeType.EVENT_DOWNSTREAM, self._on_eos_event)
+
+    @property
+    def head(self):
+        return self.elements[0]
+
+    def attach(self, pipeline, tee):
+        """파이프라인에 추가하고 tee 새 요청 패드에 연결 (GLib 메인 루프에서)"""
+        if not self.elements:
+            return False
+        for e in self.elements:
+            pipeline.add(e)
+        self._pipeline, self._tee = pipeline, tee
+        for a, b in zip(self.elements, self.elements[1:]):
+            if not a.link(b):
+                print(f"[PIPE][{self.label}] link 실패: {a.get_name()} → {b.get_name()}")
+                self._finish()
+                return False
+        for e in self.elements:
+            e.sync_state_with_parent()
+        self._tee_pad = tee.request_pad_simple("src_%u")
+        if self._tee_pad.link(self.head.get_static_pad("sink")) != Gst.PadLinkReturn.OK:
+            print(f"[PIPE][{self.label}] tee link 실패")
+            self._finish()
+            return False
+        return True
+
+    def stop(self, on_done=None):
+        if self._stopping or not self._tee_pad:
+            return
+        self._stopping = True
+        self._on_done = on_done
+        # IDLE: 지금 흐르는 버퍼가 끝난 뒤 (흐름이 없으면 즉시) 호출
+        self._tee_pad.add_probe(Gst.PadProbeType.IDLE, self._detach_and_eos)
+        GLib.timeout_add(self.stop_timeout_ms, self._finish)
+
+    def close_now(self):
+        """파이프라인을 바로 내릴 때 (마무리 EOS 없이 제거)"""
+        self._stopping = True
+        self._finish()
+
+    def _detach_and_eos(self, pad, info):
+        sink_pad = self.head.get_static_pad("sink")
+        pad.unlink(sink_pad)
+        sink_pad.send_event(Gst.Event.new_eos())
+        return Gst.PadProbeReturn.REMOVE
+
+    def _on_eos_event(self, pad, info):
+        # stop() 이전의 EOS(예: splitmuxsink 조각 경계)는 무시
+        if self._stopping and info.get_event().type == Gst.EventType.EOS:
+            GLib.idle_add(self._finish)
+        return Gst.PadProbeReturn.OK
+
+    def _finish(self):
+        if self._finished:
+            return False
+        self._finished = True
+        if self._tee_pad:
+            if self._tee_pad.is_linked():
+                self._tee_pad.unlink(self.head.get_static_pad("sink"))
+            self._tee.release_request_pad(self._tee_pad)
+            self._tee_pad = None
+        if self._pipeline:
+            for e in reversed(self.elements):
+                try:
+                    e.set_state(Gst.State.NULL)
+                    self._pipeline.remove(e)
+                except Exception:
+                    pass
+        self.on_finished()
+        if self._on_done:
+            self._on_done(self)
+        return False
+
+    def on_finished(self):
+        """하위 클래스: 요소 제거 후 정리"""
+
+
+def select_profile(codec="H264"):
+    """설정/능력에 따른 프로파일 결정"""
+    if DECODE_PROFILE != "auto":
+        return DECODE_PROFILE
+    caps = get_capabilities()
+    decoder = caps.decoders.get(codec) or ""
+    if caps.jetson and decoder.startswith("nvv4l2") and caps.sink == "nv3dsink":
+        return PROFILE_JETSON
+    return PROFILE_GENERIC
+
+
+def _capsfilter(caps_str):
+    f = _make("capsfilter")
+    if f:
+        f.set_property("caps", Gst.Caps.from_string(caps_str))
+    return f
+
+
+def build_decode_branch(profile=None, compositor=False, sink_factory=None, extra=None, codec="H264"):
+    """RTP 디코드 브랜치 생성 (depay/parse/디코더는 코덱별, video_codecs.CODECS)
+
+    Args:
+        profile: PROFILE_* (None이면 select_profile(codec))
+        compositor: True면 싱크 대신 공유 컴포지터 입력용 시스템 메모리 출력으로 끝남
+        sink_factory: 싱크 팩토리 이름 강제 (예: CI에서 "fakesink")
+        extra: depay 바로 뒤에 끼울 요소 목록
+        codec: 협상된 RTP encoding-name (H264/H265/VP8/VP9/AV1)
+    Returns:
+        DecodeBranch 또는 요소 부족 시 None
+    """
+    spec = CODECS[codec]
+    profile = profile or select_profile(codec)
+    caps = get_capabilities()
+
+    depay = _make(spec.depay)
+    parse = _make(spec.parse)
+    # 디코드 재개 시 첫 키프레임에 SPS/PPS(VPS)가 붙어 있도록
+    _set_props_if_supported(parse, config_interval=-1)
+    valve = _make("valve")
+    tee = _make("tee") if RECORD_ENABLED else None
+    # 녹화 패드를 붙였다 뗄 때 잠깐 연결이 없어도 not-linked로 멈추지 않도록
+    _set_props_if_supported(tee, allow_not_linked=True)
+    head = [depay, *(extra or []), *([parse] if spec.parse else []),
+            *([tee] if RECORD_ENABLED else []), valve]
+
+    # 디코더는 프로브된 것 (DECODE_PROFILE 고정 시 프로브도 그 프로파일 후보만 봄)
+    decoder_name = caps.decoders.get(codec)
+    if profile == PROFILE_JETSON:
+        if decoder_name != "nvv4l2decoder":
+            print(f"[PIPE] jetson 프로파일로 {codec} 디코드 불가 (프로브된 디코더: {decoder_name})")
+            return None
+        decoder = _make(decoder_name)
+        _set_props_if_supported(decoder, enable_max_performance=True)
+        if compositor:
+            # 믹서는 시스템 메모리를 받으므로 여기서 한 번만 NVMM → RGBA 변환
+            body = [decoder, _make("nvvidconv"), _capsfilter("video/x-raw,format=RGBA"), _make("queue")]
+        else:
+            body = [decoder, _capsfilter(NVMM_CAPS)]
+    elif profile == PROFILE_SOFTWARE:
+        # 프로파일을 인자로만 강제한 경우(CI 등) 프로브 결과가 하드웨어일 수 있음 → 설치된 소프트웨어 디코더
+        if not (decoder_name and is_software(codec, decoder_name)):
+            decoder_name = next((n for n in spec.software if Gst.ElementFactory.find(n)), None)
+        decoder = _make(decoder_name)
+        body = [decoder, _make("videoconvert"), _make("queue")]
+    else:
+        decoder = _make(decoder_name)
+        body = [decoder, caps.make_converter(), _make("queue")]
+
+    sink, raw_tee = None, None
+    if not compositor:
+        if sink_factory:
+            sink = _make(sink_factory)
+        elif profile == PROFILE_JETSON:
+            sink = _make("nv3dsink")
+        else:
+            sink = caps.make_sink()
+        if sink:
+            _set_props_if_supported(sink, sync=False, force_aspect_ratio=True)
+        if PROGRAM_ENABLED:
+            raw_tee = _make("tee")
+            _set_props_if_supported(raw_tee, allow_not_linked=True)
+
+    elements = head + body + ([*([raw_tee] if PROGRAM_ENABLED else []), sink] if not compositor else [])
+    if not all(elements):
+        return None
+    return DecodeBranch(profile, elements, decoder, valve, sink, tee, raw_tee, codec)
@@ -0,0 +1,287 @@
+# program_out.py
+# 프로그램 출력: 방에서 보이는 그대로(cell_assignments + 현재 모드 사각형) 합성해 한 번만 인코딩
+#
+# 컴포지터 모드   : 공유 컴포지터 tee → [인코드 브랜치]          (화면과 같은 그림, 추가 합성 없음)
+# 네이티브 창 모드: sender 디코드 브랜치 raw tee → intervideosink(program-<sid>)
+#                  → ProgramMixer 파이프라인: intervideosrc → compositor 믹서 → tee → [인코드 브랜치]
+#
+# 인코드 브랜치: queue(leaky) → 변환/스케일 → H.264 인코더(하드웨어 우선, x264 대체) → h264parse → 출력
+# 레이아웃 변경은 믹서 패드 속성만 바꾸므로 인코더와 출력은 재시작하지 않는다.
+#
+# 출력 대상
+#   /path/program-%Y%m%d-%H%M%S.mp4   파일 (strftime 치환, .mp4/.mkv/.ts)
+#   srt://:8890?mode=listener         SRT (MPEG-TS)
+#   rtsp://127.0.0.1:8554/program     로컬 RTSP 서버에 게시 (rtspclientsink)
+
+import os
+import time
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+from gst_utils import _make, _set_props_if_supported
+from compositor import SharedCompositor
+from pipeline_builder import TeeBranch, NVMM_CAPS, QUEUE_LEAKY_DOWNSTREAM
+from config import (PROGRAM_CANVAS, PROGRAM_FPS, PROGRAM_BITRATE_KBPS, PROGRAM_KEYFRAME_S,
+                    PROGRAM_ENCODERS, PROGRAM_QUEUE_MS, PROGRAM_STOP_TIMEOUT_MS)
+
+
+def program_channel(sender_id):
+    """sender 디코드 브랜치 → 프로그램 믹서 intervideo 채널 이름"""
+    return f"program-{sender_id}"
+
+
+def _capsfilter(caps_str):
+    f = _make("capsfilter")
+    if f:
+        f.set_property("caps", Gst.Caps.from_string(caps_str))
+    return f
+
+
+def _leaky_queue(ms):
+    q = _make("queue")
+    if q:
+        q.set_property("max-size-buffers", 0)
+        q.set_property("max-size-bytes", 0)
+        q.set_property("max-size-time", ms * Gst.MSECOND)
+        q.set_property("leaky", QUEUE_LEAKY_DOWNSTREAM)
+    return q
+
+
+# ========== 인코더 ==========
+
+_encoder_name = None
+
+
+def select_encoder():
+    """PROGRAM_ENCODERS 중 READY까지 갈 수 있는 첫 인코더 (프로세스 내 캐시)"""
+    global _encoder_name
+    if _encoder_name is None:
+        _encoder_name = ""
+        for name in PROGRAM_ENCODERS:
+            e = _make(name)
+            if not e:
+                continue
+            ok = e.set_state(Gst.State.READY) != Gst.StateChangeReturn.FAILURE
+            e.set_state(Gst.State.NULL)
+            if ok:
+                _encoder_name = name
+                break
+        print(f"[PROG] encoder: {_encoder_name or '(none)'}")
+    return _encoder_name or None
+
+
+def _make_encoder(name):
+    """인코더 + 그 앞에 필요한 변환 요소 (비트레이트 단위와 속성 이름이 인코더마다 다름)"""
+    enc = _make(name)
+    kbps, gop = PROGRAM_BITRATE_KBPS, PROGRAM_FPS * PROGRAM_KEYFRAME_S
+    pre = []
+    if name == "nvv4l2h264enc":
+        pre = [_make("nvvidconv"), _capsfilter(f"{NVMM_CAPS},format=I420")]
+        _set_props_if_supported(enc, bitrate=kbps * 1000, iframeinterval=gop, idrinterval=gop,
+                                insert_sps_pps=True, maxperf_enable=True)
+    elif name == "vaapih264enc":
+        _set_props_if_supported(enc, bitrate=kbps, keyframe_period=gop)
+    elif name == "v4l2h264enc":
+        controls = f"controls,video_bitrate={kbps * 1000},h264_i_frame_period={gop}"
+        _set_props_if_supported(enc, extra_controls=Gst.Structure.from_string(controls)[0])
+    elif name == "x264enc" and enc:
+        _set_props_if_supported(enc, bitrate=kbps, key_int_max=gop)
+        Gst.util_set_object_arg(enc, "tune", "zerolatency")
+        Gst.util_set_object_arg(enc, "speed-preset", "veryfast")
+    return pre + [enc]
+
+
+def _make_output(target):
+    """출력 대상 문자열 → h264parse 뒤 요소 목록 (마지막이 싱크)"""
+    if target.startswith("srt://"):
+        sink = _make("srtsink")
+        if sink:
+            sink.set_property("uri", target)
+        return [_make("mpegtsmux"), sink]
+    if target.startswith("rtsp://"):
+        sink = _make("rtspclientsink")
+        if sink:
+            sink.set_property("location", target)
+        return [sink]
+
+    path = time.strftime(target[len("file://"):] if target.startswith("file://") else target)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".ts":
+        mux = _make("mpegtsmux")
+    elif ext == ".mkv":
+        mux = _make("matroskamux")
+    else:
+        mux = _make("mp4mux")
+        # fragmented MP4: 중간에 죽어도 마지막 조각 전까지 재생 가능
+        _set_props_if_supported(mux, fragment_duration=1000)
+    sink = _make("filesink")
+    if sink:
+        sink.set_property("location", path)
+    return [mux, sink]
+
+
+class ProgramEncodeBranch(TeeBranch):
+    """합성 출력 tee → 스케일 → 인코더 → 출력 (EOS로 파일 마무리)"""
+
+    def __init__(self, target, gl_input=False):
+        self.encoder = select_encoder()
+        self.target = target
+        w, h = PROGRAM_CANVAS
+        elements = [None]
+        if self.encoder:
+            parse = _make("h264parse")
+            _set_props_if_supported(parse, config_interval=-1)   # 중간 접속 SRT/RTSP 수신자용
+            elements = [
+                _leaky_queue(PROGRAM_QUEUE_MS),
+                *([_make("gldownload")] if gl_input else []),
+                _make("videoconvert"),
+                _make("videoscale"),
+                _make("videorate"),
+                _capsfilter(f"video/x-raw,format=I420,width={w},height={h},framerate={PROGRAM_FPS}/1"),
+                *_make_encoder(self.encoder),
+                parse,
+                *_make_output(target),
+            ]
+        ok = all(elements)
+        sink = elements[-1] if ok else None
+        super().__init__("program", elements, sink.get_static_pad("sink") if sink else None,
+                         PROGRAM_STOP_TIMEOUT_MS)
+
+
+class ProgramMixer(SharedCompositor):
+    """네이티브 창 모드용 프로그램 합성 파이프라인 (화면 출력 없이 tee까지만)
+
+    sender마다 intervideosrc(program-<sid>)를 믹서 패드에 붙이고,
+    배치는 SharedCompositor와 같은 place/hide로 바꾼다.
+    """
+
+    NAME = "program-pipeline"
+    MIXER_ELEMENTS = ("compositor",)   # 인코더 입력이 시스템 메모리라 CPU 믹서
+    CANVAS = PROGRAM_CANVAS
+    FPS = PROGRAM_FPS
+
+    def __init__(self):
+        self._sources = {}   # sender_id -> [intervideosrc, videoconvert, queue]
+        super().__init__()
+
+    def _build(self):
+        bg, caps = self._build_mixer_input()
+        self.tee = _make("tee")
+        _set_props_if_supported(self.tee, allow_not_linked=True)
+        # 인코드 브랜치를 떼어도 파이프라인이 계속 돌도록 싱크 하나는 항상 둔다
+        q, self.sink = _make("queue"), _make("fakesink")
+        _set_props_if_supported(self.sink, sync=False)
+        chain = [self.mixer, caps, self.tee, q, self.sink]
+        if not all([bg, *chain]):
+            raise RuntimeError("프로그램 믹서 요소 부족")
+        self._add_chain(bg, chain)
+
+    def add_source(self, sender_id):
+        if sender_id in self._sources:
+            return
+        src = _make("intervideosrc")
+        chain = [src, _make("videoconvert"), _make("queue")]
+        if not all(chain):
+            print("[PROG] intervideosrc 없음 → 네이티브 창 모드 프로그램 출력 불가")
+            return
+        src.set_property("channel", program_channel(sender_id))
+        for e in chain:
+            self.pipeline.add(e)
+        for a, b in zip(chain, chain[1:]):
+            a.link(b)
+        for e in chain:
+            e.sync_state_with_parent()
+        self._sources[sender_id] = chain
+        self.attach_branch(sender_id, chain[-1])
+
+    def remove_source(self, sender_id):
+        chain = self._sources.pop(sender_id, None)
+        self.detach_branch(sender_id)
+        for e in reversed(chain or ()):
+            e.set_state(Gst.State.NULL)
+            self.pipeline.remove(e)
+
+
+class ProgramOut:
+    """프로그램 출력 한 번 (start ~ stop)"""
+
+    def __init__(self, target, compositor=None):
+        self.target = target
+        self._compositor = compositor
+        self.mixer = None    # 네이티브 창 모드에서만 ProgramMixer
+        self._encode = None
+
+    @property
+    def encoder(self):
+        return self._encode.encoder if self._encode else None
+
+    def start(self):
+        if self._compositor:
+            pipeline, tee = self._compositor.pipeline, self._compositor.tee
+            self._encode = ProgramEncodeBranch(self.target, gl_input=self._compositor._is_gl)
+        else:
+            self.mixer = ProgramMixer()
+            pipeline, tee = self.mixer.pipeline, self.mixer.tee
+            self._encode = ProgramEncodeBranch(self.target)
+        if not self._encode.elements:
+            print(f"[PROG] 인코더/출력 요소 없음 → {self.target} 출력 불가")
+            return False
+        if not self._encode.attach(pipeline, tee):
+            return False
+        if self.mixer:
+            self.mixer.start()
+        print(f"[PROG] program out → {self.target} ({self.encoder}, "
+              f"{'shared compositor' if self._compositor else 'program mixer'})")
+        return True
+
+    def stop(self):
+        """EOS로 출력 마무리 후 (네이티브 창 모드면) 프로그램 파이프라인 정지"""
+        mixer = self.mixer
+
+        def _done(_branch):
+            if mixer:
+                mixer.stop()
+            print(f"[PROG] program out stopped ({self.target})")
+
+        if self._encode and self._encode.elements:
+            self._encode.stop(_done)
+        else:
+            _done(None)
+
+    # ----- 배치 (컴포지터 모드는 공유 컴포지터를 그대로 따라가므로 할 일 없음) -----
+    def add_source(self, sender_id):
+        if self.mixer:
+            self.mixer.add_source(sender_id)
+
+    def remove_source(self, sender_id):
+        if self.mixer:
+            self.mixer.remove_source(sender_id)
+
+    def place(self, sender_id, rect, layer=None):
+        if self.mixer and rect:
+            self.mixer.place(sender_id, rect, layer)
+
+    def hide(self, sender_id):
+        if self.mixer:
+            self.mixer.hide(sender_id)
+
+    def hide_all(self):
+        if self.mixer:
+            self.mixer.hide_all()
+
+
+class ProgramTap(TeeBranch):
+    """네이티브 창 모드 sender 디코드 브랜치 raw tee → intervideosink(program-<sid>)"""
+
+    def __init__(self, sender_id, nvmm=False):
+        sink = _make("intervideosink")
+        if sink:
+            sink.set_property("channel", program_channel(sender_id))
+        elements = [_leaky_queue(PROGRAM_QUEUE_MS),
+                     *([_make("nvvidconv"), _capsfilter("video/x-raw")] if nvmm else []),
+                     _make("videoconvert"), sink]
+        super().__init__(f"program-tap {sender_id}", elements)
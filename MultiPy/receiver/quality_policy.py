@@ -0,0 +1,31 @@
+# quality_policy.py
+# 셀 크기 → sender 송출 화질(해상도/비트레이트) 힌트 계산
+
+from config import (QUALITY_BITS_PER_PIXEL, QUALITY_FPS, QUALITY_MIN_BITRATE,
+                    QUALITY_MAX_BITRATE, QUALITY_THUMBNAIL, QUALITY_THUMBNAIL_FPS)
+
+# 같은 힌트를 반복 전송하지 않도록 크기를 이 단위로 반올림
+_SIZE_STEP = 16
+
+
+def _round(v: int) -> int:
+    return max(_SIZE_STEP, int(round(v / _SIZE_STEP)) * _SIZE_STEP)
+
+
+def quality_for_size(width: int, height: int) -> dict:
+    """셀이 실제로 차지하는 픽셀 크기에 맞춘 송출 힌트
+
+    sender(index.js)는 width/height와 자신의 캡처 해상도로 scaleResolutionDownBy를 계산하고
+    maxBitrate/maxFramerate는 그대로 RTCRtpSender.setParameters에 적용한다.
+    """
+    w, h = _round(width), _round(height)
+    bitrate = int(w * h * QUALITY_FPS * QUALITY_BITS_PER_PIXEL)
+    bitrate = min(max(bitrate, QUALITY_MIN_BITRATE), QUALITY_MAX_BITRATE)
+    return {"width": w, "height": h, "maxBitrate": bitrate, "maxFramerate": QUALITY_FPS}
+
+
+def thumbnail_quality() -> dict:
+    """어느 셀에도 없는 sender용 썸네일급 힌트"""
+    w, h = QUALITY_THUMBNAIL
+    return {"width": w, "height": h, "maxBitrate": QUALITY_MIN_BITRATE,
+            "maxFramerate": QUALITY_THUMBNAIL_FPS}
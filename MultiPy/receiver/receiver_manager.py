@@ -3,12 +3,31 @@
 import json
 import threading
 import ssl
+from urllib.parse import quote
 import socketio
 from gi.repository import GLib
 from PyQt5 import QtCore
 
-from config import SIGNALING_URL, RECEIVER_NAME, UI_OVERLAY_DELAY_MS
+from config import (SIGNALING_URL, RECEIVER_NAME, UI_OVERLAY_DELAY_MS, COMPOSITOR_MODE,
+                    PEER_POOL_SIZE, QUALITY_ADAPTIVE, QUALITY_UPDATE_DELAY_MS,
+                    VISIBILITY_SETTLE_MS, WALL_ID, RECORD_DIR, PROGRAM_OUTPUT, LATENCY_PROFILE)
+from quality_policy import quality_for_size, thumbnail_quality
+from simulcast import select_layer
 from peer_receiver import PeerReceiver
+from peer_pool import PeerPool
+from compositor import SharedCompositor
+from program_out import ProgramOut
+from latency import resolve_profile
+from glib_qt_integration import run_in_qt
+from command_queue import CommandQueue
+import signal_codec
+from signal_codec import emit_signal
+
+# join-room에서 서버에 알리는 선택 기능 (msgpack 모듈이 없으면 JSON만)
+SIGNAL_FEATURES = ['candidates'] + ([signal_codec.FEATURE] if signal_codec.AVAILABLE else [])
+
+# 시그널링 방: 비디오 월이면 월 멤버 전체가 같은 방 (sender가 멤버마다 연결을 맺음)
+ROOM_NAME = WALL_ID or RECEIVER_NAME
 
 class MultiReceiverManager:
     def __init__(self, ui_window, view_manager=None):
@@ -25,18 +44,55 @@ class MultiReceiverManager:
 
         # 현재 레이아웃에서 어떤 셀에 어떤 sender가 들어가 있는지
         self._cell_assign: dict[int, str] = {}   # cell_index -> sender_id
+        # 마지막으로 받은 셀 위치 (프로그램 출력을 도중에 시작할 때 현재 배치 재현용)
+        self._cell_geom: dict[int, tuple] = {}   # cell_index -> (정규화 rect, layer)
+
+        # 시그널링 서버가 join ack로 알려준 선택 기능 (피어와 같은 set 객체를 공유)
+        self.signal_features: set[str] = set()
+
+        # 공유 컴포지터 모드: 모든 sender가 하나의 파이프라인/싱크를 공유
+        self.compositor = SharedCompositor() if COMPOSITOR_MODE else None
+
+        # 미리 PLAYING 상태로 준비해 둔 PeerReceiver 풀 (sender 입장 즉시 할당)
+        self._pool = PeerPool(PEER_POOL_SIZE, self._new_peer) if PEER_POOL_SIZE > 0 else None
+
+        # 가시성 스케줄러 상태
+        self._visibility_pending = False
+        self._prewarm: set[str] = set()   # 비디오 월: commit 전에 미리 디코드를 켜 둔 sender
 
+        # 녹화: 전체 녹화 여부 + 개별 지정 sender (새로 들어온 sender에도 적용)
+        self._record_all = False
+        self._record_ids: set[str] = set()
+
+        # 프로그램 출력: 현재 배치를 합성해 한 번 인코딩 (program_out.py)
+        self.program = None
+
+        # 지연 프로파일: 새 sender 기본값 + 개별 지정 (latency.py)
+        self._latency_default = LATENCY_PROFILE
+        self._latency_ids: dict[str, str] = {}
+
+        # 적응형 화질: sender별 마지막으로 보낸 힌트
+        self._quality_sent: dict[str, dict] = {}
+        self._quality_pending = False
+
+        # 모든 상태 변경(입장/퇴장/시그널/레이아웃)은 이 큐를 거쳐 GLib 루프에서 순서대로 실행
+        self.commands = CommandQueue("receiver")
         self._bind_socket_events()
 
         if self.view_manager:
             self.view_manager.bind_manager(self)
             self.view_manager.set_senders_provider(self.list_active_senders)
 
-    def _qt(callable_):
-        QtCore.QTimer.singleShot(0, callable_)
-
     def start(self):
         """매니저 시작"""
+        if self.compositor:
+            w = self.ui.ensure_compositor_widget()
+            self.compositor.set_window_handle(int(w.winId()))
+            self.compositor.start()
+        if PROGRAM_OUTPUT:
+            self.start_program(PROGRAM_OUTPUT)
+        if self._pool:
+            self._pool.start()
         threading.Thread(target=self._sio_connect, daemon=True).start()
 
     def stop(self):
@@ -46,6 +102,12 @@ class MultiReceiverManager:
                 peer.stop()
         except:
             pass
+        if self._pool:
+            self._pool.stop()
+        if self.program:
+            self.program.stop()
+        if self.compositor:
+            self.compositor.stop()
         try:
             if self.sio.connected:
                 self.sio.disconnect()
@@ -59,31 +121,230 @@ class MultiReceiverManager:
     def list_active_senders(self):
         return [(sid, p.sender_name) for sid, p in self.peers.items()]
 
-    # ----- 모드 전환/셀 배정 보조 -----
+    # ----- 모드 전환/셀 배정 보조 (Qt 슬롯 → 명령 큐) -----
     def pause_all_streams(self):
-        """(더 이상 사용하지 않음)"""
-        self._cell_assign.clear()
+        """모드 전환 시 셀 배정 초기화 (디코드 중지는 가시성 스케줄러가 지연 반영)"""
+        self.commands.post(self._pause_all_streams)
 
     def assign_sender_to_cell(self, cell_index: int, sender_id: str):
         """특정 셀에 sender 배정"""
+        # 셀 위치는 레이아웃 상태이므로 호출한 Qt 스레드에서 미리 계산
+        rect, layer = None, None
+        if self.view_manager:
+            rect = self.view_manager.cell_rect(cell_index)
+            layer = self.view_manager.cell_zorder(cell_index)
+        self.commands.post(self._assign_sender_to_cell, cell_index, sender_id, rect, layer)
+
+    def unassign_cell(self, cell_index: int):
+        """레이아웃 증분 반영: 셀 배정 해제 (대기 화면은 ViewModeManager가 표시)"""
+        self.commands.post(self._unassign_cell, cell_index)
+
+    def refresh_cells(self, cell_indexes: list):
+        """레이아웃 모양만 바뀐 셀: 재배정/키프레임 없이 위치·화질만 갱신"""
+        rects = {}
+        if self.view_manager:
+            rects = {idx: (self.view_manager.cell_rect(idx), self.view_manager.cell_zorder(idx))
+                     for idx in cell_indexes}
+        self.commands.post(self._refresh_cells, rects)
+
+    def prepare_senders(self, sender_ids: list, done=None):
+        """비디오 월 prepare: 곧 배치될 sender의 디코드를 미리 켜고 done() 호출"""
+        self.commands.post(self._prepare_senders, list(sender_ids), done)
+
+    def end_prewarm(self):
+        """비디오 월 commit 적용 후: 예열 목록 해제 (배치되지 않은 sender는 다시 디코드 중지)"""
+        self.commands.post(self._end_prewarm)
+
+    def start_recording(self, sender_ids=None, done=None):
+        """sender_ids가 None이면 전체(이후 입장하는 sender 포함) 녹화 시작
+
+        done: 적용 후 GLib 루프에서 호출 (MQTT 응답은 여기서 보내야 바뀐 상태가 나감)
+        """
+        self.commands.post(self._start_recording, sender_ids, done)
+
+    def stop_recording(self, sender_ids=None, done=None):
+        """sender_ids가 None이면 전체 녹화 중지"""
+        self.commands.post(self._stop_recording, sender_ids, done)
+
+    def recording_status(self):
+        """MQTT record/response용 상태: 실제 녹화 중인 sender + 요청 상태 (스트림 연결 전이면 요청만 있음)"""
+        return {"senders": sorted(sid for sid, p in list(self.peers.items()) if p.recording),
+                "all": self._record_all, "requested": sorted(self._record_ids), "dir": RECORD_DIR}
+
+    def start_program(self, output, done=None):
+        """프로그램 출력 시작 (이미 출력 중이면 이전 출력을 마무리하고 새 대상으로)"""
+        self.commands.post(self._start_program, output, done)
+
+    def stop_program(self, done=None):
+        self.commands.post(self._stop_program, done)
+
+    def program_status(self):
+        """MQTT program/response용 상태"""
+        program = self.program
+        return {"running": program is not None,
+                "output": program.target if program else None,
+                "encoder": program.encoder if program else None}
+
+    def set_latency_profile(self, profile, sender_ids=None, done=None):
+        """sender_ids가 None이면 기본값을 바꾸고 모든 sender에 적용 (없는 프로파일은 ValueError)"""
+        resolve_profile(profile)
+        self.commands.post(self._set_latency_profile, profile, sender_ids, done)
+
+    def latency_status(self):
+        """MQTT latency/response용 상태"""
+        return {"default": self._latency_default,
+                "senders": {sid: p.latency_profile for sid, p in list(self.peers.items())}}
+
+    def _clear_cell(self, idx: int):
+        """셀 idx의 위젯 비우기 (Qt 스레드에서)"""
+        def _clear():
+            if self.view_manager and 0 <= idx < len(self.view_manager.cells):
+                self.view_manager.cells[idx].clear()
+        run_in_qt(_clear)
+
+    def _pause_all_streams(self):
+        self._cell_assign.clear()
+        if self.compositor:
+            self.compositor.hide_all()
+        if self.program:
+            self.program.hide_all()
+        self._schedule_visibility()
+        self._schedule_quality_update()
+
+    def _prepare_senders(self, sender_ids: list, done):
+        self._prewarm = {sid for sid in sender_ids if sid in self.peers}
+        for sid in self._prewarm:
+            self.peers[sid].set_visible(True)   # 디코드 on + 키프레임 요청
+        if done:
+            done()
+
+    def _end_prewarm(self):
+        self._prewarm.clear()
+        self._schedule_visibility()
+
+    def _start_recording(self, sender_ids, done=None):
+        if sender_ids is None:
+            self._record_all = True
+            sender_ids = list(self.peers)
+        else:
+            self._record_ids.update(sender_ids)
+        for sid in sender_ids:
+            peer = self.peers.get(sid)
+            if peer:
+                peer.start_recording()
+        if done:
+            done()
+
+    def _stop_recording(self, sender_ids, done=None):
+        if sender_ids is None:
+            self._record_all = False
+            self._record_ids.clear()
+            sender_ids = list(self.peers)
+        else:
+            self._record_ids.difference_update(sender_ids)
+        for sid in sender_ids:
+            peer = self.peers.get(sid)
+            if peer:
+                peer.stop_recording()
+        if done:
+            done()
+
+    def _start_program(self, output, done=None):
+        self._open_program(output)
+        if done:
+            done()
+
+    def _open_program(self, output):
+        if self.program:
+            self._stop_program()
+        program = ProgramOut(output, self.compositor)
+        if not program.start():
+            return
+        self.program = program
+        if self.compositor:
+            return   # 공유 컴포지터 출력을 그대로 인코딩
+        for sid, peer in self.peers.items():
+            peer.start_program_tap()
+            program.add_source(sid)
+        for idx, sid in self._cell_assign.items():
+            rect, layer = self._cell_geom.get(idx, (None, None))
+            program.place(sid, rect, layer)
+
+    def _stop_program(self, done=None):
+        program, self.program = self.program, None
+        if program:
+            for peer in self.peers.values():
+                peer.stop_program_tap()
+            program.stop()
+        if done:
+            done()
+
+    def _set_latency_profile(self, profile, sender_ids, done=None):
+        if sender_ids is None:
+            self._latency_default = profile
+            self._latency_ids.clear()
+            sender_ids = list(self.peers)
+        else:
+            self._latency_ids.update((sid, profile) for sid in sender_ids)
+        for sid in sender_ids:
+            peer = self.peers.get(sid)
+            if peer:
+                peer.set_latency_profile(profile)
+        if done:
+            done()
+
+    def _unassign_cell(self, cell_index: int):
+        sid = self._cell_assign.pop(cell_index, None)
+        if sid and sid not in self._cell_assign.values():
+            if self.compositor:
+                self.compositor.hide(sid)
+            if self.program:
+                self.program.hide(sid)
+        self._schedule_visibility()
+        self._schedule_quality_update()
+
+    def _refresh_cells(self, rects: dict):
+        # 네이티브 창은 셀 위젯을 따라 움직이므로 컴포지터/프로그램 믹서 위치만 옮기면 된다
+        for idx, (rect, layer) in rects.items():
+            self._cell_geom[idx] = (rect, layer)
+            sid = self._cell_assign.get(idx)
+            if sid and rect:
+                if self.compositor:
+                    self.compositor.place(sid, rect, layer)
+                if self.program:
+                    self.program.place(sid, rect, layer)
+        self._schedule_quality_update()
+
+    def _assign_sender_to_cell(self, cell_index: int, sender_id: str, rect=None, layer=None):
         if sender_id not in self.peers or not (0 <= cell_index):
             return
         target = self.peers[sender_id]
+        self._cell_geom[cell_index] = (rect, layer)
 
         # 동일 sender가 다른 셀에 있으면 제거
         for idx, sid in list(self._cell_assign.items()):
             if sid == sender_id and idx != cell_index:
-                try:
-                    if self.view_manager and 0 <= idx < len(self.view_manager.cells):
-                        self.view_manager.cells[idx].clear()
-                except Exception:
-                    pass
+                self._clear_cell(idx)
                 self._cell_assign.pop(idx, None)
 
         # 해당 셀의 이전 매핑 제거
         prev_sid = self._cell_assign.get(cell_index)
         if prev_sid and prev_sid != sender_id:
             self._cell_assign.pop(cell_index, None)
+            if self.compositor:
+                self.compositor.hide(prev_sid)
+            if self.program:
+                self.program.hide(prev_sid)
+
+        # 컴포지터 모드: 네이티브 창 재배치 대신 믹서 패드 속성만 갱신
+        if self.compositor:
+            if rect:
+                self.compositor.place(sender_id, rect, layer)
+                self._cell_assign[cell_index] = sender_id
+                target.begin_switch()
+            self._schedule_visibility()
+            self._schedule_quality_update()
+            return
 
         # UI 스레드에서 위젯 배치
         def _ensure_and_put():
@@ -98,191 +359,338 @@ class MultiReceiverManager:
                 if not w.isVisible():
                     w.show()
 
-                GLib.idle_add(target.update_window_from_widget, w)
+                run_in_qt(target.update_window_from_widget, w)
 
                 from config import UI_OVERLAY_DELAY_MS
                 def _rebind():
-                    target.resume_pipeline()       # 항상 재생
                     target._force_overlay_handle()
                     return False
                 GLib.timeout_add(UI_OVERLAY_DELAY_MS, _rebind)
             return False
-        GLib.idle_add(_ensure_and_put)
+        run_in_qt(_ensure_and_put)
 
         # 매핑 갱신
         self._cell_assign[cell_index] = sender_id
+        if self.program:
+            self.program.place(sender_id, rect, layer)
+        # 새 싱크/창이 다음 자연 IDR을 기다리지 않도록 즉시 키프레임 요청
+        target.begin_switch()
+        self._schedule_visibility()
+        self._schedule_quality_update()
+
+    # ----- 가시성 스케줄러 (셀 밖 sender는 디코드 중지) -----
+    def _schedule_visibility(self):
+        """모드 전환 직후 pause→재배정 사이에 디코드를 껐다 켜지 않도록 잠시 모아서 반영"""
+        if self._visibility_pending:
+            return
+        self._visibility_pending = True
+        GLib.timeout_add(VISIBILITY_SETTLE_MS, self._apply_visibility)
+
+    def _apply_visibility(self):
+        self._visibility_pending = False
+        shown = set(self._cell_assign.values()) | self._prewarm
+        for sid, peer in list(self.peers.items()):
+            peer.set_visible(sid in shown)
+        return False
+
+    # ----- 적응형 화질 (셀 크기 → sender 송출 파라미터) -----
+    def _schedule_quality_update(self):
+        """레이아웃 변경이 잦아도 한 번만 계산하도록 지연 실행"""
+        if not QUALITY_ADAPTIVE or self._quality_pending:
+            return
+        self._quality_pending = True
+        # 셀 크기는 위젯 geometry라 Qt 스레드에서 읽고, 비교/전송은 명령 큐에서
+        GLib.timeout_add(QUALITY_UPDATE_DELAY_MS, run_in_qt, self._collect_cell_sizes)
+
+    def _collect_cell_sizes(self):
+        """Qt 스레드: 셀별 물리 픽셀 크기만 모아 명령 큐로 넘김"""
+        cell_sizes = {}
+        if self.view_manager:
+            for idx in range(len(self.view_manager.cells)):
+                size = self.view_manager.cell_pixel_size(idx)
+                if size:
+                    cell_sizes[idx] = size
+        self.commands.post(self._update_quality_hints, cell_sizes)
+        return False
+
+    def _update_quality_hints(self, cell_sizes):
+        self._quality_pending = False
+        sizes = {sid: cell_sizes[idx] for idx, sid in self._cell_assign.items() if idx in cell_sizes}
+
+        for sid, peer in list(self.peers.items()):
+            size = sizes.get(sid)
+            hint = quality_for_size(*size) if size else thumbnail_quality()
+            # 사이멀캐스트 sender: 셀 높이에 맞는 rid 한 층만 켜도록 (셀 밖이면 가장 작은 층)
+            layer = select_layer(size[1] if size else 0, peer.simulcast_rids)
+            if layer:
+                hint["layer"], hint["scale"] = layer
+            if self._quality_sent.get(sid) == hint:
+                continue
+            self._send_quality_hint(sid, hint)
+
+    def _send_quality_hint(self, sid: str, hint: dict):
+        if not self.sio.connected:
+            return
+        self._quality_sent[sid] = hint
+        emit_signal(self.sio, self.signal_features, {
+            'to': sid,
+            'from': self.sio.sid,
+            'type': 'quality',
+            'payload': hint
+        })
+        layer = f", layer {hint['layer']}" if 'layer' in hint else ""
+        print(f"[QUALITY] → {sid}: {hint['width']}x{hint['height']} @ {hint['maxBitrate'] // 1000} kbps{layer}")
 
     # ----- 소켓 연결 -----
     def _sio_connect(self):
         try:
-            self.sio.connect(SIGNALING_URL, transports=['websocket'])
+            # ?room=: 멀티 워커 시그널링에서 같은 방 소켓을 한 워커로 모으는 라우팅 키
+            url = f"{SIGNALING_URL}?room={quote(ROOM_NAME)}"
+            self.sio.connect(url, transports=['websocket'])
             self.sio.wait()
         except Exception as e:
             print("[SIO] connect error:", e)
 
     def _bind_socket_events(self):
+        """Socket.IO 핸들러는 클라이언트 백그라운드 스레드에서 불리므로 명령 큐에 넣기만 한다"""
+        post = self.commands.post
+
         @self.sio.event
         def connect():
             print("[SIO] connected:", self.sio.sid)
             self.sio.emit('join-room',
-                          {'role':'receiver', 'name':RECEIVER_NAME},
-                          callback=lambda ack: print("[SIO] join-room ack:", ack))
+                          {'role':'receiver', 'name':ROOM_NAME, 'wall': bool(WALL_ID),
+                           'features': SIGNAL_FEATURES},
+                          callback=lambda ack: post(self._on_join_ack, ack))
 
         @self.sio.on('sender-list')
         def on_sender_list(sender_arr):
-            print("[SIO] sender-list:", sender_arr)
-            if not sender_arr:
-                return
-
-            if not self.ui._first_sender_connected:
-                self.ui._first_sender_connected = True
-                QtCore.QTimer.singleShot(0, self.ui.enter_sender_mode)
-
-            for s in sender_arr:
-                sid = s.get('id')
-                name = s.get('name', sid)
-                if sid in self.peers:
-                    if sid not in self._order:
-                        self._order.append(sid)
-                    continue
-
-                GLib.idle_add(self.ui.ensure_widget, sid, name)
-
-                peer = PeerReceiver(
-                    self.sio, sid, name, self.ui,
-                    on_ready=None,
-                    on_down=lambda x, reason="ice", **_: self._remove_sender(x, reason=reason)
-                )
-                self.peers[sid] = peer
-                if sid not in self._order:
-                    self._order.append(sid)
-
-                GLib.idle_add(peer.prepare_window_handle)
-
-                peer.start()
-                GLib.idle_add(lambda p=peer: (p._ensure_transceivers(), p._maybe_create_offer()))
-
-                self.sio.emit('share-request', {'to': sid})
-                print(f"[SIO] share-request → {sid} ({name})")
-                
-                self._notify_mqtt_change()  
+            # 전체 목록이므로 처리 전에 여러 번 오면 마지막 것만 반영
+            post(self._on_sender_list, sender_arr, key='sender-list')
 
         @self.sio.on('sender-share-started')
         def on_sender_share_started(data):
-            sid  = data.get('id') or data.get('senderId') or data.get('from')
-            name = data.get('name')
-            if not sid:
-                return
-
-            if sid not in self.peers:
-                _qt(lambda: self.ui.ensure_widget(sid, name or sid))
-                peer = PeerReceiver(
-                    self.sio, sid, name or sid, self.ui,
-                    on_ready=None,
-                    on_down=lambda x, reason="ice", **_: self._remove_sender(x, reason=reason)
-                )
-                self.peers[sid] = peer
-                if sid not in self._order:
-                    self._order.append(sid)
-                _qt(peer.prepare_window_handle)
-                peer.start()
-                _qt(lambda p=peer: (p._ensure_transceivers(), p._maybe_create_offer()))
-
-            peer = self.peers[sid]
-
-            if not self._cell_assign:
-                def _show_now():
-                    w = self.ui.ensure_widget(sid, name or peer.sender_name)
-                    if w and not w.isVisible():
-                        w.show()
-                    self.ui.set_active_sender_name(sid, name or peer.sender_name)
-                    peer.update_window_from_widget(w)
-                    peer.resume_pipeline()  # 항상 PLAYING
-                _qt(_show_now)
-
-                def _enter_single_mode_and_assign():
-                    if self.view_manager and self.view_manager.mode != 1:
-                        self.view_manager.set_mode(1)
-                    def _try_assign():
-                        if not self.view_manager or not self.view_manager.cells:
-                            QtCore.QTimer.singleShot(0, _try_assign)
-                            return
-                        self.assign_sender_to_cell(0, sid)
-                    QtCore.QTimer.singleShot(0, _try_assign)
-
-                QtCore.QTimer.singleShot(50, _enter_single_mode_and_assign)
-            else:
-                peer.resume_pipeline()  # 항상 재생
-
-            print(f"[SIO] sender-share-started: {peer.sender_name}")
+            post(self._on_sender_share_started, data)
 
         @self.sio.on('sender-share-stopped')
         def on_sender_share_stopped(data):
-            sid = data.get('id') or data.get('senderId') or data.get('from')
-            if not sid: 
-                return
-            peer = self.peers.get(sid)
-            if not peer:
-                return
-
-            # 더 이상 pause하지 않음
-
-            for idx, s in list(self._cell_assign.items()):
-                if s == sid:
-                    try:
-                        if self.view_manager and 0 <= idx < len(self.view_manager.cells):
-                            self.view_manager.cells[idx].clear()
-                    except Exception:
-                        pass
-                    self._cell_assign.pop(idx, None)
-
-            GLib.idle_add(self.ui.remove_sender_widget, sid)
-            print(f"[SIO] sender-share-stopped: {peer.sender_name}")
+            post(self._on_sender_share_stopped, data)
 
         @self.sio.on('signal')
         def on_signal(data):
-            typ, frm, payload = data.get('type'), data.get('from'), data.get('payload')
-            print("[SIO] signal recv:", typ, "from", frm)
-            if typ in ('bye', 'hangup', 'close'):
-                if frm:
-                    self._remove_sender(frm, reason=typ)
-                return
-
-            if not frm or frm not in self.peers:
-                print("[SIO] unknown sender in signal:", frm); return
-            peer = self.peers[frm]
-
-            if typ == 'answer' and payload:
-                sdp_text = payload['sdp'] if isinstance(payload, dict) else payload
-                GLib.idle_add(peer.apply_remote_answer, sdp_text)
-            elif typ == 'candidate' and payload:
-                cand  = payload.get('candidate')
-                mline = int(payload.get('sdpMLineIndex') or 0)
-                if cand is not None:
-                    GLib.idle_add(peer.webrtc.emit, 'add-ice-candidate', mline, cand)
+            post(self._on_signal, data)
+
+        @self.sio.on('signal-bin')
+        def on_signal_bin(data):
+            # 디코딩은 소켓 스레드에서 하고 GLib 루프에는 dict만 넘긴다
+            try:
+                msg = signal_codec.unpack(data['data'])
+            except Exception as e:
+                print("[SIO] signal-bin decode failed:", e); return
+            msg['from'] = data.get('from')
+            post(self._on_signal, msg)
 
         @self.sio.on('remove-sender')
         def on_remove_sender(sid):
-            if not sid: return
-            self._remove_sender(sid, reason="server-remove")
+            if sid:
+                post(self._remove_sender, sid, "server-remove")
 
         @self.sio.on('sender-disconnected')
         def on_sender_disconnected(data):
-            sid = data.get('id') or data.get('senderId') or data.get('from')
-            if sid:
-                self._remove_sender(sid, reason="disconnected")
+            post(self._on_sender_gone, data, "disconnected")
 
         @self.sio.on('sender-left')
         def on_sender_left(data):
-            sid = data.get('id') or data.get('senderId') or data.get('from')
-            if sid:
-                self._remove_sender(sid, reason="left")
+            post(self._on_sender_gone, data, "left")
 
         @self.sio.on('room-deleted')
         def on_room_deleted(_=None):
-            print("[SIO] room-deleted → all cleanup")
-            for sid in list(self.peers.keys()):
-                self._remove_sender(sid, reason="room-deleted")
+            post(self._on_room_deleted)
+
+    # ----- 소켓 이벤트 처리 (명령 큐 drain 안에서 실행) -----
+    def _on_join_ack(self, ack):
+        print("[SIO] join-room ack:", ack)
+        self.signal_features.clear()
+        self.signal_features.update((ack or {}).get('features') or [])
+
+    def _on_sender_list(self, sender_arr):
+        print("[SIO] sender-list:", sender_arr)
+        if not sender_arr:
+            return
+
+        if not self.ui._first_sender_connected:
+            self.ui._first_sender_connected = True
+            run_in_qt(self.ui.enter_sender_mode)
+
+        for s in sender_arr:
+            sid = s.get('id')
+            name = s.get('name', sid)
+            if sid in self.peers:
+                if sid not in self._order:
+                    self._order.append(sid)
+                continue
+
+            self._create_peer(sid, name)
+
+            self.sio.emit('share-request', {'to': sid})
+            print(f"[SIO] share-request → {sid} ({name})")
+
+            self._notify_mqtt_change()
+
+    def _on_sender_share_started(self, data):
+        sid  = data.get('id') or data.get('senderId') or data.get('from')
+        name = data.get('name')
+        if not sid:
+            return
+
+        if sid not in self.peers:
+            self._create_peer(sid, name or sid)
+
+        peer = self.peers[sid]
+
+        # 비디오 월은 배치를 월 합의(commit)로만 바꾼다
+        if not self._cell_assign and not WALL_ID:
+            def _show_now():
+                if self.compositor:
+                    return
+                w = self.ui.ensure_widget(sid, name or peer.sender_name)
+                if w and not w.isVisible():
+                    w.show()
+                self.ui.set_active_sender_name(sid, name or peer.sender_name)
+                peer.update_window_from_widget(w)
+                peer.resume_pipeline()  # 항상 PLAYING
+            run_in_qt(_show_now)
+
+            def _enter_single_mode_and_assign():
+                if self.view_manager and self.view_manager.mode != 1:
+                    self.view_manager.set_mode(1)
+                def _try_assign():
+                    if not self.view_manager or not self.view_manager.cells:
+                        QtCore.QTimer.singleShot(0, _try_assign)
+                        return
+                    self.view_manager.assign(0, sid)
+                QtCore.QTimer.singleShot(0, _try_assign)
+
+            # QTimer는 Qt 스레드에서 만들어야 동작한다
+            run_in_qt(QtCore.QTimer.singleShot, 50, _enter_single_mode_and_assign)
+        else:
+            peer.resume_pipeline()  # 항상 재생
+
+        print(f"[SIO] sender-share-started: {peer.sender_name}")
+
+    def _on_sender_share_stopped(self, data):
+        sid = data.get('id') or data.get('senderId') or data.get('from')
+        if not sid:
+            return
+        peer = self.peers.get(sid)
+        if not peer:
+            return
+
+        # 더 이상 pause하지 않음
+
+        for idx, s in list(self._cell_assign.items()):
+            if s == sid:
+                self._clear_cell(idx)
+                self._cell_assign.pop(idx, None)
+        if self.view_manager:
+            run_in_qt(self.view_manager.forget_sender, sid)
+        if self.compositor:
+            self.compositor.hide(sid)
+        if self.program:
+            self.program.hide(sid)
+        self._schedule_visibility()
+
+        run_in_qt(self.ui.remove_sender_widget, sid)
+        print(f"[SIO] sender-share-stopped: {peer.sender_name}")
+
+    def _on_signal(self, data):
+        typ, frm, payload = data.get('type'), data.get('from'), data.get('payload')
+        print("[SIO] signal recv:", typ, "from", frm)
+        if typ in ('bye', 'hangup', 'close'):
+            if frm:
+                self._remove_sender(frm, reason=typ)
+            return
+
+        if not frm or frm not in self.peers:
+            print("[SIO] unknown sender in signal:", frm); return
+        peer = self.peers[frm]
+
+        if typ == 'answer' and payload:
+            sdp_text = payload['sdp'] if isinstance(payload, dict) else payload
+            peer.apply_remote_answer(sdp_text)
+            # 새 연결에는 현재 배치 기준 화질 힌트를 다시 보냄
+            self._quality_sent.pop(frm, None)
+            self._schedule_quality_update()
+        elif typ == 'candidate' and payload:
+            self._add_remote_candidate(peer, payload)
+        elif typ == 'candidates' and payload:
+            for c in payload.get('candidates') or []:
+                self._add_remote_candidate(peer, c)
+            if payload.get('end'):
+                # 빈 후보 = end-of-candidates: webrtcbin이 원격 후보 수집 완료로 보고 ICE 점검을 마무리
+                peer.webrtc.emit('add-ice-candidate', 0, '')
+                print(f"[RTC][{peer.sender_name}] remote end-of-candidates")
+
+    @staticmethod
+    def _add_remote_candidate(peer, c):
+        cand  = c.get('candidate')
+        mline = int(c.get('sdpMLineIndex') or 0)
+        if cand:
+            peer.webrtc.emit('add-ice-candidate', mline, cand)
+
+    def _on_sender_gone(self, data, reason):
+        sid = data.get('id') or data.get('senderId') or data.get('from')
+        if sid:
+            self._remove_sender(sid, reason=reason)
+
+    def _on_room_deleted(self):
+        print("[SIO] room-deleted → all cleanup")
+        for sid in list(self.peers.keys()):
+            self._remove_sender(sid, reason="room-deleted")
+        self._prewarm.clear()
+
+    def _new_peer(self, sid=None, name=None):
+        return PeerReceiver(
+            self.sio, sid, name, self.ui,
+            on_ready=None,
+            on_down=self._on_peer_down,
+            compositor=self.compositor,
+            features=self.signal_features
+        )
+
+    def _on_peer_down(self, sid, reason="ice", **_):
+        self.commands.post(self._remove_sender, sid, reason)
+
+    def _create_peer(self, sid: str, name: str):
+        """sender용 PeerReceiver 준비 (워밍 풀 우선, 없으면 새로 생성)"""
+        if not self.compositor:
+            run_in_qt(self.ui.ensure_widget, sid, name)
+
+        peer = self._pool.acquire(sid, name, on_down=self._on_peer_down) if self._pool else None
+        pooled = peer is not None
+        if not pooled:
+            peer = self._new_peer(sid, name)
+
+        self.peers[sid] = peer
+        if sid not in self._order:
+            self._order.append(sid)
+
+        run_in_qt(peer.prepare_window_handle)
+        profile = self._latency_ids.get(sid, self._latency_default)
+        if peer.latency_profile != profile:
+            peer.set_latency_profile(profile)
+        if self._record_all or sid in self._record_ids:
+            peer.start_recording()   # 스트림이 연결되면 녹화 브랜치를 붙임
+        if self.program and not self.compositor:
+            peer.start_program_tap()
+            self.program.add_source(sid)
+
+        if not pooled:
+            # 풀 피어는 이미 PLAYING + transceiver + offer 준비 완료
+            peer.start()
+            GLib.idle_add(lambda p=peer: (p._ensure_transceivers(), p._maybe_create_offer()))
+        self._schedule_visibility()
+        return peer
 
     def _remove_sender(self, sid: str, reason: str = ""):
         if sid not in self.peers:
@@ -295,22 +703,26 @@ class MultiReceiverManager:
                 peer.stop()
         except:
             pass
+        if self.program:
+            self.program.remove_source(sid)
 
         for idx, s in list(self._cell_assign.items()):
             if s == sid:
-                try:
-                    if self.view_manager and 0 <= idx < len(self.view_manager.cells):
-                        self.view_manager.cells[idx].clear()
-                except Exception:
-                    pass
+                self._clear_cell(idx)
                 self._cell_assign.pop(idx, None)
+        if self.view_manager:
+            run_in_qt(self.view_manager.forget_sender, sid)
 
         try:
             self._order.remove(sid)
         except ValueError:
             pass
+        self._quality_sent.pop(sid, None)
+        self._prewarm.discard(sid)
+        self._record_ids.discard(sid)
+        self._latency_ids.pop(sid, None)
 
-        GLib.idle_add(self.ui.remove_sender_widget, sid)
+        run_in_qt(self.ui.remove_sender_widget, sid)
         self._notify_mqtt_change()     
 
         if not self.peers:
@@ -319,7 +731,7 @@ class MultiReceiverManager:
                 self.ui._stack.setCurrentWidget(self.ui._landing)
                 self.ui.enter_landing_mode()
                 self.ui._first_sender_connected = False 
-            QtCore.QTimer.singleShot(0, _reset_to_landing)
+            run_in_qt(_reset_to_landing)
 
 
 # ---------- 상태 조회 메서드들 ----------
@@ -0,0 +1,176 @@
+# recorder.py
+# sender별 녹화 브랜치: 디코드 전 비트스트림을 tee로 나눠 재인코딩 없이 분할 MP4로 저장
+#
+#   depay → h264parse → tee ─ valve → 디코더 → 싱크            (화면)
+#                           └ queue(leaky) → h264parse → splitmuxsink(mp4mux)   (녹화)
+#
+# parse/mux는 협상된 코덱을 따른다 (H.265/VP9/AV1은 MP4, mp4mux가 받지 않는 VP8은 Matroska).
+#
+# - 녹화 queue는 자기 스레드로 파일을 쓰고, 디스크가 막히면 녹화 쪽의 오래된 버퍼만 버린다
+#   (tee → 화면 경로로 역압이 가지 않음)
+# - 조각은 fragmented MP4라 비정상 종료해도 RECORD_FRAGMENT_MS 이전까지는 재생된다
+# - RECORD_DIR 총량이 RECORD_MAX_BYTES를 넘으면 DiskQuota가 오래된 조각부터 지운다
+
+import os
+import re
+import threading
+import time
+
+import gi
+
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+
+from gst_utils import _make, _set_props_if_supported
+from pipeline_builder import TeeBranch, QUEUE_LEAKY_DOWNSTREAM
+from video_codecs import CODECS
+from config import (RECORD_DIR, RECORD_SEGMENT_S, RECORD_FRAGMENT_MS, RECORD_QUEUE_MS,
+                    RECORD_MAX_BYTES, RECORD_STOP_TIMEOUT_MS)
+
+_UNSAFE = re.compile(r"[^\w.-]+")
+
+# 코덱 → (mux, 조각 확장자)
+_MUXERS = {"VP8": ("matroskamux", ".mkv")}
+_DEFAULT_MUXER = ("mp4mux", ".mp4")
+RECORD_EXTENSIONS = (".mp4", ".mkv")
+
+
+def _safe_name(name):
+    return _UNSAFE.sub("_", name or "").strip("_") or "sender"
+
+
+class DiskQuota:
+    """RECORD_DIR 아래 녹화 조각 총량 제한 (전용 스레드에서 오래된 조각부터 삭제)
+
+    쓰는 중인 조각은 지우지 않는다. 새 조각이 열릴 때마다(opened) 검사를 앞당긴다.
+    """
+
+    def __init__(self, root, max_bytes, interval_s=30.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.interval_s = interval_s
+        self.deleted = 0
+        self._open = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def opened(self, path, previous=None):
+        with self._lock:
+            if previous:
+                self._open.discard(previous)
+            self._open.add(path)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="record-quota", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def closed(self, path):
+        with self._lock:
+            self._open.discard(path)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            try:
+                self.enforce()
+            except Exception as e:
+                print("[REC] quota check failed:", e)
+
+    def enforce(self):
+        if not self.max_bytes:
+            return
+        files = []
+        for dirpath, _, names in os.walk(self.root):
+            for n in names:
+                if n.endswith(RECORD_EXTENSIONS):
+                    p = os.path.join(dirpath, n)
+                    try:
+                        st = os.stat(p)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return
+        files.sort()
+        with self._lock:
+            busy = set(self._open)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path in busy:
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"[REC] delete failed {path}: {e}")
+                continue
+            total -= size
+            self.deleted += 1
+            print(f"[REC] quota: deleted {path} ({size // 1024} KiB)")
+            d = os.path.dirname(path)
+            if d != self.root and not os.listdir(d):
+                os.rmdir(d)
+
+
+disk_quota = DiskQuota(RECORD_DIR, RECORD_MAX_BYTES)
+
+
+class RecordBranch(TeeBranch):
+    """디코드 브랜치 tee의 요청 패드에 붙는 녹화 브랜치 (sender 하나, 녹화 한 번)"""
+
+    def __init__(self, sender_name, codec="H264"):
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.directory = os.path.join(RECORD_DIR, f"{stamp}_{_safe_name(sender_name)}")
+        self.current = None        # 지금 쓰는 조각 경로
+        mux_name, self.extension = _MUXERS.get(codec, _DEFAULT_MUXER)
+
+        queue = _make("queue")
+        # 화면 경로 caps(byte-stream)와 무관하게 mux가 받는 형식(avc/hvc1 등)으로 변환
+        spec = CODECS[codec]
+        parse = _make(spec.parse) if spec.parse else _make("identity")
+        self.sink = _make("splitmuxsink")
+        mux = _make(mux_name)
+        filesink = _make("filesink")
+        ok = all([queue, parse, self.sink, mux, filesink])
+        # 조각이 닫힐 때마다 filesink에 EOS가 오므로 stop() 이후의 EOS만 마무리로 본다
+        super().__init__(sender_name, [queue, parse, self.sink] if ok else [None],
+                         filesink.get_static_pad("sink") if ok else None, RECORD_STOP_TIMEOUT_MS)
+        if not ok:
+            return
+
+        queue.set_property("max-size-buffers", 0)
+        queue.set_property("max-size-bytes", 0)
+        queue.set_property("max-size-time", RECORD_QUEUE_MS * Gst.MSECOND)
+        queue.set_property("leaky", QUEUE_LEAKY_DOWNSTREAM)
+        _set_props_if_supported(parse, config_interval=-1)
+        _set_props_if_supported(mux, fragment_duration=RECORD_FRAGMENT_MS)
+        self.sink.set_property("muxer", mux)
+        self.sink.set_property("sink", filesink)
+        self.sink.set_property("max-size-time", RECORD_SEGMENT_S * Gst.SECOND)
+        # 조각 경계가 자연 IDR을 오래 기다리지 않도록 (tee 업스트림 → webrtcbin PLI)
+        _set_props_if_supported(self.sink, send_keyframe_requests=True)
+        self.sink.connect("format-location", self._on_format_location)
+
+    def attach(self, pipeline, tee):
+        if not self.elements:
+            print(f"[REC][{self.label}] splitmuxsink/mux/parse 없음 → 녹화 불가")
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        if not super().attach(pipeline, tee):
+            return False
+        print(f"[REC][{self.label}] recording → {self.directory}")
+        return True
+
+    def _on_format_location(self, splitmux, fragment_id):
+        path = os.path.join(self.directory, f"{fragment_id:05d}{self.extension}")
+        disk_quota.opened(path, previous=self.current)
+        self.current = path
+        return path
+
+    def on_finished(self):
+        if self.current:
+            disk_quota.closed(self.current)
+        print(f"[REC][{self.label}] recording stopped ({self.current or 'no fragment'})")
@@ -0,0 +1,184 @@
+# signal_codec.py
+# 'signal' 메시지의 압축 바이너리 인코딩 (MessagePack + SDP 줄 템플릿)
+#
+# join-room에서 서버와 "msgpack-v1" 기능을 합의한 클라이언트는 JSON 'signal' 대신
+#   emit('signal-bin', {'to': <sid>, 'data': <bytes>})
+# 를 보내고, 서버는 data를 풀지 않고 {'from': <sid>, 'data': <bytes>}로 그대로 중계한다.
+# 받는 쪽이 msgpack을 모르면 서버가 한 번만 풀어서 JSON 'signal'로 보낸다.
+#
+# data = msgpack([VERSION, type, body])
+#   offer/answer : body = SDP 줄 목록. 각 줄은
+#                    int            → SDP_LINES[i] 와 정확히 같은 줄
+#                    [int, str]     → SDP_PREFIXES[i] + str
+#                    str            → 그대로
+#   candidate    : body = [candidate 줄(위와 같은 방식), sdpMid, sdpMLineIndex, usernameFragment]
+#   candidates   : body = [[candidate...], end]
+#   그 외        : body = payload 그대로
+#
+# 표는 sender/static/js/signalCodec.js 와 순서까지 같아야 한다.
+# 항목을 바꾸면 VERSION을 올린다. 기능 이름에 버전이 들어가므로 버전이 다른 클라이언트는
+# 합의에서 빠지고 JSON으로 주고받는다.
+
+try:
+    import msgpack
+except ImportError:  # 선택 의존성: 없으면 JSON만 사용
+    msgpack = None
+
+VERSION = 1
+FEATURE = f"msgpack-v{VERSION}"
+AVAILABLE = msgpack is not None
+
+# 정확히 일치하는 줄 (webrtcbin / Chrome / Firefox offer·answer에서 흔한 줄)
+SDP_LINES = (
+    "v=0",
+    "s=-",
+    "t=0 0",
+    "c=IN IP4 0.0.0.0",
+    "a=rtcp:9 IN IP4 0.0.0.0",
+    "a=rtcp-mux",
+    "a=rtcp-rsize",
+    "a=sendrecv",
+    "a=sendonly",
+    "a=recvonly",
+    "a=inactive",
+    "a=setup:actpass",
+    "a=setup:active",
+    "a=setup:passive",
+    "a=ice-options:trickle",
+    "a=extmap-allow-mixed",
+    "a=msid-semantic: WMS",
+    "a=msid-semantic:WMS *",
+    "a=end-of-candidates",
+    "a=rtpmap:96 H264/90000",
+    "a=rtpmap:97 rtx/90000",
+    "a=rtpmap:96 VP8/90000",
+    "a=rtpmap:98 VP9/90000",
+    "a=rtpmap:111 opus/48000/2",
+    "a=rtcp-fb:96 nack",
+    "a=rtcp-fb:96 nack pli",
+    "a=rtcp-fb:96 ccm fir",
+    "a=rtcp-fb:96 goog-remb",
+    "a=rtcp-fb:96 transport-cc",
+    "a=fmtp:96 level-asymmetry-allowed=1;packetization-mode=1;profile-level-id=42e01f",
+    "a=fmtp:96 packetization-mode=1;profile-level-id=42e01f;level-asymmetry-allowed=1",
+)
+
+# 접두어 + 나머지
+SDP_PREFIXES = (
+    "a=candidate:",
+    "candidate:",
+    "a=rtpmap:",
+    "a=fmtp:",
+    "a=rtcp-fb:",
+    "a=ssrc:",
+    "a=ssrc-group:FID ",
+    "a=extmap:",
+    "a=mid:",
+    "a=msid:",
+    "a=ice-ufrag:",
+    "a=ice-pwd:",
+    "a=fingerprint:sha-256 ",
+    "a=group:BUNDLE ",
+    "m=video 9 UDP/TLS/RTP/SAVPF ",
+    "m=audio 9 UDP/TLS/RTP/SAVPF ",
+    "m=application 9 UDP/DTLS/SCTP ",
+    "o=- ",
+    "o=mozilla...THIS_IS_SDPARTA-",
+    "c=IN IP4 ",
+    "a=rtcp:",
+    "b=AS:",
+    "b=TIAS:",
+)
+
+_LINE_INDEX = {line: i for i, line in enumerate(SDP_LINES)}
+# 앞 4글자로 후보 접두어를 좁힌다 (긴 접두어 먼저: "a=rtcp-fb:"가 "a=rtcp:"보다 먼저)
+_PREFIX_BUCKETS = {}
+for _i in sorted(range(len(SDP_PREFIXES)), key=lambda i: -len(SDP_PREFIXES[i])):
+    _PREFIX_BUCKETS.setdefault(SDP_PREFIXES[_i][:4], []).append((SDP_PREFIXES[_i], _i))
+
+
+def _pack_line(line):
+    i = _LINE_INDEX.get(line)
+    if i is not None:
+        return i
+    for p, i in _PREFIX_BUCKETS.get(line[:4], ()):
+        if line.startswith(p):
+            return [i, line[len(p):]]
+    return line
+
+
+def _unpack_line(item):
+    if isinstance(item, int):
+        return SDP_LINES[item]
+    if isinstance(item, (list, tuple)):
+        return SDP_PREFIXES[item[0]] + item[1]
+    return item
+
+
+def pack_sdp(sdp):
+    """SDP 텍스트 → 줄 템플릿 목록 (CRLF가 아니면 문자열 그대로)"""
+    if "\r\n" not in sdp:
+        return sdp
+    lines = sdp.split("\r\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    return [_pack_line(l) for l in lines]
+
+
+def unpack_sdp(body):
+    if isinstance(body, str):
+        return body
+    return "".join(_unpack_line(item) + "\r\n" for item in body)
+
+
+def _pack_candidate(c):
+    return [_pack_line(c.get("candidate") or ""), c.get("sdpMid"), c.get("sdpMLineIndex"),
+            c.get("usernameFragment")]
+
+
+def _unpack_candidate(body):
+    line, mid, mline, ufrag = (list(body) + [None] * 4)[:4]
+    c = {"candidate": _unpack_line(line), "sdpMid": mid, "sdpMLineIndex": mline}
+    if ufrag is not None:
+        c["usernameFragment"] = ufrag
+    return c
+
+
+def pack(data):
+    """signal dict({type, payload, ...}) → bytes (to/from은 봉투에 따로 실음)"""
+    typ, payload = data.get("type"), data.get("payload")
+    if typ in ("offer", "answer") and payload:
+        sdp = payload["sdp"] if isinstance(payload, dict) else payload
+        body = pack_sdp(sdp)
+    elif typ == "candidate" and payload:
+        body = _pack_candidate(payload)
+    elif typ == "candidates" and payload:
+        body = [[_pack_candidate(c) for c in payload.get("candidates") or []],
+                bool(payload.get("end"))]
+    else:
+        body = payload
+    return msgpack.packb([VERSION, typ, body], use_bin_type=True)
+
+
+def unpack(blob):
+    """bytes → signal dict({type, payload})"""
+    version, typ, body = msgpack.unpackb(blob, raw=False)
+    if version != VERSION:
+        raise ValueError(f"unsupported signal codec version {version}")
+    if typ in ("offer", "answer") and body is not None:
+        payload = {"type": typ, "sdp": unpack_sdp(body)}
+    elif typ == "candidate" and body is not None:
+        payload = _unpack_candidate(body)
+    elif typ == "candidates" and body is not None:
+        payload = {"candidates": [_unpack_candidate(c) for c in body[0]], "end": bool(body[1])}
+    else:
+        payload = body
+    return {"type": typ, "payload": payload}
+
+
+def emit_signal(sio, features, data):
+    """서버와 msgpack을 합의했으면 'signal-bin', 아니면 JSON 'signal'로 전송"""
+    if AVAILABLE and FEATURE in features:
+        sio.emit("signal-bin", {"to": data.get("to"), "data": pack(data)})
+    else:
+        sio.emit("signal", data)
@@ -0,0 +1,98 @@
+# simulcast.py
+# 사이멀캐스트 층 협상 + 셀 크기별 층 선택
+#
+# receiver가 offerer라 sender(브라우저)가 rid 층을 만들려면 offer에 a=rid/a=simulcast:recv가 있어야 한다.
+#   - 시그널링으로 보내는 offer 텍스트에만 층을 덧붙이고, webrtcbin 로컬 description은 그대로 둔다
+#   - answer의 rid/simulcast 줄은 webrtcbin에 넘기기 전에 떼어내고 sender가 받아들인 rid만 기억한다
+# 층 전환은 quality 시그널의 layer 값으로 sender가 그 rid 인코딩만 active로 두는 방식이라
+# 재협상 없이 바뀌고, 디코더에는 항상 한 층(SSRC 하나)만 들어온다.
+# 층마다 생기는 webrtcbin 패드는 떼지 않고 모두 funnel로 모아 디코드 브랜치에 넣는다 (peer_receiver).
+# sender가 사이멀캐스트를 거절하면(rid 없음) 기존 scaleResolutionDownBy 힌트로 동작한다.
+# 기본은 꺼져 있다 (MULTIPY_SIMULCAST=1, 층 전환 확인은 bench/simulcast_switch.py).
+
+import re
+
+from config import SIMULCAST_LAYERS
+
+_MID_EXT = "urn:ietf:params:rtp-hdrext:sdes:mid"
+_RID_EXT = "urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id"
+_EXTMAP = re.compile(r"^a=extmap:(\d+)(?:/\w+)? (\S+)")
+
+
+def _sections(sdp):
+    """SDP 텍스트 → [세션 줄들, m=섹션 줄들, ...]"""
+    sections = [[]]
+    for line in sdp.splitlines():
+        if line.startswith("m="):
+            sections.append([])
+        if line:
+            sections[-1].append(line)
+    return sections
+
+
+def _join(sections):
+    return "\r\n".join(line for s in sections for line in s) + "\r\n"
+
+
+def offer_with_layers(sdp, layers=SIMULCAST_LAYERS):
+    """offer SDP의 video 섹션에 rid 층 광고를 덧붙임
+
+    Returns:
+        (보낼 offer 텍스트, 새로 넣은 extmap URI 목록 — answer에서 다시 떼어낼 것)
+    """
+    sections = _sections(sdp)
+    added = []
+    for section in sections[1:]:
+        if not section[0].startswith("m=video"):
+            continue
+        exts = {m.group(2): int(m.group(1)) for m in map(_EXTMAP.match, section) if m}
+        free = (i for i in range(1, 15) if i not in exts.values())
+        for uri in (_MID_EXT, _RID_EXT):
+            if uri not in exts:
+                section.append(f"a=extmap:{next(free)} {uri}")
+                added.append(uri)
+        section.extend(f"a=rid:{rid} recv" for rid, _, _ in layers)
+        section.append("a=simulcast:recv " + ";".join(rid for rid, _, _ in layers))
+        break   # 수신 transceiver는 하나
+    return _join(sections), added
+
+
+def strip_answer(sdp, added_exts=()):
+    """answer SDP에서 사이멀캐스트 줄 제거
+
+    Returns:
+        (webrtcbin에 적용할 answer 텍스트, sender가 보내기로 한 rid 튜플 — 거절했으면 빈 튜플)
+    """
+    rids = ()
+    sections = _sections(sdp)
+    for section in sections[1:]:
+        kept = []
+        for line in section:
+            if line.startswith("a=simulcast:send "):
+                # "h;m;~l" / "h,m;l": ~는 일시 정지, ','는 대체 층 (첫 번째만 사용)
+                alts = line.split(" ", 1)[1].split(" ")[0].split(";")
+                rids = tuple(a.split(",")[0] for a in alts if not a.startswith("~"))
+                continue
+            if line.startswith("a=rid:"):
+                continue
+            m = _EXTMAP.match(line)
+            if m and m.group(2) in added_exts:
+                continue
+            kept.append(line)
+        section[:] = kept
+    return _join(sections), rids
+
+
+def select_layer(cell_height, rids, layers=SIMULCAST_LAYERS):
+    """셀 높이(px, 셀 밖이면 0) → (rid, 축소 배율), sender가 받아들인 층 중에서
+
+    큰 층부터 최소 셀 높이를 만족하는 첫 층, 없으면 받아들인 층 중 가장 작은 층.
+    """
+    chosen = None
+    for rid, scale, min_height in layers:
+        if rid not in rids:
+            continue
+        chosen = (rid, scale)
+        if cell_height >= min_height:
+            break
+    return chosen
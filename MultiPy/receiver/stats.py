@@ -0,0 +1,135 @@
+# stats.py
+# sender별 수신 통계 링버퍼와 조회 API
+
+import threading
+import time
+from collections import deque
+
+import gi
+
+gi.require_version('GstWebRTC', '1.0')
+from gi.repository import GstWebRTC
+
+from config import STATS_HISTORY
+
+# webrtcbin inbound-rtp 통계에서 가져올 필드 (GStreamer 이름 → 내부 키)
+_INBOUND_FIELDS = {
+    "packets-received": "packets_received",
+    "bytes-received": "bytes_received",
+    "packets-lost": "packets_lost",
+    "jitter": "jitter",
+    "nack-count": "nack_count",
+    "pli-count": "pli_count",
+    "fir-count": "fir_count",
+}
+
+
+def parse_inbound_rtp(reply):
+    """webrtcbin 'get-stats' 응답에서 inbound-rtp 누적값 추출 (여러 SSRC면 합산)"""
+    out = {}
+    if reply is None:
+        return out
+    for i in range(reply.n_fields()):
+        s = reply.get_value(reply.nth_field_name(i))
+        try:
+            if s.get_value("type") != GstWebRTC.WebRTCStatsType.INBOUND_RTP:
+                continue
+        except Exception:
+            continue
+        for gst_name, key in _INBOUND_FIELDS.items():
+            if not s.has_field(gst_name):
+                continue
+            v = s.get_value(gst_name)
+            if key == "jitter":
+                out[key] = max(out.get(key, 0.0), float(v))
+            else:
+                out[key] = out.get(key, 0) + int(v)
+    return out
+
+
+class PeerStats:
+    """sender 하나의 통계 링버퍼
+
+    샘플은 STATS 주기마다 하나씩 쌓이는 dict:
+    ts, fps, avg_fps, drop_rate, bitrate_mbps, width, height, jitter_ms,
+    packets_lost, loss_rate, nack_count, pli_count, fir_count, decode_latency_ms,
+    switch_latency_ms (해당 구간에 셀 전환이 끝났을 때만),
+    glass_latency_ms, glass_latency_max_ms (LATENCY_PROBE + 시간 코드 스트림일 때만)
+    """
+
+    def __init__(self, sender_id, maxlen=STATS_HISTORY):
+        self.sender_id = sender_id
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._prev = None  # (monotonic ts, inbound 누적값)
+
+    def update(self, inbound, **fields):
+        """누적 RTP 카운터를 구간 값(비트레이트/손실률)으로 바꿔 샘플 추가"""
+        now = time.monotonic()
+        sample = {"ts": time.time(), **fields}
+
+        if inbound:
+            sample["jitter_ms"] = inbound.get("jitter", 0.0) * 1000.0
+            for key in ("packets_lost", "nack_count", "pli_count", "fir_count"):
+                sample[key] = inbound.get(key, 0)
+            if self._prev:
+                t0, prev = self._prev
+                dt = max(now - t0, 1e-6)
+                dbytes = inbound.get("bytes_received", 0) - prev.get("bytes_received", 0)
+                drecv = inbound.get("packets_received", 0) - prev.get("packets_received", 0)
+                dlost = inbound.get("packets_lost", 0) - prev.get("packets_lost", 0)
+                sample["bitrate_mbps"] = max(dbytes, 0) * 8 / dt / 1e6
+                sample["loss_rate"] = dlost / (drecv + dlost) if (drecv + dlost) > 0 else 0.0
+            self._prev = (now, inbound)
+
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def latest(self):
+        with self._lock:
+            return dict(self._samples[-1]) if self._samples else {}
+
+    def history(self, n=None):
+        with self._lock:
+            items = list(self._samples)
+        return items[-n:] if n else items
+
+
+class StatsRegistry:
+    """모든 sender 통계의 단일 조회 지점"""
+
+    def __init__(self):
+        self._peers = {}
+        self._lock = threading.Lock()
+
+    def register(self, sender_id):
+        with self._lock:
+            ps = self._peers.get(sender_id)
+            if ps is None:
+                ps = self._peers[sender_id] = PeerStats(sender_id)
+            return ps
+
+    def unregister(self, sender_id):
+        with self._lock:
+            self._peers.pop(sender_id, None)
+
+    def get(self, sender_id):
+        """sender의 최신 샘플 (없으면 빈 dict)"""
+        with self._lock:
+            ps = self._peers.get(sender_id)
+        return ps.latest() if ps else {}
+
+    def history(self, sender_id, n=None):
+        with self._lock:
+            ps = self._peers.get(sender_id)
+        return ps.history(n) if ps else []
+
+    def snapshot(self):
+        """{sender_id: 최신 샘플}"""
+        with self._lock:
+            peers = list(self._peers.items())
+        return {sid: ps.latest() for sid, ps in peers}
+
+
+stats_registry = StatsRegistry()
@@ -28,6 +28,8 @@ class ReceiverWindow(QtWidgets.QMainWindow):
         self._widgets = {}
         self._names = {}
         self._current_sender_id = None
+        self._compositor_widget = None
+        self._overlays = []   # [(Tile, Cell)] 그리드 밖 PiP 셀
 
         self.setFocusPolicy(QtCore.Qt.StrongFocus)
 
@@ -56,6 +58,7 @@ class ReceiverWindow(QtWidgets.QMainWindow):
         self._main.addWidget(self._stack_container)
         self._main.addWidget(self._grid_container)
         self._main.setCurrentIndex(0)  # 기본: 단일 모드
+        self._grid_container.installEventFilter(self)
 
 
         self._setup_shortcuts()
@@ -204,7 +207,8 @@ class ReceiverWindow(QtWidgets.QMainWindow):
         """stack <-> grid 전환 (레이아웃 파괴 금지)"""
         self._main.setCurrentIndex(1 if use_grid else 0)
 
-    def apply_layout(self, mode: int, cells: list[Cell]):
+    def apply_layout(self, spec, cells: list[Cell]):
+        """LayoutSpec 배치: 그리드 칸은 QGridLayout(span 포함), PiP은 그리드 위에 절대 위치"""
         self.set_mode(True)
 
         # 레이아웃만 비우기 (부모/위젯 파괴 금지)
@@ -214,29 +218,60 @@ class ReceiverWindow(QtWidgets.QMainWindow):
             if w:
                 self._grid.removeWidget(w)
 
-        # 보기 좋게 늘리기
-        self._grid.setRowStretch(0, 1)
-        self._grid.setRowStretch(1, 1)
-        self._grid.setColumnStretch(0, 1)
-        self._grid.setColumnStretch(1, 1)
-
-        if mode == 1 and cells:
-            self._grid.addWidget(cells[0], 0, 0, 2, 2)  # 창 꽉 채움
-        elif mode == 2 and len(cells) >= 2:
-            self._grid.addWidget(cells[0], 0, 0, 2, 1)
-            self._grid.addWidget(cells[1], 0, 1, 2, 1)
-        elif mode == 3 and len(cells) >= 3:
-            self._grid.addWidget(cells[0], 0, 0, 2, 1)
-            self._grid.addWidget(cells[1], 0, 1, 1, 1)
-            self._grid.addWidget(cells[2], 1, 1, 1, 1)
-            self._grid.setColumnStretch(0, 1)
-            self._grid.setColumnStretch(1, 1)
-            self._grid.setRowStretch(0, 1)
-            self._grid.setRowStretch(1, 1)
-        elif mode == 4:
-            for i, cell in enumerate(cells[:4]):
-                r, c = divmod(i, 2)
-                self._grid.addWidget(cell, r, c)
+        # 이전 배치의 행/열 비율 초기화 후 균등 분할
+        for r in range(max(self._grid.rowCount(), spec.rows)):
+            self._grid.setRowStretch(r, 1 if r < spec.rows else 0)
+        for c in range(max(self._grid.columnCount(), spec.cols)):
+            self._grid.setColumnStretch(c, 1 if c < spec.cols else 0)
+
+        self._overlays = []
+        for tile, cell in zip(spec.tiles, cells):
+            if tile.grid:
+                self._grid.addWidget(cell, *tile.grid)
+            else:
+                cell.setParent(self._grid_container)
+                self._overlays.append((tile, cell))
+        self._place_overlays()
+
+        # 공유 컴포지터 출력은 PiP 셀보다도 위
+        if self._compositor_widget is not None:
+            self._compositor_widget.raise_()
+
+    def _place_overlays(self):
+        cw, ch = self._grid_container.width(), self._grid_container.height()
+        for tile, cell in self._overlays:   # 나중 PiP가 위
+            cell.setGeometry(int(tile.x * cw), int(tile.y * ch), int(tile.w * cw), int(tile.h * ch))
+            cell.raise_()
+
+    def canvas_pixel_size(self):
+        """셀 그리드 영역의 물리 픽셀 크기 (w, h)"""
+        w = self._grid_container if self._grid_container.width() > 0 else self
+        dpr = w.devicePixelRatioF()
+        return int(w.width() * dpr), int(w.height() * dpr)
+
+    def ensure_compositor_widget(self):
+        """공유 컴포지터 출력용 네이티브 위젯 (그리드 전체를 덮음)"""
+        w = self._compositor_widget
+        if w is None:
+            w = QtWidgets.QWidget(self._grid_container)
+            w.setObjectName("video-compositor")
+            w.setFocusPolicy(QtCore.Qt.NoFocus)
+            w.setAttribute(QtCore.Qt.WA_NativeWindow, True)
+            w.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents, True)
+            _ = w.winId()  # 핸들 실체화
+            self._compositor_widget = w
+        w.setGeometry(self._grid_container.rect())
+        w.show()
+        w.raise_()
+        return w
+
+    def eventFilter(self, obj, event):
+        # 컴포지터 위젯/PiP 셀이 그리드 크기를 따라가도록
+        if obj is self._grid_container and event.type() == QtCore.QEvent.Resize:
+            if self._compositor_widget is not None:
+                self._compositor_widget.setGeometry(self._grid_container.rect())
+            self._place_overlays()
+        return super().eventFilter(obj, event)
 
     def _setup_shortcuts(self):
         shortcuts = [
@@ -0,0 +1,69 @@
+# video_codecs.py
+# 수신 코덱 표: RTP encoding-name → depay/parse/디코더 후보, 프로브 샘플 인코더, transceiver caps
+#
+# 시작 시 gst_utils.probe_capabilities()가 코덱마다 디코더를 골라 샘플 디코드 비용을 재고,
+# 비용이 싼 순서대로 offer에 넣는다 (sender는 offer 순서대로 코덱을 고른다).
+
+from collections import namedtuple
+
+from config import H264_PROFILES
+
+# depay/parse: 팩토리 이름 (parse가 없으면 None)
+# parsed_caps: parse 출력 형식 (디코더 프로브 appsrc caps)
+# encoders: 프로브 샘플용 인코더 후보와 빠른 설정 (Gst.util_set_object_arg 문자열 값)
+# software: 소프트웨어 디코더 (하드웨어 디코더가 없을 때, PROFILE_SOFTWARE)
+# fmtp: offer에 넣을 payload별 추가 caps 필드 (여러 개면 같은 코덱을 payload 여러 개로)
+CodecSpec = namedtuple("CodecSpec", "name depay parse parsed_caps encoders software fmtp")
+
+CODECS = {
+    "H264": CodecSpec(
+        "H264", "rtph264depay", "h264parse", "video/x-h264,stream-format=byte-stream,alignment=au",
+        (("x264enc", {"speed-preset": "ultrafast", "tune": "zerolatency"}),
+         ("openh264enc", {}), ("avenc_h264", {})),
+        ("avdec_h264",),
+        tuple({"packetization-mode": "1", "profile-level-id": p} for p in H264_PROFILES)),
+    "H265": CodecSpec(
+        "H265", "rtph265depay", "h265parse", "video/x-h265,stream-format=byte-stream,alignment=au",
+        (("x265enc", {"speed-preset": "ultrafast", "tune": "zerolatency"}),),
+        ("avdec_h265",), ()),
+    "VP8": CodecSpec(
+        "VP8", "rtpvp8depay", None, "video/x-vp8",
+        (("vp8enc", {"deadline": "1", "cpu-used": "16"}),),
+        ("vp8dec",), ()),
+    "VP9": CodecSpec(
+        "VP9", "rtpvp9depay", "vp9parse", "video/x-vp9",
+        (("vp9enc", {"deadline": "1", "cpu-used": "8"}),),
+        ("vp9dec",), ({"profile-id": "0"},)),
+    "AV1": CodecSpec(
+        "AV1", "rtpav1depay", "av1parse", "video/x-av1,stream-format=obu-stream,alignment=tu",
+        (("svtav1enc", {"preset": "12"}), ("rav1enc", {"speed-preset": "10"}),
+         ("av1enc", {"cpu-used": "8", "usage-profile": "realtime"})),
+        ("dav1ddec", "av1dec"), ()),
+}
+
+# 샘플을 만들 인코더가 없을 때 쓰는 프레임당 디코드 비용 추정 (ms, 640x360 기준)
+ESTIMATED_COST_MS = {"H264": 1.0, "VP8": 1.2, "H265": 2.0, "VP9": 2.0, "AV1": 3.0}
+HARDWARE_COST_FACTOR = 0.25
+
+
+def codec_from_caps(structure):
+    """webrtcbin src 패드 caps 구조체 → CODECS 키 (모르는 코덱이면 None)"""
+    name = (structure.get_value("encoding-name") or "").upper()
+    return name if name in CODECS else None
+
+
+def is_software(codec, factory):
+    return factory in CODECS[codec].software
+
+
+def transceiver_caps(order):
+    """수신 transceiver caps: order 순서대로 payload 96부터 (코덱/fmtp 조합마다 하나)"""
+    structs, pt = [], 96
+    for name in order:
+        spec = CODECS[name]
+        for fmtp in spec.fmtp or ({},):
+            extra = "".join(f",{k}=(string){v}" for k, v in fmtp.items())
+            structs.append(f"application/x-rtp,media=video,encoding-name={name},"
+                           f"clock-rate=90000,payload={pt}{extra}")
+            pt += 1
+    return ";".join(structs)
@@ -3,6 +3,8 @@
 
 from PyQt5 import QtCore, QtWidgets, QtGui
 from ui_components import ReceiverWindow, Cell
+from layout_spec import LayoutSpec, parse_layout
+from config import COMPOSITOR_MODE, NATIVE_TILE_LIMIT, LAYOUT_MAX_TILES
 
 
 class ViewModeManager(QtCore.QObject):
@@ -11,12 +13,17 @@ class ViewModeManager(QtCore.QObject):
     # 시그널: 모드 전환 시 전체 pause, 특정 셀에 sender 할당 요청
     requestPauseAll = QtCore.pyqtSignal()
     requestAssign = QtCore.pyqtSignal(int, str)  # (cell_index, sender_id)
+    # 시그널: 레이아웃 증분 반영 시 셀 비우기, 위치/크기만 바뀐 셀 갱신
+    requestUnassign = QtCore.pyqtSignal(int)     # cell_index
+    requestRefresh = QtCore.pyqtSignal(list)     # [cell_index, ...]
 
     def __init__(self, ui: ReceiverWindow):
         super().__init__()
         self.ui = ui
-        self.mode: int | None = None    # 분할 모드 (1-4)
-        self.cells: list[Cell] = []     # 셀 목록
+        self.mode = None                # screen/update의 layout 값 (프리셋 1-4, "3x3", dict)
+        self.layout: LayoutSpec | None = None   # mode를 해석한 셀 배치
+        self.cells: list[Cell] = []     # 셀 목록 (현재 모드에서 보이는 셀)
+        self._cell_pool: list[Cell] = []  # 재사용 셀 (인덱스 고정, 최대 셀 수만큼만 생성)
         self.focus_index: int = 0       # 현재 포커스된 셀
         self.cell_assignments: dict[int, str] = {}  # {cell_index: sender_id, ... ,cell_index: sender_id}
         self.active_senders: list[str] = []         # 현재 표시 중인 sender들 [sender_id, sender_id, sender_id] 
@@ -33,6 +40,8 @@ class ViewModeManager(QtCore.QObject):
         self._manager = manager
         self.requestPauseAll.connect(self._manager.pause_all_streams)
         self.requestAssign.connect(self._manager.assign_sender_to_cell)
+        self.requestUnassign.connect(self._manager.unassign_cell)
+        self.requestRefresh.connect(self._manager.refresh_cells)
 
     def set_senders_provider(self, provider_fn):
         """provider_fn() -> list[(sender_id, sender_name)]"""
@@ -56,52 +65,145 @@ class ViewModeManager(QtCore.QObject):
         
         try:
             # 레이아웃 모드와 참가자 정보 추출
-            layout_mode = layout_data.get('layout', 1)
+            spec = parse_layout(layout_data.get('layout', 1))
+            if not self._fits_renderer(spec):
+                return
             participants = layout_data.get('participants', [])
             
-            print(f"[DEBUG] 레이아웃 모드: {layout_mode}, 참가자 수: {len(participants)}")
+            print(f"[DEBUG] 레이아웃: {spec}, 참가자 수: {len(participants)}")
             
-            # 기존 상태 정리
-            self.cell_assignments.clear()
-            self.active_senders.clear()
-
-            # 모드 설정
-            self.set_mode(layout_mode)
-
-            # 참가자들을 각 셀에 할당
-            self._assign_participants(participants)
+            # 현재 상태와 비교해 바뀐 셀만 반영
+            self._reconcile(spec, participants)
             
         except Exception as e:
             print(f"[ERROR] apply_layout_data 처리 중 오류: {e}")
             # 오류 시 기본 모드로 설정
             self.set_mode(1)
 
-    def _assign_participants(self, participants: list):
-        """참가자들을 생성된 셀들에 순서대로 할당"""
-        print(f"[DEBUG] _assign_participants 호출: {participants}")
-        
-        if not self.cells:
-            print("[WARNING] 셀이 생성되지 않았습니다")
+    def _reconcile(self, spec: LayoutSpec, participants: list):
+        """
+        screen/update 배치를 현재 상태와 비교해 최소 변경만 적용
+        - 그대로인 셀: 위젯/네이티브 창/싱크 유지 (모드가 바뀌면 위치·크기만 갱신)
+        - 비워진 셀: 배정 해제 + 대기 화면
+        - 새로/다르게 배정된 셀: 배정 요청 (다른 셀에서 옮겨 오는 경우 포함)
+        """
+        count = len(spec)
+        if len(participants) > count:
+            print(f"[WARNING] 참가자가 셀 수보다 많습니다. {count}명까지만 배치합니다")
+        target = {}
+        for idx, participant in enumerate(participants[:count]):
+            if participant.get('id'):
+                target[idx] = participant['id']
+
+        current = dict(self.cell_assignments)
+        changed = sorted(idx for idx in set(current) | set(target)
+                         if current.get(idx) != target.get(idx))
+        mode_changed = spec != self.layout or len(self.cells) != count
+
+        if not changed and not mode_changed:
+            print("[LAYOUT] 변경 없음")
             return
-        
-        # 각 참가자를 셀에 할당
-        for idx, participant in enumerate(participants):
-            if idx >= len(self.cells):
-                print(f"[WARNING] 참가자가 셀 수보다 많습니다. 인덱스 {idx}는 건너뜁니다")
-                break
-                
-            sender_id = participant.get('id')
-            sender_name = participant.get('name')
-            
-            if sender_id:
-                print(f"[DEBUG] 셀 {idx}에 {sender_name}({sender_id}) 할당")
-                
-                # 상태 정보 업데이트
-                self.cell_assignments[idx] = sender_id
-                self.active_senders.append(sender_id)
-                
-                # 실제 할당 요청
-                self.requestAssign.emit(idx, sender_id)
+
+        # 1) 바뀌는 셀의 기존 배정 해제 (옮겨 가는 sender도 먼저 풀어야 새 셀 배정이 깔끔함)
+        for idx in changed:
+            if idx in current:
+                del self.cell_assignments[idx]
+                self.requestUnassign.emit(idx)
+
+        # 2) 셀 수/배치만 맞춤 (남는 셀은 재사용)
+        if mode_changed:
+            self._reshape(spec)
+
+        # 3) 비워진 셀은 대기 화면, 새 배정은 요청
+        for idx in changed:
+            sid = target.get(idx)
+            if sid is None:
+                if idx < len(self.cells):
+                    self.cells[idx].show_placeholder()
+                continue
+            self.assign(idx, sid)
+
+        # 4) 모드만 바뀐 셀은 위치/크기 갱신
+        unchanged = [idx for idx in sorted(target) if idx not in changed]
+        if mode_changed and unchanged:
+            self.requestRefresh.emit(unchanged)
+
+        self.active_senders = [target[idx] for idx in sorted(target)]
+        print(f"[LAYOUT] {spec}{' (changed)' if mode_changed else ''} "
+              f"changed={changed} kept={unchanged}")
+
+    def assign(self, cell_index: int, sender_id: str):
+        """셀 배정 요청 + cell_assignments 기록 (screen/update 증분 비교의 기준)
+
+        매니저처럼 한 sender는 한 셀에만 두므로 다른 셀의 같은 sender 기록은 지운다.
+        """
+        for idx, sid in list(self.cell_assignments.items()):
+            if sid == sender_id and idx != cell_index:
+                del self.cell_assignments[idx]
+        self.cell_assignments[cell_index] = sender_id
+        self.active_senders = [self.cell_assignments[i] for i in sorted(self.cell_assignments)]
+        self.requestAssign.emit(cell_index, sender_id)
+
+    def forget_sender(self, sender_id: str):
+        """sender가 나가 매니저가 셀을 비웠을 때 기록도 정리"""
+        for idx, sid in list(self.cell_assignments.items()):
+            if sid == sender_id:
+                del self.cell_assignments[idx]
+        if sender_id in self.active_senders:
+            self.active_senders.remove(sender_id)
+
+    def _reshape(self, spec: LayoutSpec):
+        """셀 수만 spec에 맞추고 그리드 재배치 (기존 셀·안의 위젯은 그대로)"""
+        self._layout_cells(spec)
+        if not (0 <= self.focus_index < len(spec)):
+            self.focus_index = 0 if self.cells else -1
+
+    @staticmethod
+    def _fits_renderer(spec: LayoutSpec) -> bool:
+        """컴포지터 없이(셀마다 네이티브 창/파이프라인) NATIVE_TILE_LIMIT를 넘는 배치는 거부"""
+        if len(spec) > NATIVE_TILE_LIMIT and not COMPOSITOR_MODE:
+            print(f"[LAYOUT] 셀 {len(spec)}개 배치 거부: 네이티브 창 모드는 {NATIVE_TILE_LIMIT}셀까지 "
+                  f"(MULTIPY_COMPOSITOR=1로 실행하면 {LAYOUT_MAX_TILES}셀까지)")
+            return False
+        return True
+
+    def _layout_cells(self, spec: LayoutSpec):
+        """풀에서 앞쪽 셀들을 꺼내 배치 (부족할 때만 생성, 남는 셀은 비우고 숨김)"""
+        mode = len(spec)
+        self.layout, self.mode = spec, spec.source
+        while len(self._cell_pool) < mode:
+            cell = Cell()
+            cell.clicked.connect(lambda i=len(self._cell_pool): self._set_focus(i))
+            self._cell_pool.append(cell)
+        for cell in self._cell_pool[mode:]:
+            if cell.content() is not cell.placeholder:
+                cell.show_placeholder()   # 영상 위젯 분리
+            cell.hide()
+        self.cells = self._cell_pool[:mode]
+        self.ui.apply_layout(spec, self.cells)
+        for cell in self.cells:
+            cell.show()
+
+    def cell_rect(self, idx: int):
+        """셀 idx의 정규화 사각형 (x, y, w, h) — 공유 컴포지터 배치용"""
+        if not self.layout or not (0 <= idx < len(self.cells)):
+            return None
+        t = self.layout.tiles[idx]
+        return (t.x, t.y, t.w, t.h)
+
+    def cell_zorder(self, idx: int) -> int:
+        """셀 idx의 겹침 순서 (0=그리드, PiP은 1부터 위로)"""
+        if not self.layout or not (0 <= idx < len(self.cells)):
+            return 0
+        return self.layout.tiles[idx].z
+
+    def cell_pixel_size(self, idx: int):
+        """셀 idx가 화면에서 차지하는 물리 픽셀 크기 (w, h)"""
+        rect = self.cell_rect(idx)
+        if not rect:
+            return None
+        cw, ch = self.ui.canvas_pixel_size()
+        return int(rect[2] * cw), int(rect[3] * ch)
 
     def _setup_shortcuts(self):
         # ✅ 메인 윈도우(self.ui)를 부모로 해야 전역 단축키처럼 동작
@@ -129,30 +231,21 @@ class ViewModeManager(QtCore.QObject):
                 return True
         return super().eventFilter(obj, event)
 
-    def set_mode(self, mode: int):
+    def set_mode(self, mode):
+        """mode: 프리셋 1-4 또는 layout_spec.parse_layout이 받는 값"""
         print(f"[DEBUG] set_mode called: {mode}")
-        self.mode = mode
+        spec = parse_layout(mode)
+        if not self._fits_renderer(spec):
+            return
+        # 전체 재구성: 배정도 매니저(requestPauseAll)와 함께 초기화
+        self.cell_assignments.clear()
+        self.active_senders.clear()
 
         # 전체 pause (지금 활성 재생을 잠깐 멈춤)
         self.requestPauseAll.emit()
 
-        # 기존 셀 정리
-        for c in self.cells:
-            try:
-                c.clear()
-                c.setParent(None)
-                c.deleteLater()
-            except Exception:
-                pass
-        self.cells.clear()
-
-        # 새 셀 생성
-        self.cells = [Cell() for _ in range(mode)]
-        for idx, cell in enumerate(self.cells):
-            cell.clicked.connect(lambda i=idx: self._set_focus(i))
-
-        # Grid 재배치
-        self.ui.apply_layout(mode, self.cells)
+        # 셀 재사용 + Grid 재배치
+        self._layout_cells(spec)
         self._set_focus(0 if self.cells else -1)
 
         # 다시 한 번 전체 pause (레이아웃 전환 직후 상태 수립)
@@ -160,41 +253,10 @@ class ViewModeManager(QtCore.QObject):
 
     def _set_focus(self, idx: int):
         self.focus_index = idx
+        # 배정되지 않은 셀만 대기 화면 (영상이 나오는 셀은 그대로)
         for i, cell in enumerate(self.cells):
-            cell.setStyleSheet("""
-                QFrame {
-                    background: white;
-                    border: 1px solid black;
-                }
-            """)
-            placeholder = QtWidgets.QWidget(cell)
-            placeholder.setStyleSheet("background: transparent; border: none;")
-            layout = QtWidgets.QVBoxLayout(placeholder)
-            layout.setContentsMargins(0, 0, 0, 0)
-            layout.setAlignment(QtCore.Qt.AlignCenter)
-
-            # 아이콘 (PNG 불러오기)
-            icon_label = QtWidgets.QLabel()
-            pixmap = QtGui.QPixmap("icons/person.png").scaled(90, 90, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
-            icon_label.setPixmap(pixmap)
-            icon_label.setAlignment(QtCore.Qt.AlignCenter)
-
-            # 텍스트
-            text_label = QtWidgets.QLabel("· · ·  대기 중  · · ·")
-            text_label.setAlignment(QtCore.Qt.AlignCenter)
-            text_label.setStyleSheet("""
-                QLabel {
-                    color: #6b7280;
-                    font-size: 22px;
-                    font-weight: bold;
-                }
-            """)
-
-            layout.addWidget(icon_label)
-            layout.addSpacing(8)
-            layout.addWidget(text_label)
-
-            cell.put_widget(placeholder)
+            if i not in self.cell_assignments:
+                cell.show_placeholder()
 
     def _open_sender_picker(self):
         if not self._senders_provider:
@@ -228,4 +290,4 @@ class ViewModeManager(QtCore.QObject):
             # 혹시 모를 타이밍 이슈 보강
             self.set_mode(1)
         idx = self.focus_index if (0 <= self.focus_index < len(self.cells)) else 0
-        self.requestAssign.emit(idx, sender_id)
+        self.assign(idx, sender_id)
@@ -0,0 +1,258 @@
+# wall.py
+# 비디오 월: 여러 receiver 프로세스(화면)가 하나의 논리 캔버스를 나눠 표시
+#
+# - 관리자의 screen/update 배치는 논리 캔버스 전체(0.0~1.0) 기준
+# - 각 receiver는 자기 조각(slice, 캔버스 안의 정규화 사각형)에 걸친 셀만 잘라 표시하고,
+#   그 셀에 들어가는 sender만 디코드한다 (나머지는 기존 가시성 스케줄러가 디코드 중지)
+# - 전환 시점은 MQTT로 맞춘다 (리더 = 살아 있는 노드 중 id가 가장 작은 노드)
+#
+#   wall/<id>/hello    {node, slice}                  하트비트 (멤버십)
+#   wall/<id>/prepare  {version, layout, leader}      리더 → 전체: 새 배치 (전역 좌표)
+#   wall/<id>/ready    {version, node}                노드 → 리더: 자기 조각 준비 끝 (디코드 예열)
+#   wall/<id>/commit   {version, at}                  리더 → 전체: at(epoch 초)에 동시에 적용
+#
+# Qt/GStreamer 없이 동작하므로 한 호스트에서 여러 인스턴스로 시험할 수 있다 (bench/wall_sync.py).
+# at은 각 노드의 time.time() 기준이라 여러 호스트에 걸친 월은 NTP/PTP로 시계를 맞춰야 한다.
+
+import threading
+import time
+
+from layout_spec import parse_layout
+
+_EPS = 1e-6
+
+
+def parse_slice(value):
+    """"x,y,w,h" (0.0~1.0) → (x, y, w, h)"""
+    x, y, w, h = (float(v) for v in str(value).split(","))
+    if not (0.0 <= x < 1.0 and 0.0 <= y < 1.0 and w > 0 and h > 0
+            and x + w <= 1.0 + _EPS and y + h <= 1.0 + _EPS):
+        raise ValueError(f"invalid wall slice {value!r}")
+    return x, y, w, h
+
+
+def _clip(rect, slc):
+    """전역 사각형을 조각 안으로 잘라 조각 기준 좌표로 (겹치지 않으면 None)"""
+    x, y, w, h = rect
+    sx, sy, sw, sh = slc
+    x0, y0 = max(x, sx), max(y, sy)
+    x1, y1 = min(x + w, sx + sw), min(y + h, sy + sh)
+    if x1 - x0 <= _EPS or y1 - y0 <= _EPS:
+        return None
+    return (round((x0 - sx) / sw, 6), round((y0 - sy) / sh, 6),
+            round((x1 - x0) / sw, 6), round((y1 - y0) / sh, 6))
+
+
+def _grid_bounds(spec, slc):
+    """조각 경계가 그리드 선과 맞으면 (r0, r1, c0, c1), 아니면 None"""
+    sx, sy, sw, sh = slc
+    edges = (sy * spec.rows, (sy + sh) * spec.rows, sx * spec.cols, (sx + sw) * spec.cols)
+    if any(abs(e - round(e)) > 1e-4 for e in edges):
+        return None
+    return tuple(int(round(e)) for e in edges)
+
+
+def slice_layout(layout_data: dict, slc) -> dict:
+    """
+    전역 screen/update 배치 → 이 조각에서 보일 배치 (apply_layout_data에 그대로 넘길 수 있는 dict)
+    - 조각이 그리드 선에 맞으면 부분 그리드(span 유지), 아니면 잘린 사각형을 PiP처럼 절대 배치
+    - participants는 남은 셀 순서대로 (빈 칸은 {})
+    - 전역 캔버스는 LAYOUT_MAX_* 상한을 넘을 수 있고, 조각 배치는 적용할 때 다시 검사한다
+    """
+    spec = parse_layout(layout_data.get("layout", 1), limits=False)
+    participants = list(layout_data.get("participants") or [])
+    participants += [{}] * (len(spec) - len(participants))
+
+    bounds = _grid_bounds(spec, slc)
+    cells, pip, grid_people, pip_people = [], [], [], []
+    for tile, person in zip(spec.tiles, participants):
+        if tile.grid and bounds:
+            r0, r1, c0, c1 = bounds
+            r, c, rs, cs = tile.grid
+            top, bottom = max(r, r0), min(r + rs, r1)
+            left, right = max(c, c0), min(c + cs, c1)
+            if top < bottom and left < right:
+                cells.append([top - r0, left - c0, bottom - top, right - left])
+                grid_people.append(person)
+            continue
+        rect = _clip((tile.x, tile.y, tile.w, tile.h), slc)
+        if rect:
+            pip.append(list(rect))
+            pip_people.append(person)
+
+    if bounds:
+        rows, cols = bounds[1] - bounds[0], bounds[3] - bounds[2]
+    else:
+        rows = cols = 1
+    local = {"rows": rows, "cols": cols, "cells": cells, "pip": pip}
+    return {"layout": local, "participants": grid_people + pip_people}
+
+
+def slice_senders(local_data: dict) -> list:
+    """조각 배치에 들어가는 sender id (예열 대상)"""
+    return [p["id"] for p in local_data.get("participants") or () if p and p.get("id")]
+
+
+class WallCoordinator:
+    """
+    전송 계층과 분리된 월 전환 합의 (2단계: prepare → ready → commit)
+
+    publish(kind, payload)              kind: "hello" | "prepare" | "ready" | "commit"
+    on_prepare(local_data, done)        조각 예열 (끝나면 done() 호출, 어느 스레드든 무관)
+    on_commit(local_data, global_data)  조각 배치 적용
+    """
+
+    def __init__(self, node, slc, publish, on_prepare, on_commit,
+                 lead_ms=150, ready_timeout_ms=1000, heartbeat_s=1.0, ttl_s=3.5,
+                 clock=time.time):
+        self.node = node
+        self.slice = slc
+        self._publish = publish
+        self._on_prepare = on_prepare
+        self._on_commit = on_commit
+        self.lead_s = lead_ms / 1000.0
+        self.ready_timeout_s = ready_timeout_ms / 1000.0
+        self.heartbeat_s = heartbeat_s
+        self.ttl_s = ttl_s
+        self._clock = clock
+
+        self._lock = threading.RLock()
+        self.members = {node: clock()}   # node -> 마지막 hello 시각
+        self.version = 0                 # 지금까지 본 가장 큰 버전
+        self.applied = 0                 # 마지막으로 적용한 버전
+        self.layout_data = None          # 마지막으로 적용한 전역 배치 (screen/request 응답용)
+        self._pending = {}               # version -> (global_data, local_data)
+        self._ready = {}                 # (리더) version -> 준비된 노드 set
+        self._waiting = {}               # (리더) version -> 기다릴 노드 set
+        self._timers = set()
+        self._stopped = False
+
+    # ----- 수명 -----
+    def start(self):
+        self._heartbeat()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            for t in list(self._timers):
+                t.cancel()
+            self._timers.clear()
+
+    def _after(self, delay, fn, *args):
+        def run():
+            with self._lock:
+                self._timers.discard(t)
+                if self._stopped:
+                    return
+            fn(*args)
+        t = threading.Timer(max(0.0, delay), run)
+        t.daemon = True
+        with self._lock:
+            if self._stopped:
+                return
+            self._timers.add(t)
+        t.start()
+
+    def _heartbeat(self):
+        self._publish("hello", {"node": self.node, "slice": list(self.slice)})
+        self._after(self.heartbeat_s, self._heartbeat)
+
+    # ----- 멤버십 -----
+    def alive(self):
+        now = self._clock()
+        with self._lock:
+            for n, seen in list(self.members.items()):
+                if n != self.node and now - seen > self.ttl_s:
+                    del self.members[n]
+                    print(f"[WALL] node {n} timed out")
+            return sorted(self.members)
+
+    def is_leader(self):
+        return self.alive()[0] == self.node
+
+    # ----- 외부 입력 -----
+    def submit(self, layout_data: dict):
+        """관리자 screen/update (리더만 prepare를 시작, 나머지는 무시)"""
+        if not self.is_leader():
+            return
+        with self._lock:
+            self.version += 1
+            version = self.version
+            waiting = self._waiting[version] = set(self.alive())
+            self._ready[version] = set()
+        print(f"[WALL] prepare v{version} → {len(waiting)} node(s)")
+        self._publish("prepare", {"version": version, "layout": layout_data, "leader": self.node})
+        self._after(self.ready_timeout_s, self._commit, version, True)
+
+    def handle(self, kind: str, msg: dict):
+        """MQTT 등에서 받은 메시지 (자기가 보낸 것도 그대로 넘겨도 됨)"""
+        if kind == "hello":
+            with self._lock:
+                self.members[msg["node"]] = self._clock()
+        elif kind == "prepare":
+            self._handle_prepare(msg)
+        elif kind == "ready":
+            self._handle_ready(msg)
+        elif kind == "commit":
+            self._handle_commit(msg)
+
+    # ----- 단계별 처리 -----
+    def _handle_prepare(self, msg):
+        version, global_data = msg["version"], msg["layout"]
+        with self._lock:
+            self.version = max(self.version, version)
+            if version <= self.applied or version in self._pending:
+                return
+            try:
+                local_data = slice_layout(global_data, self.slice)
+            except Exception as e:
+                print(f"[WALL] prepare v{version} rejected: {e}")
+                return
+            # 더 새 배치가 오면 이전 대기분은 버림
+            for v in [v for v in self._pending if v < version]:
+                del self._pending[v]
+            self._pending[version] = (global_data, local_data)
+
+        def done():
+            self._publish("ready", {"version": version, "node": self.node})
+        self._on_prepare(local_data, done)
+
+    def _handle_ready(self, msg):
+        version = msg["version"]
+        with self._lock:
+            ready = self._ready.get(version)
+            if ready is None:
+                return   # 리더가 아니거나 이미 commit한 버전
+            ready.add(msg["node"])
+            complete = self._waiting[version] <= ready
+        if complete:
+            self._commit(version, False)
+
+    def _commit(self, version, timed_out):
+        with self._lock:
+            ready = self._ready.pop(version, None)
+            waiting = self._waiting.pop(version, set())
+            if ready is None:
+                return
+        if timed_out:
+            print(f"[WALL] v{version} ready timeout, missing={sorted(waiting - ready)}")
+        at = self._clock() + self.lead_s
+        self._publish("commit", {"version": version, "at": at})
+
+    def _handle_commit(self, msg):
+        version = msg["version"]
+        with self._lock:
+            entry = self._pending.get(version)
+            if not entry:
+                return
+        self._after(msg["at"] - self._clock(), self._apply, version)
+
+    def _apply(self, version):
+        with self._lock:
+            entry = self._pending.pop(version, None)
+            if not entry or version <= self.applied:
+                return
+            self.applied = version
+            self.layout_data = entry[0]
+        print(f"[WALL] apply v{version}")
+        self._on_commit(entry[1], entry[0])
@@ -1,19 +1,31 @@
 // ======================================
-// WebRTC Sender (화면 공유 송신자) - 단일 Receiver 전용
+// WebRTC Sender (화면 공유 송신자)
+// 보통은 receiver 하나와 연결하고, 비디오 월 방이면 월 멤버(receiver)마다 연결을 하나씩 맺는다
 // ======================================
 
-const socket = io(`https://${window.location.hostname}:3001`);
+// 여러 방을 운영하는 경우 ?room=<receiver 이름> 으로 입장할 방 지정
+// (멀티 워커 시그널링 서버는 이 값으로 같은 방의 연결을 한 워커에 모은다)
+const room = new URLSearchParams(window.location.search).get('room') || undefined;
+const socket = io(`https://${window.location.hostname}:3001`, room ? { query: { room } } : {});
 
 let localStream = null;      // 현재 송출 중인 화면 스트림
-let pc = null;               // 단일 RTCPeerConnection
-let pendingOffer = null;     // 보류된 offer
-let pendingCandidates = [];  // 보류 ICE 후보
+// receiverId -> { pc, pendingOffer, pendingCandidates, outgoingCandidates, flushTimer, qualityHint }
+const links = new Map();
 const servers = { iceServers: [{ urls: "stun:stun.l.google.com:19302" }] };
 
 let senderName = '';         // 송신자 이름
 let shareAnnounced = false;  // sender-share-started 전송 여부
 let statsInterval = null;    // 송신 통계 타이머
 
+// ICE 후보 묶음 전송 (서버가 join ack에서 'candidates' 지원을 알려준 경우만)
+const CANDIDATE_BATCH_MS = 20;
+let batchCandidates = false;
+
+// 바이너리 시그널 (signalCodec.js, 서버가 join ack에서 같은 버전을 지원할 때만)
+const codecReady = typeof SignalCodec !== 'undefined' && SignalCodec.available;
+const SIGNAL_FEATURES = ['candidates', ...(codecReady ? [SignalCodec.FEATURE] : [])];
+let binarySignals = false;
+
 // --- UI 요소 ---
 const enterBtn = document.getElementById('enterBtn');
 const shareStartBtn = document.getElementById('shareStart');
@@ -41,40 +53,106 @@ function resetLocalPreview() {
 }
 resetLocalPreview();
 
+// ---------- receiver별 연결 ----------
+function getLink(rid) {
+  let link = links.get(rid);
+  if (!link) {
+    link = {
+      pc: null,
+      pendingOffer: null,       // 보류된 offer
+      pendingCandidates: [],    // 보류 ICE 후보
+      outgoingCandidates: [],
+      flushTimer: null,
+      qualityHint: null,        // receiver가 셀 크기에 맞춰 요청한 송출 화질
+    };
+    links.set(rid, link);
+  }
+  return link;
+}
+
+function closeLink(rid) {
+  const link = links.get(rid);
+  if (!link) return;
+  clearTimeout(link.flushTimer);
+  if (link.pc) link.pc.close();
+  links.delete(rid);
+  console.log(`[SENDER] receiver ${rid} 연결 종료`);
+}
+
+function closeAllLinks() {
+  for (const rid of [...links.keys()]) closeLink(rid);
+}
+
 // ---------- RTCPeerConnection ----------
-function createPc() {
-  if (pc) return pc;
-  pc = new RTCPeerConnection(servers);
+function createPc(rid, link) {
+  if (link.pc) return link.pc;
+  const pc = link.pc = new RTCPeerConnection(servers);
 
   pc.onicecandidate = (e) => {
-    if (e.candidate) {
-      socket.emit('signal', {
-        type: 'candidate',
-        payload: e.candidate,
-        from: socket.id
-      });
+    if (!batchCandidates) {
+      if (e.candidate) {
+        sendSignal({
+          type: 'candidate',
+          payload: e.candidate,
+          from: socket.id,
+          to: rid
+        });
+      }
+      return;
     }
+    if (!e.candidate) {
+      flushCandidates(rid, link, true);  // 수집 완료 → 남은 후보 + end-of-candidates
+      return;
+    }
+    link.outgoingCandidates.push(e.candidate.toJSON());
+    if (!link.flushTimer)
+      link.flushTimer = setTimeout(() => flushCandidates(rid, link, false), CANDIDATE_BATCH_MS);
   };
 
   pc.oniceconnectionstatechange = () =>
-    console.log(`[SENDER] ICE:`, pc.iceConnectionState);
+    console.log(`[SENDER] ICE(${rid}):`, pc.iceConnectionState);
   pc.onconnectionstatechange = () =>
-    console.log(`[SENDER] PC state:`, pc.connectionState);
+    console.log(`[SENDER] PC state(${rid}):`, pc.connectionState);
   pc.onsignalingstatechange = () =>
-    console.log(`[SENDER] signaling:`, pc.signalingState);
+    console.log(`[SENDER] signaling(${rid}):`, pc.signalingState);
   pc.onicecandidateerror = (e) =>
     console.warn('[SENDER] onicecandidateerror:', e);
 
   return pc;
 }
 
+// ---------- 시그널 전송 ----------
+function sendSignal(msg) {
+  if (binarySignals) {
+    socket.emit('signal-bin', { to: msg.to ?? null, data: SignalCodec.pack(msg) });
+  } else {
+    socket.emit('signal', msg);
+  }
+}
+
+// ---------- ICE Candidate 묶음 전송 ----------
+function flushCandidates(rid, link, end) {
+  clearTimeout(link.flushTimer);
+  link.flushTimer = null;
+  if (!link.outgoingCandidates.length && !end) return;
+  sendSignal({
+    type: 'candidates',
+    from: socket.id,
+    to: rid,
+    payload: { candidates: link.outgoingCandidates, end }
+  });
+  link.outgoingCandidates = [];
+}
+
 // ---------- ICE Candidate 보류 처리 ----------
-async function flushPendingCandidates() {
+// null 항목은 end-of-candidates
+async function flushPendingCandidates(link) {
+  const pc = link.pc;
   if (!pc || !pc.remoteDescription) return;
-  while (pendingCandidates.length > 0) {
-    const c = pendingCandidates.shift();
+  while (link.pendingCandidates.length > 0) {
+    const c = link.pendingCandidates.shift();
     try {
-      await pc.addIceCandidate(new RTCIceCandidate(c));
+      await (c ? pc.addIceCandidate(new RTCIceCandidate(c)) : pc.addIceCandidate());
     } catch (e) {
       console.warn('[SENDER] queued candidate add failed:', e);
     }
@@ -84,23 +162,26 @@ async function flushPendingCandidates() {
 // ---------- 송신 통계 ----------
 let lastStats = {};
 async function logSenderStats() {
-  if (!pc) return;
-  const stats = await pc.getStats();
-  stats.forEach(report => {
-    if (report.type === "outbound-rtp" && report.kind === "video") {
-      const prev = lastStats[report.id];
-      if (prev) {
-        const bytes = report.bytesSent - prev.bytesSent;
-        const time = (report.timestamp - prev.timestamp) / 1000;
-        const bitrate = (bytes * 8 / 1000) / time;
-        console.log(`[STATS][TX] bitrate≈${bitrate.toFixed(1)} kbps, FPS=${report.framesPerSecond || 'N/A'}`);
+  for (const [rid, link] of links) {
+    if (!link.pc) continue;
+    const stats = await link.pc.getStats();
+    stats.forEach(report => {
+      if (report.type === "outbound-rtp" && report.kind === "video") {
+        const key = `${rid}:${report.id}`;
+        const prev = lastStats[key];
+        if (prev) {
+          const bytes = report.bytesSent - prev.bytesSent;
+          const time = (report.timestamp - prev.timestamp) / 1000;
+          const bitrate = (bytes * 8 / 1000) / time;
+          console.log(`[STATS][TX][${rid}] bitrate≈${bitrate.toFixed(1)} kbps, FPS=${report.framesPerSecond || 'N/A'}`);
+        }
+        lastStats[key] = report;
       }
-      lastStats[report.id] = report;
-    }
-    if (report.type === "track" && report.kind === "video") {
-      console.log(`[STATS][TX] resolution=${report.frameWidth}x${report.frameHeight}, FPS=${report.framesPerSecond || 'N/A'}`);
-    }
-  });
+      if (report.type === "track" && report.kind === "video") {
+        console.log(`[STATS][TX][${rid}] resolution=${report.frameWidth}x${report.frameHeight}, FPS=${report.framesPerSecond || 'N/A'}`);
+      }
+    });
+  }
 }
 function ensureStatsTimer() {
   if (!statsInterval) {
@@ -112,6 +193,69 @@ function clearStatsTimer() {
     clearInterval(statsInterval);
     statsInterval = null;
   }
+  lastStats = {};
+}
+
+// ---------- 적응형 화질 (receiver 셀 크기 기반) ----------
+// 연결마다 인코딩이 따로라 월 멤버별로 자기 셀 크기에 맞춘 화질을 받는다
+async function applyQualityHint(link) {
+  const { pc, qualityHint } = link;
+  if (!pc || !localStream) return;
+  const sender = pc.getSenders().find(s => s.track?.kind === 'video');
+  if (!sender) return;
+  if (!qualityHint) {
+    await startSingleLayer(sender);
+    return;
+  }
+
+  // 캡처 해상도 대비 셀 크기로 축소 배율 계산
+  const track = localStream.getVideoTracks()[0];
+  const { width = 0, height = 0 } = track?.getSettings() || {};
+  const scale = Math.max(1, width / qualityHint.width || 1, height / qualityHint.height || 1);
+
+  const params = sender.getParameters();
+  if (!params.encodings || params.encodings.length === 0) params.encodings = [{}];
+
+  // 사이멀캐스트(receiver offer의 rid 층을 받아들인 경우): 고른 층 하나만 켜고 나머지는 끔
+  // 인코딩 on/off는 재협상 없이 바뀌고, 새로 켜진 층은 키프레임부터 보낸다
+  const layer = qualityHint.layer && params.encodings.find(e => e.rid === qualityHint.layer);
+  if (layer) {
+    for (const enc of params.encodings) enc.active = enc === layer;
+    layer.maxBitrate = qualityHint.maxBitrate;
+    layer.scaleResolutionDownBy = Math.max(scale, qualityHint.scale || 1);
+    if (qualityHint.maxFramerate) layer.maxFramerate = qualityHint.maxFramerate;
+    try {
+      await sender.setParameters(params);
+      console.log(`[SENDER] simulcast layer ${layer.rid}: scale=${layer.scaleResolutionDownBy.toFixed(2)}, ` +
+        `${Math.round(qualityHint.maxBitrate / 1000)} kbps`);
+    } catch (e) {
+      console.warn('[SENDER] setParameters 실패:', e);
+    }
+    return;
+  }
+
+  params.encodings[0].maxBitrate = qualityHint.maxBitrate;
+  params.encodings[0].scaleResolutionDownBy = scale;
+  if (qualityHint.maxFramerate) params.encodings[0].maxFramerate = qualityHint.maxFramerate;
+  try {
+    await sender.setParameters(params);
+    console.log(`[SENDER] quality: ${qualityHint.width}x${qualityHint.height}, ` +
+      `scale=${scale.toFixed(2)}, ${Math.round(qualityHint.maxBitrate / 1000)} kbps`);
+  } catch (e) {
+    console.warn('[SENDER] setParameters 실패:', e);
+  }
+}
+
+// 첫 힌트 전에는 사이멀캐스트 층 중 첫 번째만 송출 (receiver는 한 번에 한 층만 디코드)
+async function startSingleLayer(sender) {
+  const params = sender.getParameters();
+  if (!params.encodings || params.encodings.length < 2) return;
+  params.encodings.forEach((enc, i) => { enc.active = i === 0; });
+  try {
+    await sender.setParameters(params);
+  } catch (e) {
+    console.warn('[SENDER] setParameters 실패:', e);
+  }
 }
 
 // ---------- 화면 캡처 & 미리보기 ----------
@@ -153,45 +297,82 @@ async function startLocalCaptureAndPreview() {
   }
 }
 
-// ---------- 공유 시작 알림 + Offer 처리 ----------
-async function announceShareAndProcessOffer() {
-  if (!localStream) return;
-  if (!shareAnnounced) {
-    socket.emit('sender-share-started', { senderId: socket.id, name: senderName });
-    shareAnnounced = true;
+// ---------- 코덱 선택 ----------
+// receiver offer는 디코드 비용이 싼 코덱부터 나열하므로 그 순서를 그대로 따른다
+// (H264는 profile-level-id까지 구분: High를 먼저 offer하면 High 인코더가 있을 때만 High)
+function offerCodecOrder(sdp) {
+  const names = {}, profiles = {}, order = [];
+  for (const line of sdp.split(/\r?\n/)) {
+    let m = line.match(/^a=rtpmap:(\d+) ([\w-]+)\/90000/);
+    if (m) { names[m[1]] = m[2].toLowerCase(); order.push(m[1]); continue; }
+    m = line.match(/^a=fmtp:(\d+) .*profile-level-id=([0-9a-fA-F]{6})/);
+    if (m) profiles[m[1]] = m[2].toLowerCase();
   }
-  if (pendingOffer) {
+  return order.map(pt => names[pt] + (profiles[pt] ? `/${profiles[pt]}` : ''));
+}
+
+function preferOfferCodecs(pc, sdp) {
+  const order = offerCodecOrder(sdp);
+  const rank = (c) => {
+    const name = c.mimeType.split('/')[1].toLowerCase();
+    const plid = (c.sdpFmtpLine || '').match(/profile-level-id=([0-9a-fA-F]{6})/)?.[1]?.toLowerCase();
+    const exact = plid ? order.indexOf(`${name}/${plid}`) : -1;
+    return exact >= 0 ? exact : order.findIndex(k => k.split('/')[0] === name);
+  };
+  const codecs = (RTCRtpSender.getCapabilities('video')?.codecs || [])
+    .filter(c => rank(c) >= 0)
+    .sort((a, b) => rank(a) - rank(b));
+  if (!codecs.length) return;
+  pc.getTransceivers().forEach(t => {
+    if (t.receiver?.track?.kind !== 'video' || !t.setCodecPreferences) return;
     try {
-      const pc = createPc();
-
-      // H264 우선
-      pc.getTransceivers().forEach(t => {
-        if (t.sender?.track?.kind === "video") {
-          const h264 = RTCRtpSender.getCapabilities("video").codecs
-            .find(c => c.mimeType.toLowerCase() === "video/h264");
-          if (h264) t.setCodecPreferences([h264]);
-        }
-      });
+      t.setCodecPreferences(codecs);
+    } catch (e) {
+      console.warn('[SENDER] setCodecPreferences 실패, 브라우저 기본 순서 사용:', e);
+    }
+  });
+  console.log('[SENDER] codec order:', order.join(', '));
+}
+
+// ---------- Offer → Answer ----------
+async function answerOffer(rid, link) {
+  const pc = createPc(rid, link);
+
+  await pc.setRemoteDescription(new RTCSessionDescription(link.pendingOffer));
+  preferOfferCodecs(pc, link.pendingOffer.sdp);
 
-      await pc.setRemoteDescription(new RTCSessionDescription(pendingOffer));
+  localStream.getTracks().forEach(track => {
+    const already = pc.getSenders().some(s => s.track === track);
+    if (!already) pc.addTrack(track, localStream);
+  });
 
-      localStream.getTracks().forEach(track => {
-        const already = pc.getSenders().some(s => s.track === track);
-        if (!already) pc.addTrack(track, localStream);
-      });
+  await flushPendingCandidates(link);
 
-      await flushPendingCandidates();
+  const answer = await pc.createAnswer();
+  await pc.setLocalDescription(answer);
+  sendSignal({
+    type: 'answer',
+    from: socket.id,
+    to: rid,
+    payload: { type: 'answer', sdp: answer.sdp }
+  });
+  console.log(`[SENDER] answer 전송 → ${rid}`);
 
-      const answer = await pc.createAnswer();
-      await pc.setLocalDescription(answer);
-      socket.emit('signal', {
-        type: 'answer',
-        from: socket.id,
-        payload: { type: 'answer', sdp: answer.sdp }
-      });
-      console.log('[SENDER] answer 전송');
+  link.pendingOffer = null;
+  await applyQualityHint(link);
+}
 
-      pendingOffer = null;
+// ---------- 공유 시작 알림 + 보류 Offer 처리 ----------
+async function announceShareAndProcessOffer() {
+  if (!localStream) return;
+  if (!shareAnnounced) {
+    socket.emit('sender-share-started', { senderId: socket.id, name: senderName });
+    shareAnnounced = true;
+  }
+  for (const [rid, link] of links) {
+    if (!link.pendingOffer) continue;
+    try {
+      await answerOffer(rid, link);
     } catch (e) {
       console.warn('[SENDER] 보류 offer 처리 실패:', e);
     }
@@ -240,7 +421,9 @@ enterBtn.addEventListener('click', async () => {
   socket.once('join-complete', onSuccess);
   socket.once('join-error', onError);
 
-  socket.emit('join-room', { role: 'sender', name }, (ack) => {
+  socket.emit('join-room', { role: 'sender', name, room, features: SIGNAL_FEATURES }, (ack) => {
+    batchCandidates = (ack?.features || []).includes('candidates');
+    binarySignals = codecReady && (ack?.features || []).includes(SignalCodec.FEATURE);
     if (handled) return;
     if (ack?.success) onSuccess({ name: ack.name || name });
     else onError(ack?.message || '입장 실패');
@@ -248,73 +431,65 @@ enterBtn.addEventListener('click', async () => {
 });
 
 // ---------- 시그널 처리 ----------
-socket.on('signal', async (data) => {
-  console.log('[SENDER] signal recv:', data.type);
+socket.on('signal', (data) => handleSignal(data));
+socket.on('signal-bin', ({ from, data }) => {
+  let msg;
+  try {
+    msg = SignalCodec.unpack(data);
+  } catch (e) {
+    console.warn('[SENDER] signal-bin decode 실패:', e);
+    return;
+  }
+  handleSignal({ ...msg, from });
+});
+
+async function handleSignal(data) {
+  console.log('[SENDER] signal recv:', data.type, 'from', data.from);
+  const rid = data.from;
+  const link = getLink(rid);
 
   if (data.type === 'offer') {
     try {
+      link.pendingOffer = data.payload;
       if (!localStream) {
         const ok = await startLocalCaptureAndPreview();
-        if (!ok) {
-          pendingOffer = data.payload;
-          return;
-        }
+        if (!ok) return;   // 공유 시작 버튼을 누르면 보류 offer 처리
       }
-      pendingOffer = data.payload;
-      const pc = createPc();
-
-      // H264 강제
-      pc.getTransceivers().forEach(t => {
-        if (t.sender?.track?.kind === "video") {
-          const h264 = RTCRtpSender.getCapabilities("video").codecs
-            .find(c => c.mimeType.toLowerCase() === "video/h264");
-          if (h264) t.setCodecPreferences([h264]);
-        }
-      });
-
-      await pc.setRemoteDescription(new RTCSessionDescription(pendingOffer));
-
-      localStream.getTracks().forEach(track => {
-        const already = pc.getSenders().some(s => s.track === track);
-        if (!already) pc.addTrack(track, localStream);
-      });
-
-      await flushPendingCandidates();
-
-      const answer = await pc.createAnswer();
-      await pc.setLocalDescription(answer);
-      socket.emit('signal', {
-        type: 'answer',
-        from: socket.id,
-        payload: { type: 'answer', sdp: answer.sdp }
-      });
-      console.log('[SENDER] answer 전송');
-
-      pendingOffer = null;
+      await answerOffer(rid, link);
       await announceShareAndProcessOffer();
     } catch (e) {
       console.warn('[SENDER] offer 처리 실패:', e);
     }
+  } else if (data.type === 'quality') {
+    link.qualityHint = data.payload;
+    await applyQualityHint(link);
   } else if (data.type === 'candidate') {
-    if (!pc || !pc.remoteDescription) {
-      pendingCandidates.push(data.payload);
+    if (!link.pc || !link.pc.remoteDescription) {
+      link.pendingCandidates.push(data.payload);
       return;
     }
     try {
-      await pc.addIceCandidate(new RTCIceCandidate(data.payload));
+      await link.pc.addIceCandidate(new RTCIceCandidate(data.payload));
     } catch (e) {
       console.warn('ICE candidate 에러:', e);
     }
+  } else if (data.type === 'candidates') {
+    const { candidates = [], end = false } = data.payload || {};
+    link.pendingCandidates.push(...candidates);
+    if (end) link.pendingCandidates.push(null);
+    await flushPendingCandidates(link);
   }
+}
+
+// ---------- 월 멤버 퇴장 (그 receiver와의 연결만 닫음) ----------
+socket.on('receiver-left', ({ id } = {}) => {
+  if (id) closeLink(id);
 });
 
 // ---------- 방 삭제 처리 ----------
 socket.on('room-deleted', () => {
   alert('방이 삭제되었습니다.');
-  if (pc) {
-    pc.close();
-    pc = null;
-  }
+  closeAllLinks();
   if (localStream) {
     localStream.getTracks().forEach(t => t.stop());
     localStream = null;
@@ -341,10 +516,7 @@ shareStopBtn.addEventListener('click', () => {
     localStream.getTracks().forEach(t => t.stop());
     localStream = null;
   }
-  if (pc) {
-    pc.close();
-    pc = null;
-  }
+  closeAllLinks();
   shareStopBtn.disabled = true;
   shareStopBtn.style.display = 'none';
   shareStartBtn.style.display = 'inline-block';
@@ -0,0 +1,145 @@
+// signalCodec.js - 'signal' 메시지 바이너리 인코딩 (MessagePack + SDP 줄 템플릿)
+// receiver/signal_codec.py 와 형식·표 순서가 같아야 한다 (설명은 그쪽 참고).
+// MessagePack 라이브러리가 없는 브라우저에서는 SignalCodec.available = false → JSON만 사용.
+
+const SignalCodec = (() => {
+  const VERSION = 1;
+  const FEATURE = `msgpack-v${VERSION}`;
+
+  const SDP_LINES = [
+    "v=0",
+    "s=-",
+    "t=0 0",
+    "c=IN IP4 0.0.0.0",
+    "a=rtcp:9 IN IP4 0.0.0.0",
+    "a=rtcp-mux",
+    "a=rtcp-rsize",
+    "a=sendrecv",
+    "a=sendonly",
+    "a=recvonly",
+    "a=inactive",
+    "a=setup:actpass",
+    "a=setup:active",
+    "a=setup:passive",
+    "a=ice-options:trickle",
+    "a=extmap-allow-mixed",
+    "a=msid-semantic: WMS",
+    "a=msid-semantic:WMS *",
+    "a=end-of-candidates",
+    "a=rtpmap:96 H264/90000",
+    "a=rtpmap:97 rtx/90000",
+    "a=rtpmap:96 VP8/90000",
+    "a=rtpmap:98 VP9/90000",
+    "a=rtpmap:111 opus/48000/2",
+    "a=rtcp-fb:96 nack",
+    "a=rtcp-fb:96 nack pli",
+    "a=rtcp-fb:96 ccm fir",
+    "a=rtcp-fb:96 goog-remb",
+    "a=rtcp-fb:96 transport-cc",
+    "a=fmtp:96 level-asymmetry-allowed=1;packetization-mode=1;profile-level-id=42e01f",
+    "a=fmtp:96 packetization-mode=1;profile-level-id=42e01f;level-asymmetry-allowed=1",
+  ];
+
+  const SDP_PREFIXES = [
+    "a=candidate:",
+    "candidate:",
+    "a=rtpmap:",
+    "a=fmtp:",
+    "a=rtcp-fb:",
+    "a=ssrc:",
+    "a=ssrc-group:FID ",
+    "a=extmap:",
+    "a=mid:",
+    "a=msid:",
+    "a=ice-ufrag:",
+    "a=ice-pwd:",
+    "a=fingerprint:sha-256 ",
+    "a=group:BUNDLE ",
+    "m=video 9 UDP/TLS/RTP/SAVPF ",
+    "m=audio 9 UDP/TLS/RTP/SAVPF ",
+    "m=application 9 UDP/DTLS/SCTP ",
+    "o=- ",
+    "o=mozilla...THIS_IS_SDPARTA-",
+    "c=IN IP4 ",
+    "a=rtcp:",
+    "b=AS:",
+    "b=TIAS:",
+  ];
+
+  const lineIndex = new Map(SDP_LINES.map((l, i) => [l, i]));
+  // 긴 접두어부터 ("a=candidate:"가 "candidate:"보다 먼저)
+  const prefixOrder = SDP_PREFIXES.map((_, i) => i)
+    .sort((a, b) => SDP_PREFIXES[b].length - SDP_PREFIXES[a].length);
+
+  function packLine(line) {
+    const i = lineIndex.get(line);
+    if (i !== undefined) return i;
+    for (const j of prefixOrder) {
+      const p = SDP_PREFIXES[j];
+      if (line.startsWith(p)) return [j, line.slice(p.length)];
+    }
+    return line;
+  }
+
+  function unpackLine(item) {
+    if (typeof item === 'number') return SDP_LINES[item];
+    if (Array.isArray(item)) return SDP_PREFIXES[item[0]] + item[1];
+    return item;
+  }
+
+  function packSdp(sdp) {
+    if (!sdp.includes('\r\n')) return sdp;
+    const lines = sdp.split('\r\n');
+    if (lines[lines.length - 1] === '') lines.pop();
+    return lines.map(packLine);
+  }
+
+  function unpackSdp(body) {
+    if (typeof body === 'string') return body;
+    return body.map(item => unpackLine(item) + '\r\n').join('');
+  }
+
+  const packCandidate = (c) =>
+    [packLine(c.candidate || ''), c.sdpMid ?? null, c.sdpMLineIndex ?? null, c.usernameFragment ?? null];
+
+  function unpackCandidate([line, sdpMid = null, sdpMLineIndex = null, ufrag = null]) {
+    const c = { candidate: unpackLine(line), sdpMid, sdpMLineIndex };
+    if (ufrag !== null) c.usernameFragment = ufrag;
+    return c;
+  }
+
+  // {type, payload} → Uint8Array
+  function pack({ type, payload }) {
+    let body = payload ?? null;
+    if ((type === 'offer' || type === 'answer') && payload) {
+      body = packSdp(typeof payload === 'string' ? payload : payload.sdp);
+    } else if (type === 'candidate' && payload) {
+      body = packCandidate(payload);
+    } else if (type === 'candidates' && payload) {
+      body = [(payload.candidates || []).map(packCandidate), !!payload.end];
+    }
+    return MessagePack.encode([VERSION, type, body]);
+  }
+
+  // ArrayBuffer/Uint8Array → {type, payload}
+  function unpack(buf) {
+    const [version, type, body] = MessagePack.decode(buf);
+    if (version !== VERSION) throw new Error(`unsupported signal codec version ${version}`);
+    let payload = body;
+    if ((type === 'offer' || type === 'answer') && body != null) {
+      payload = { type, sdp: unpackSdp(body) };
+    } else if (type === 'candidate' && body != null) {
+      payload = unpackCandidate(body);
+    } else if (type === 'candidates' && body != null) {
+      payload = { candidates: body[0].map(unpackCandidate), end: !!body[1] };
+    }
+    return { type, payload };
+  }
+
+  return {
+    FEATURE,
+    available: typeof MessagePack !== 'undefined',
+    pack,
+    unpack,
+  };
+})();
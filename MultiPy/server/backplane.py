@@ -0,0 +1,134 @@
+# backplane.py
+# 시그널링 워커 프로세스 간 emit 전달 / 방 상태 복제용 pub/sub 백플레인
+
+import asyncio
+import base64
+import json
+import threading
+from urllib.parse import urlparse
+
+import socketio
+
+
+# MQTT 페이로드는 JSON ('signal-bin'의 bytes는 {"$b": base64}로 감싼다)
+def _json_default(o):
+    if isinstance(o, (bytes, bytearray)):
+        return {"$b": base64.b64encode(o).decode("ascii")}
+    raise TypeError(f"not JSON serializable: {type(o).__name__}")
+
+
+def _json_hook(d):
+    if len(d) == 1 and "$b" in d:
+        return base64.b64decode(d["$b"])
+    return d
+
+
+def encode(data):
+    return json.dumps(data, separators=(",", ":"), default=_json_default)
+
+
+def decode(payload):
+    return json.loads(payload, object_hook=_json_hook)
+
+
+class LocalBus:
+    """같은 프로세스 안의 구독자에게만 전달하는 버스 (단일 프로세스 전용)
+
+    워커 프로세스 사이에는 아무것도 전달하지 않으므로 --workers N에서는 쓸 수 없다 (router.serve_workers).
+    """
+
+    _subscribers = {}   # topic -> [(loop, queue)] (프로세스 전역)
+    _lock = threading.Lock()
+
+    def publish(self, topic, data):
+        with self._lock:
+            subs = list(self._subscribers.get(topic, ()))
+        for loop, q in subs:
+            loop.call_soon_threadsafe(q.put_nowait, data)
+
+    def subscribe(self, topic):
+        q = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append((asyncio.get_running_loop(), q))
+        return q
+
+    def close(self):
+        pass
+
+
+class MqttBus:
+    """MQTT 브로커(sender/mosquitto)를 통한 버스 — 워커 프로세스 간 전달"""
+
+    def __init__(self, url="mqtt://127.0.0.1:1883", client_id=None):
+        import paho.mqtt.client as mqtt
+
+        u = urlparse(url)
+        self._subs = {}   # topic -> [(loop, queue)]
+        self._lock = threading.Lock()
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id or "")
+        if u.username:
+            self.client.username_pw_set(u.username, u.password)
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+        self.client.connect_async(u.hostname or "127.0.0.1", u.port or 1883)
+        self.client.loop_start()
+
+    def _on_connect(self, client, userdata, flags, rc, props=None):
+        # 재연결 시 구독 복구
+        with self._lock:
+            topics = list(self._subs)
+        for topic in topics:
+            client.subscribe(topic, qos=0)
+
+    def _on_message(self, client, userdata, msg):
+        try:
+            data = decode(msg.payload)
+        except ValueError:
+            return
+        with self._lock:
+            subs = list(self._subs.get(msg.topic, ()))
+        for loop, q in subs:
+            loop.call_soon_threadsafe(q.put_nowait, data)
+
+    def publish(self, topic, data):
+        self.client.publish(topic, encode(data), qos=0)
+
+    def subscribe(self, topic):
+        q = asyncio.Queue()
+        with self._lock:
+            first = topic not in self._subs
+            self._subs.setdefault(topic, []).append((asyncio.get_running_loop(), q))
+        if first:
+            self.client.subscribe(topic, qos=0)
+        return q
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def make_bus(kind, url=None, client_id=None):
+    """kind: "local"(단일 프로세스) | "mqtt" (그 외/빈 값이면 None → 백플레인 없이 단일 프로세스)"""
+    if kind == "local":
+        return LocalBus()
+    if kind == "mqtt":
+        return MqttBus(url or "mqtt://127.0.0.1:1883", client_id=client_id)
+    return None
+
+
+class BusManager(socketio.AsyncPubSubManager):
+    """python-socketio 클라이언트 매니저: 다른 워커에 연결된 sid/방으로의 emit을 버스로 전달"""
+
+    name = "bus"
+
+    def __init__(self, bus, channel="multipy/socketio", write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.bus = bus
+
+    async def _publish(self, data):
+        self.bus.publish(self.channel, data)
+
+    async def _listen(self):
+        q = self.bus.subscribe(self.channel)
+        while True:
+            yield await q.get()
@@ -1,131 +1,396 @@
+import argparse
 import os
-from flask import Flask, request
-from flask_socketio import SocketIO, emit
+import ssl
+import sys
+import uuid
 
-app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
+import socketio
+from aiohttp import web
 
-receiver = None
-senders = {}  # sender_id -> {id, name}
+from backplane import make_bus, BusManager
+
+# signal 바이너리 코덱은 파이썬 receiver와 같은 모듈을 쓴다
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "receiver"))
+import signal_codec  # noqa: E402
+
+# 워커/백플레인 설정 (--workers N으로 띄우면 부모 프로세스가 환경 변수로 넘겨준다)
+WORKER_ID = os.environ.get("SIGNALING_WORKER_ID") or uuid.uuid4().hex[:8]
+BACKPLANE = os.environ.get("SIGNALING_BACKPLANE", "")   # "" (단일 프로세스) | "local" | "mqtt"
+BACKPLANE_URL = os.environ.get("SIGNALING_BACKPLANE_URL", "mqtt://127.0.0.1:1883")
+STATE_CHANNEL = "multipy/rooms"   # 방 상태 복제 토픽
+
+bus = None   # 워커 프로세스에서만 만든다 (_start_backplane)
+sio = socketio.AsyncServer(async_mode="aiohttp", cors_allowed_origins="*")
+app = web.Application()
+sio.attach(app)
+
+# 클라이언트가 join-room에서 알려준 선택 기능 (sid -> set)
+# "candidates": ICE 후보 묶음 메시지 {type:'candidates', payload:{candidates:[...], end}}
+# "msgpack-v1": 'signal-bin' 바이너리 시그널 (signal_codec.py, msgpack 모듈이 있을 때만)
+SERVER_FEATURES = ["candidates"] + ([signal_codec.FEATURE] if signal_codec.AVAILABLE else [])
+features = {}
+
+# room 없이 입장한 sender가 들어갈 방 (비어 있으면 방이 하나뿐일 때만 자동 배정)
+DEFAULT_ROOM = os.environ.get("SIGNALING_DEFAULT_ROOM", "")
+
+
+class Room:
+    """receiver 하나와 그 sender들 (방 이름 = receiver 이름)
+
+    비디오 월은 wall=True로 입장한 receiver 여러 대가 한 방을 쓴다 (방 이름 = 월 id).
+    sender는 receiver마다 따로 연결을 맺으므로 sender의 시그널은 'to'로 receiver를 고른다.
+    """
+
+    __slots__ = ("name", "receivers", "senders", "names")
+
+    def __init__(self, name):
+        self.name = name
+        self.receivers = []   # 입장 순서 (첫 번째가 대표 receiver)
+        self.senders = {}   # sender_id -> {id, name}
+        self.names = {}     # sender name -> sender_id (중복 이름 검사용 인덱스)
+
+    @property
+    def receiver(self):
+        return self.receivers[0] if self.receivers else None
+
+    def add_sender(self, sid, name):
+        self.senders[sid] = {"id": sid, "name": name}
+        self.names[name] = sid
+
+    def remove_sender(self, sid):
+        info = self.senders.pop(sid, None)
+        if info and self.names.get(info["name"]) == sid:
+            del self.names[info["name"]]
+        return info
+
+    def sender_list(self):
+        return list(self.senders.values())
+
+
+rooms = {}       # room name -> Room
+sid_room = {}    # sid -> Room (receiver/sender 공통, 다른 워커의 sid 포함)
+local_sids = set()   # 이 워커에 연결된 소켓
+
+
+# ---------- 방 상태 (워커 간 복제) ----------
+# 상태 변경은 모두 op dict로 표현해 로컬에 적용하고 백플레인으로 다른 워커에 전파한다.
+# 같은 방의 receiver/sender는 라우터가 같은 워커로 보내지만, 다른 워커에 붙은 소켓도
+# 복제된 상태로 찾을 수 있고 emit은 BusManager가 해당 워커로 전달한다.
+def apply_state(op):
+    kind, name, sid = op["op"], op.get("room"), op.get("sid")
+    if kind == "room-open":
+        room = rooms.get(name) or rooms.setdefault(name, Room(name))
+        if op.get("wall"):
+            if sid not in room.receivers:
+                room.receivers.append(sid)
+        else:
+            room.receivers = [sid]
+        sid_room[sid] = room
+        features[sid] = set(op.get("features") or ())
+    elif kind == "receiver-remove":
+        features.pop(sid, None)
+        room = sid_room.pop(sid, None)
+        if room and sid in room.receivers:
+            room.receivers.remove(sid)
+    elif kind == "sender-add":
+        # room-open보다 먼저 도착할 수 있으므로 자리만 만들어 둔다
+        room = rooms.get(name) or rooms.setdefault(name, Room(name))
+        room.add_sender(sid, op["name"])
+        sid_room[sid] = room
+        features[sid] = set(op.get("features") or ())
+    elif kind == "sender-remove":
+        features.pop(sid, None)
+        room = sid_room.pop(sid, None)
+        if room:
+            room.remove_sender(sid)
+    elif kind == "room-close":
+        room = rooms.pop(name, None)
+        if not room:
+            return
+        for s in list(room.senders) + room.receivers:
+            if sid_room.get(s) is room:
+                del sid_room[s]
+        room.receivers.clear()
+        room.senders.clear()
+        room.names.clear()
+
+
+def change_state(op):
+    apply_state(op)
+    if bus:
+        bus.publish(STATE_CHANNEL, dict(op, worker=WORKER_ID))
+
+
+def _republish_local():
+    """새로 뜬 워커를 위해 이 워커에 연결된 소켓의 상태를 다시 알림"""
+    for room in list(rooms.values()):
+        wall = len(room.receivers) > 1
+        for sid in list(room.receivers):
+            if sid in local_sids:
+                bus.publish(STATE_CHANNEL, {"op": "room-open", "room": room.name, "sid": sid,
+                                            "wall": wall, "features": sorted(features.get(sid, ())),
+                                            "worker": WORKER_ID})
+        for sid, info in list(room.senders.items()):
+            if sid in local_sids:
+                bus.publish(STATE_CHANNEL, {"op": "sender-add", "room": room.name, "sid": sid,
+                                            "name": info["name"],
+                                            "features": sorted(features.get(sid, ())),
+                                            "worker": WORKER_ID})
+
+
+async def _state_listener():
+    q = bus.subscribe(STATE_CHANNEL)
+    bus.publish(STATE_CHANNEL, {"op": "hello", "worker": WORKER_ID})
+    while True:
+        op = await q.get()
+        if op.get("worker") == WORKER_ID:
+            continue
+        if op.get("op") == "hello":
+            _republish_local()
+        else:
+            apply_state(op)
+
+
+def _start_backplane():
+    """워커(서버를 직접 띄우는 프로세스)에서 백플레인 연결 + emit을 버스로 전달하는 매니저 설치
+
+    --workers N의 부모(라우터) 프로세스는 소켓을 받지 않으므로 부르지 않는다.
+    """
+    global bus
+    bus = make_bus(BACKPLANE, BACKPLANE_URL, client_id=f"signaling-{WORKER_ID}")
+    if bus:
+        # 첫 연결 전이라 AsyncServer가 아직 매니저를 initialize()하지 않았음
+        sio.manager = BusManager(bus)
+        sio.manager.set_server(sio)
+
+
+async def _on_startup(_app):
+    if bus:
+        sio.start_background_task(_state_listener)
+
+
+app.on_startup.append(_on_startup)
 
 
 # ---------- Helper ----------
-def emit_sender_list():
-    global receiver, senders
-    if receiver:
-        sender_arr = [{"id": s["id"], "name": s["name"]} for s in senders.values()]
-        socketio.emit("sender-list", sender_arr, to=receiver)
+async def emit_to_receivers(room, event, data=None):
+    for rid in list(room.receivers):
+        await sio.emit(event, data, to=rid)
+
+
+async def emit_sender_list(room):
+    await emit_to_receivers(room, "sender-list", room.sender_list())
+
+
+async def relay_signal(data, to):
+    """시그널 중계 (후보 묶음을 모르는 클라이언트에게는 개별 candidate로 풀어서)"""
+    if data.get("type") == "candidates" and "candidates" not in features.get(to, ()):
+        payload = data.get("payload") or {}
+        for c in payload.get("candidates") or []:
+            await sio.emit("signal", {"type": "candidate", "from": data["from"], "to": to,
+                                      "payload": c}, to=to)
+        return
+    await sio.emit("signal", data, to=to)
+
+
+async def relay_signal_bin(sid, data, to):
+    """바이너리 시그널 중계: 받는 쪽이 지원하면 그대로, 아니면 한 번 풀어서 JSON으로"""
+    if signal_codec.FEATURE in features.get(to, ()):
+        await sio.emit("signal-bin", {"from": sid, "data": data["data"]}, to=to)
+        return
+    try:
+        msg = signal_codec.unpack(data["data"])
+    except Exception as e:
+        print("[SIO] signal-bin decode failed:", e)
+        return
+    msg.update({"from": sid, "to": to})
+    await relay_signal(msg, to)
+
+
+def signal_target(sid, room, to):
+    """sender → 'to'로 지정한 receiver (없으면 대표 receiver) / receiver → 같은 방의 sender"""
+    if sid in room.senders:
+        return to if to in room.receivers else room.receiver
+    if sid in room.receivers and to in room.senders:
+        return to
+    return None
+
+
+def resolve_room(name):
+    """sender가 지정한 방 (없으면 기본 방 또는 유일한 방)"""
+    if name:
+        return rooms.get(name)
+    if DEFAULT_ROOM:
+        return rooms.get(DEFAULT_ROOM)
+    if len(rooms) == 1:
+        return next(iter(rooms.values()))
+    return None
+
+
+async def close_room(room):
+    """receiver가 나가거나 방을 지우면 sender들에게 알리고 방 제거"""
+    await sio.emit("room-deleted", to=room.name, skip_sid=list(room.receivers))
+    await sio.close_room(room.name)
+    change_state({"op": "room-close", "room": room.name})
 
 
 # ---------- Socket Events ----------
-@socketio.on("share-request")
-def handle_share_request(data):
+@sio.on("share-request")
+async def handle_share_request(sid, data):
+    room = sid_room.get(sid)
     to = data.get("to")
-    emit("share-request", {"from": request.sid}, to=to)
+    if room and sid in room.receivers and to in room.senders:
+        await sio.emit("share-request", {"from": sid}, to=to)
 
 
-@socketio.on("share-started")
-def handle_share_started(data):
-    global receiver
-    if not receiver:
+@sio.on("share-started")
+async def handle_share_started(sid, data):
+    room = sid_room.get(sid)
+    if not room or not room.receiver:
         return
-    sender_info = senders.get(request.sid, {})
-    display_name = sender_info.get("name") or data.get("name") or f"Sender-{request.sid[:5]}"
-    emit("sender-share-started", {"id": request.sid, "name": display_name}, to=receiver)
-    emit_sender_list()
+    sender_info = room.senders.get(sid, {})
+    display_name = sender_info.get("name") or data.get("name") or f"Sender-{sid[:5]}"
+    await emit_to_receivers(room, "sender-share-started", {"id": sid, "name": display_name})
+    await emit_sender_list(room)
 
 
-@socketio.on("sender-share-stopped")
-def handle_sender_stopped():
-    global receiver
-    if receiver:
-        emit("sender-share-stopped", {"id": request.sid}, to=receiver)
+@sio.on("sender-share-stopped")
+async def handle_sender_stopped(sid, data=None):
+    room = sid_room.get(sid)
+    if room:
+        await emit_to_receivers(room, "sender-share-stopped", {"id": sid})
 
 
-@socketio.on("del-room")
-def handle_del_room(data):
-    global receiver, senders
-    if data.get("role") == "receiver":
-        for sender_id in list(senders.keys()):
-            emit("room-deleted", to=sender_id)
-        receiver = None
-        senders.clear()
+@sio.on("del-room")
+async def handle_del_room(sid, data):
+    room = sid_room.get(sid)
+    if data.get("role") == "receiver" and room and sid in room.receivers:
+        await close_room(room)
 
 
-@socketio.on("join-room")
-def handle_join_room(data):
+@sio.on("join-room")
+async def handle_join_room(sid, data):
     """
-    Flask-SocketIO에서는 서버 핸들러가 return 값을 주면
-    클라이언트 emit 의 ack(callback) 함수로 전달됨.
+    반환 값은 클라이언트 emit의 ack(callback) 함수로 전달됨.
+    receiver: name이 방 이름 (wall=True면 기존 방에 receiver로 추가) / sender: room으로 방 지정 (생략 시 기본 방)
     """
-    global receiver, senders
+    data = data or {}
     role = data.get("role")
     name = data.get("name")
+    feats = sorted(set(data.get("features") or []) & set(SERVER_FEATURES))
+    features[sid] = set(feats)
+    local_sids.add(sid)
 
     if role == "receiver":
-        receiver = request.sid
-        emit_sender_list()
-        return {"success": True}
+        room_name = name or "default"
+        change_state({"op": "room-open", "room": room_name, "sid": sid,
+                      "wall": bool(data.get("wall")), "features": feats})
+        room = rooms[room_name]
+        await sio.enter_room(sid, room_name)
+        await emit_sender_list(room)
+        return {"success": True, "room": room_name, "features": SERVER_FEATURES}
 
     # sender
-    if not receiver:
+    room = resolve_room(data.get("room"))
+    if not room or not room.receiver:
         return {"success": False, "message": "리시버가 없습니다."}
 
-    if any(s["name"] == name for s in senders.values()):
+    if name and name in room.names:
         return {"success": False, "message": "이미 사용 중인 이름입니다."}
 
-    assigned_name = name or f"Sender-{request.sid[:5]}"
-    senders[request.sid] = {"id": request.sid, "name": assigned_name}
+    assigned_name = name or f"Sender-{sid[:5]}"
+    change_state({"op": "sender-add", "room": room.name, "sid": sid, "name": assigned_name,
+                  "features": feats})
+    await sio.enter_room(sid, room.name)
 
-    emit_sender_list()
-    emit("joined-room", {"name": assigned_name}, to=request.sid)
-    emit("join-complete", {"name": assigned_name}, to=request.sid)
+    await emit_sender_list(room)
+    await sio.emit("joined-room", {"name": assigned_name}, to=sid)
+    await sio.emit("join-complete", {"name": assigned_name}, to=sid)
 
-    return {"success": True, "name": assigned_name}
+    return {"success": True, "name": assigned_name, "room": room.name, "features": SERVER_FEATURES,
+            "receivers": list(room.receivers)}
 
 
-@socketio.on("signal")
-def handle_signal(data):
-    global receiver, senders
+@sio.on("signal")
+async def handle_signal(sid, data):
     data = data or {}
-    data["from"] = request.sid
-
-    if request.sid in senders:  # sender
-        if receiver:
-            data["to"] = receiver
-            emit("signal", data, to=receiver)
-    elif request.sid == receiver:  # receiver
-        target = data.get("to")
-        if target and target in senders:
-            emit("signal", data, to=target)
-
-
-@socketio.on("disconnect")
-def handle_disconnect():
-    global receiver, senders
-    if request.sid in senders:  # sender out
-        del senders[request.sid]
-        if receiver:
-            emit("sender-disconnected", {"id": request.sid}, to=receiver)
-            emit_sender_list()
-    elif request.sid == receiver:  # receiver out
-        for sender_id in list(senders.keys()):
-            emit("room-deleted", to=sender_id)
-        receiver = None
-        senders.clear()
+    data["from"] = sid
+    room = sid_room.get(sid)
+    target = room and signal_target(sid, room, data.get("to"))
+    if target:
+        data["to"] = target
+        await relay_signal(data, target)
 
 
-# ---------- Start Server ----------
-if __name__ == "__main__":
-    base_dir = os.path.dirname(__file__)
-    sender_dir = os.path.join(base_dir, "../sender")
+@sio.on("signal-bin")
+async def handle_signal_bin(sid, data):
+    """{to, data: bytes} — data는 풀지 않고 중계 (signal_codec 참고)"""
+    if not isinstance(data, dict) or not isinstance(data.get("data"), (bytes, bytearray)):
+        return
+    room = sid_room.get(sid)
+    target = room and signal_target(sid, room, data.get("to"))
+    if target:
+        await relay_signal_bin(sid, data, target)
 
+
+@sio.event
+async def disconnect(sid):
+    local_sids.discard(sid)
+    room = sid_room.get(sid)
+    if not room:
+        features.pop(sid, None)
+        return
+    if sid in room.senders:  # sender out
+        change_state({"op": "sender-remove", "room": room.name, "sid": sid})
+        await emit_to_receivers(room, "sender-disconnected", {"id": sid})
+        await emit_sender_list(room)
+    elif sid in room.receivers:  # receiver out
+        if len(room.receivers) > 1:
+            # 월 멤버 하나만 빠짐: sender들은 그 receiver와의 연결만 닫는다
+            change_state({"op": "receiver-remove", "room": room.name, "sid": sid})
+            await sio.emit("receiver-left", {"id": sid}, to=room.name, skip_sid=list(room.receivers))
+            return
+        features.pop(sid, None)
+        await close_room(room)
+
+
+# ---------- Start Server ----------
+def _ssl_context(use_tls):
+    if not use_tls:
+        return None
+    sender_dir = os.path.join(os.path.dirname(__file__), "../sender")
     cert_path = os.path.abspath(os.path.join(sender_dir, "cert.pem"))
     key_path = os.path.abspath(os.path.join(sender_dir, "key.pem"))
+    ctx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    ctx.load_cert_chain(cert_path, key_path)
+    return ctx
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="MultiPy signaling server")
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("SIGNALING_WORKERS", "1")),
+                    help="워커 프로세스 수 (2 이상이면 백플레인 필요, 기본 mqtt)")
+    ap.add_argument("--reuse-port", action="store_true",
+                    help="라우터 없이 워커들이 SO_REUSEPORT로 같은 포트를 공유 (websocket 전용 클라이언트)")
+    args = ap.parse_args()
+
+    host = os.environ.get("SIGNALING_HOST", "0.0.0.0")
+    port = int(os.environ.get("SIGNALING_PORT", "3001"))
+    # SIGNALING_TLS=0: 로컬 벤치마크처럼 인증서 없이 평문으로 실행
+    use_tls = os.environ.get("SIGNALING_TLS", "1") != "0"
 
-    socketio.run(
-        app,
-        host="0.0.0.0",
-        port=3001,
-        ssl_context=(cert_path, key_path)
-    )
+    if args.workers > 1:
+        from router import serve_workers
+        serve_workers(host, port, _ssl_context(use_tls), args.workers,
+                      backplane=BACKPLANE or "mqtt", reuse_port=args.reuse_port,
+                      default_room=DEFAULT_ROOM)
+    else:
+        _start_backplane()
+        web.run_app(
+            app,
+            host=host,
+            port=port,
+            ssl_context=_ssl_context(use_tls),
+            reuse_port=os.environ.get("SIGNALING_REUSE_PORT") == "1",
+            print=None,
+        )
@@ -0,0 +1,135 @@
+# router.py
+# --workers N 실행 시 워커 프로세스 관리 + 방 단위 고정(sticky) TCP 라우터
+#
+# 공개 포트는 부모 프로세스의 라우터가 받고, HTTP 요청 첫 줄의 ?room= 값으로 워커를 골라
+# 연결을 통째로 넘긴다 (Engine.IO 폴링/업그레이드 요청이 항상 같은 워커로 가야 하므로).
+# 같은 방의 receiver/sender가 한 워커에 모여 대부분의 중계가 백플레인을 거치지 않는다.
+# 워커들은 127.0.0.1의 연속 포트에서 평문으로 뜨고 TLS는 라우터가 종단한다.
+#
+# --reuse-port: 라우터 없이 각 워커가 공개 포트를 SO_REUSEPORT로 공유한다.
+# 커널이 연결 단위로 분산하므로 websocket 전용 클라이언트(transports=['websocket'])만 지원.
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import zlib
+from urllib.parse import parse_qs, urlsplit
+
+HEAD_LIMIT = 64 * 1024
+
+
+def _route_key(head, default_room, peer):
+    """요청 줄의 room 쿼리 → 없으면 기본 방 → 없으면 클라이언트 IP"""
+    try:
+        target = head.split(b"\r\n", 1)[0].split(b" ")[1].decode("latin-1")
+        room = parse_qs(urlsplit(target).query).get("room", [""])[0]
+    except (IndexError, UnicodeDecodeError):
+        room = ""
+    return room or default_room or (peer[0] if peer else "")
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                break
+            writer.write(chunk)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+def _make_handler(ports, default_room):
+    async def handle(reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        key = _route_key(head, default_room, writer.get_extra_info("peername"))
+        port = ports[zlib.crc32(key.encode()) % len(ports)]
+        try:
+            up_reader, up_writer = await asyncio.open_connection("127.0.0.1", port, limit=HEAD_LIMIT)
+        except OSError as e:
+            print(f"[SIO] router: worker :{port} unreachable:", e)
+            writer.close()
+            return
+        up_writer.write(head)
+        await asyncio.gather(_pipe(reader, up_writer), _pipe(up_reader, writer))
+
+    return handle
+
+
+def _spawn(n, backplane, base_port, public):
+    """워커 n개 실행. public=(host, port, tls)이면 각 워커가 공개 포트를 공유 (reuse-port)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    procs = []
+    for i in range(n):
+        env = dict(os.environ, SIGNALING_WORKER_ID=f"w{i}", SIGNALING_BACKPLANE=backplane)
+        if public:
+            host, port, tls = public
+            env.update(SIGNALING_HOST=host, SIGNALING_PORT=str(port),
+                       SIGNALING_TLS="1" if tls else "0", SIGNALING_REUSE_PORT="1")
+        else:
+            env.update(SIGNALING_HOST="127.0.0.1", SIGNALING_PORT=str(base_port + i),
+                       SIGNALING_TLS="0")
+        procs.append(subprocess.Popen([sys.executable, os.path.join(here, "index.py"),
+                                       "--workers", "1"], env=env))
+    return procs
+
+
+def serve_workers(host, port, ssl_context, n, backplane="mqtt", reuse_port=False,
+                  default_room=""):
+    if backplane != "mqtt":
+        # LocalBus는 한 프로세스 안에서만 전달하므로 워커 간 emit/방 상태가 사라진다
+        raise SystemExit(f"[SIO] --workers {n} requires SIGNALING_BACKPLANE=mqtt (got {backplane!r})")
+    base_port = int(os.environ.get("SIGNALING_WORKER_BASE_PORT", str(port + 100)))
+    public = (host, port, ssl_context is not None) if reuse_port else None
+    procs = _spawn(n, backplane, base_port, public)
+    print(f"[SIO] {n} workers (backplane={backplane}, "
+          f"{'reuse-port' if reuse_port else f'router :{port} -> :{base_port}..{base_port + n - 1}'})")
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+
+        async def watch():
+            # 워커가 죽으면 전체 종료 (상위 프로세스 관리자가 재시작)
+            while all(p.poll() is None for p in procs):
+                await asyncio.sleep(1.0)
+            if not stop.done():
+                print("[SIO] worker exited, shutting down")
+                stop.set_result(None)
+
+        server = None
+        if not reuse_port:
+            ports = [base_port + i for i in range(n)]
+            server = await asyncio.start_server(_make_handler(ports, default_room), host, port,
+                                                ssl=ssl_context, limit=HEAD_LIMIT)
+        watcher = asyncio.ensure_future(watch())
+        await stop
+        watcher.cancel()
+        if server:
+            server.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        for p in procs:
+            if p.poll() is None:
+                p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                p.kill()